@@ -0,0 +1,147 @@
+"""
+import time benchmark of the helper modules (tables_scraper, mt5, telegram)
+
+imports each module in a fresh interpreter with `python -X importtime`, and reports for each module:
+the median import time (its cumulative time, the interpreter startup excluded), its slowest imports,
+and the heavy dependencies loaded by the import (they must be loaded on first use only).
+exits with code 1 if a module is over the budget or loads a heavy dependency.
+
+usage:
+    python benchmark_imports.py                     # 5 runs per module, 150 ms budget
+    python benchmark_imports.py --runs 10 --budget 100
+    python benchmark_imports.py --module telegram --top 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from statistics import median
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# module -> (directory, imported module, heavy dependencies loaded on first use)
+MODULES = {
+    "tables_scraper": (
+        "tables_scraper",
+        "tables_scraper",
+        ("selenium", "lxml", "pandas", "pyarrow", "aiohttp"),
+    ),
+    "mt5": ("metatrader5", "mt5", ("MetaTrader5", "pandas", "numpy")),
+    "telegram": ("telegram", "telegram", ("telethon", "pyarrow")),
+}
+
+
+def import_once(directory: str, module: str, heavy: tuple) -> tuple:
+    """
+    import the module in a fresh interpreter, returns
+    (cumulative import time in seconds, [(seconds, name) of its direct imports], [loaded heavy dependencies])
+    """
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([name for name in {list(heavy)!r} if name in sys.modules]))"
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.join(ROOT, directory),
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode:
+        raise Exception(
+            f"Failed to import {module}: {process.stderr.strip().splitlines()[-1]}"
+        )
+
+    # "import time: self [us] | cumulative | name", the imports are listed before the importing module
+    children, total = [], None
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == 0:
+            if name.strip() == module:
+                total = int(cumulative) / 1e6
+                break
+            children = []
+        elif level == 1:
+            children.append((int(cumulative) / 1e6, name.strip()))
+    if total is None:
+        raise Exception(f"{module} is not in the -X importtime output")
+    return total, sorted(children, reverse=True), json.loads(process.stdout)
+
+
+def run_module(name: str, runs: int) -> dict:
+    """import the module runs times (after a warm-up import compiling the bytecode), returns the median run"""
+    directory, module, heavy = MODULES[name]
+    import_once(directory, module, heavy)
+    results = sorted(
+        (import_once(directory, module, heavy) for _ in range(runs)),
+        key=lambda result: result[0],
+    )
+    return {
+        "seconds": median(result[0] for result in results),
+        "min": results[0][0],
+        "max": results[-1][0],
+        "children": results[len(results) // 2][1],
+        "loaded": sorted(
+            {dependency for result in results for dependency in result[2]}
+        ),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="import time benchmark of the helper modules"
+    )
+    parser.add_argument(
+        "--module",
+        choices=MODULES,
+        action="append",
+        help="module to import (default: all)",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=5,
+        help="imports per module, the median is reported (default: 5)",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=150.0,
+        help="max median import time per module in ms (default: 150)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=5,
+        help="slowest direct imports reported per module (default: 5)",
+    )
+    args = parser.parse_args()
+
+    failures = []
+    for name in args.module or MODULES:
+        result = run_module(name, max(1, args.runs))
+        ms = result["seconds"] * 1000
+        print(
+            f"{name:<16} {ms:8.1f} ms  (min={result['min'] * 1000:.1f} ms, max={result['max'] * 1000:.1f} ms, "
+            f"budget={args.budget:.0f} ms)"
+        )
+        for seconds, child in result["children"][: args.top]:
+            print(f"    {seconds * 1000:8.1f} ms  {child}")
+        if ms > args.budget:
+            failures.append(f"{name}: {ms:.1f} ms over the {args.budget:.0f} ms budget")
+        if result["loaded"]:
+            failures.append(f"{name}: loads {', '.join(result['loaded'])} on import")
+
+    for failure in failures:
+        print(f"FAILED {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+a cached snapshot of MetaTrader5.account_info() used by the account properties of the main module (mt5)
+"""
+
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from threading import Event, Lock, Thread, local
+from time import monotonic
+from collections.abc import Iterator
+from _lazy import TERMINAL_LOCK, LazyModule
+
+# loaded on first use (see LazyModule)
+mt = LazyModule("MetaTrader5", TERMINAL_LOCK)
+
+
+class AccountSnapshot:
+    """
+    one MetaTrader5.account_info() call serves all the reads until the snapshot is older than max_age,
+    the snapshot can be refreshed by a background thread and pinned (per thread) for a consistent set of reads
+    """
+
+    def __init__(self, max_age: float = 0.0, executor: "Executor|None" = None) -> None:
+        """
+        Args:
+            max_age (optional) : seconds a snapshot is reused, default is 0.0 (refreshed on every read, except when pinned)
+            executor (optional) : an executor owning the terminal calls (e.g the TerminalExecutor of AsyncMt5),
+                the background refreshes then run on it, default is None (they run on the refresher thread)
+        """
+        self.max_age = max_age
+        self.executor = executor
+        # the background refresh queued on the executor
+        self._pending: "Future|None" = None
+        self._info = None
+        self._taken = 0.0
+        self._lock = Lock()
+        # per thread stack of the pinned snapshots
+        self._pinned = local()
+        self._stop = Event()
+        self._thread: "Thread|None" = None
+        self._stats = {"refreshes": 0, "hits": 0, "errors": 0}
+
+    # ========== read/refresh ==========#
+    def get(self):
+        """return the pinned snapshot, or the current one (refreshed if older than max_age)"""
+        if pinned := getattr(self._pinned, "stack", None):
+            return pinned[-1]
+        with self._lock:
+            if self._info is not None and monotonic() - self._taken <= self.max_age:
+                self._stats["hits"] += 1
+                return self._info
+        return self.refresh()
+
+    def refresh(self):
+        """
+        take a new snapshot (one MetaTrader5.account_info() call) and return it,
+        it will raise an Exception if the terminal returns None
+        """
+        info = mt.account_info()
+        with self._lock:
+            if info is None:
+                self._stats["errors"] += 1
+                raise Exception(f"Failed to get account info: {mt.last_error()}")
+            self._info, self._taken = info, monotonic()
+            self._stats["refreshes"] += 1
+        return info
+
+    @contextmanager
+    def pin(self, max_age: "float|None" = None) -> Iterator:
+        """
+        all the reads of the current thread return the same snapshot within the block
+        Args:
+            max_age (optional) : the snapshot is refreshed before pinning if older than max_age, default is the max_age of the snapshot
+        """
+        with self._lock:
+            fresh = self._info is not None and monotonic() - self._taken <= (
+                self.max_age if max_age is None else max_age
+            )
+            info = self._info
+        if not fresh:
+            info = self.refresh()
+        if not hasattr(self._pinned, "stack"):
+            self._pinned.stack = []
+        self._pinned.stack.append(info)
+        try:
+            yield info
+        finally:
+            self._pinned.stack.pop()
+
+    @property
+    def age(self) -> "float|None":
+        """seconds since the last refresh, None if never refreshed"""
+        with self._lock:
+            return None if self._info is None else monotonic() - self._taken
+
+    @property
+    def stats(self) -> dict:
+        """counters: refreshes, hits (reads served by a cached snapshot), errors, and the age of the snapshot"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["age"] = self.age
+        return stats
+
+    # ========== background refresher ==========#
+    def start(self, interval: float = 1.0) -> None:
+        """refresh the snapshot every interval seconds on a background (daemon) thread"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = Thread(
+            target=self._run, args=(interval,), name="mt5-account", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """stop the background refresher"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+
+    @property
+    def running(self) -> bool:
+        """True if the background refresher is running"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.executor is None:
+                    self.refresh()
+                # the refresh is not waited for (the executor thread can stop the refresher), skipped while the previous one is queued
+                elif self._pending is None or self._pending.done():
+                    self._pending = self.executor.submit(self.refresh)
+            except Exception:
+                pass
+            self._stop.wait(interval)
@@ -0,0 +1,142 @@
+"""
+a single thread executor owning the terminal calls, used by the asyncio facade of the main module (mt5)
+"""
+
+from collections import deque
+from math import ceil
+from concurrent.futures import Future
+from queue import Full, Queue
+from threading import Lock, Thread, get_ident
+from time import perf_counter
+
+
+def percentile(samples: list, p: float) -> float:
+    """the p-th percentile (nearest rank) of the sorted samples, 0.0 if no samples"""
+    return samples[max(0, ceil(p / 100 * len(samples)) - 1)] if samples else 0.0
+
+
+class TerminalExecutor:
+    """
+    runs the submitted calls one by one, in the submission order, on a single dedicated thread
+    (the calls submitted from this thread run inline, so a call can use the executor without deadlock)
+    """
+
+    def __init__(self, max_queue: int = 0, samples: int = 1024) -> None:
+        """
+        Args:
+            max_queue (optional) : max queued calls (submit() raises when full), default is 0 (unbounded)
+            samples (optional) : number of recent latencies kept for the percentiles, default is 1024
+        """
+        self._queue: Queue = Queue(max_queue)
+        self._lock = Lock()
+        self._thread: "Thread|None" = None
+        self._closed = False
+        self._running = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "rejected": 0,
+        }
+        self._waits: deque = deque(maxlen=samples)
+        self._runs: deque = deque(maxlen=samples)
+
+    def submit(self, function, *args, **kwargs) -> Future:
+        """
+        queue the call and return its Future (cancelling the Future before the call starts skips it),
+        it will raise an Exception if the executor is closed or its queue is full
+        """
+        with self._lock:
+            if self._closed:
+                raise Exception("The terminal executor is closed")
+            if self._thread is None:
+                self._thread = Thread(
+                    target=self._run, name="mt5-terminal", daemon=True
+                )
+                self._thread.start()
+        future = Future()
+        if self.in_thread():
+            with self._lock:
+                self._stats["submitted"] += 1
+            self._execute(future, function, args, kwargs, perf_counter())
+            return future
+        try:
+            self._queue.put_nowait((future, function, args, kwargs, perf_counter()))
+        except Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise Exception(f"The terminal queue is full ({self._queue.maxsize} calls)")
+        with self._lock:
+            self._stats["submitted"] += 1
+        return future
+
+    def in_thread(self) -> bool:
+        """True if called from the executor thread"""
+        thread = self._thread
+        return thread is not None and get_ident() == thread.ident
+
+    def shutdown(self, wait: bool = True) -> None:
+        """stop accepting calls, the queued calls are still executed"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            if wait and get_ident() != thread.ident:
+                thread.join()
+
+    @property
+    def metrics(self) -> dict:
+        """
+        executor metrics:
+            - queue_depth: calls waiting for the thread, running: 0 or 1
+            - submitted (the inline calls of the executor thread included), completed, failed, cancelled (skipped before starting)
+              and rejected (queue full) calls
+            - wait_p50/wait_p99/wait_max: seconds waited in the queue (recent calls)
+            - run_p50/run_p99/run_max: seconds spent by the calls (recent calls)
+        """
+        with self._lock:
+            metrics = {
+                "queue_depth": self._queue.qsize(),
+                "running": self._running,
+                **self._stats,
+            }
+            for name, samples in (
+                ("wait", sorted(self._waits)),
+                ("run", sorted(self._runs)),
+            ):
+                for p in (50, 99):
+                    metrics[f"{name}_p{p}"] = percentile(samples, p)
+                metrics[f"{name}_max"] = samples[-1] if samples else 0.0
+        return metrics
+
+    def _run(self) -> None:
+        while (job := self._queue.get()) is not None:
+            self._execute(*job)
+
+    def _execute(
+        self, future: Future, function, args: tuple, kwargs: dict, queued: float
+    ) -> None:
+        if not future.set_running_or_notify_cancel():
+            with self._lock:
+                self._stats["cancelled"] += 1
+            return
+        start = perf_counter()
+        with self._lock:
+            self._running += 1
+            self._waits.append(start - queued)
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            outcome = "failed"
+        else:
+            future.set_result(result)
+            outcome = "completed"
+        with self._lock:
+            self._running -= 1
+            self._runs.append(perf_counter() - start)
+            self._stats[outcome] += 1
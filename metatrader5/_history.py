@@ -0,0 +1,271 @@
+"""
+a local SQLite store of the deals history used by the main module (mt5), synced incrementally from the terminal
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from fnmatch import fnmatchcase
+from threading import Lock
+from _lazy import TERMINAL_LOCK, LazyModule
+
+# loaded on first use (see LazyModule)
+mt = LazyModule("MetaTrader5", TERMINAL_LOCK)
+pd = LazyModule("pandas")
+
+# fields of MetaTrader5.TradeDeal (used when the terminal returns no deal)
+DEAL_FIELDS = (
+    "ticket",
+    "order",
+    "time",
+    "time_msc",
+    "type",
+    "entry",
+    "magic",
+    "position_id",
+    "reason",
+    "volume",
+    "price",
+    "commission",
+    "swap",
+    "profit",
+    "fee",
+    "symbol",
+    "comment",
+    "external_id",
+)
+
+
+def deals_frame(deals) -> "pd.DataFrame":
+    """
+    build a DataFrame from MetaTrader5.history_deals_get() result (tuple of named tuples or numpy structured array),
+    an empty result gives an empty DataFrame with the deals columns
+    """
+    if deals is None or len(deals) == 0:
+        return pd.DataFrame(columns=list(DEAL_FIELDS))
+    if hasattr(deals, "dtype"):
+        return pd.DataFrame(deals)
+    return pd.DataFrame(deals, columns=deals[0]._fields)
+
+
+def to_seconds(date: datetime) -> int:
+    """
+    the seconds since 1970 of a date as the terminal counts the deals times (server time without the shift, like UTC),
+    a naive date is taken as server time, an aware date is converted to UTC
+    """
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return int(date.timestamp())
+
+
+def from_seconds(seconds: int) -> datetime:
+    """the aware (UTC) date of seconds since 1970 (see to_seconds()), passed as is to the terminal"""
+    return datetime.fromtimestamp(seconds, timezone.utc)
+
+
+def fetch_deals(from_date: datetime, to_date: datetime, group: str = "*") -> tuple:
+    """
+    return MetaTrader5.history_deals_get() deals of the period (empty tuple if no deal),
+    it will raise an Exception if the terminal returns an error
+    """
+    deals = mt.history_deals_get(from_date, to_date, group=group)
+    if deals is None:
+        # None is also returned when there is no deal (last_error is then a success code)
+        if (error := mt.last_error())[0] < 0:
+            raise Exception(f"Failed to get deals history: {error}")
+        return ()
+    return deals
+
+
+def match_group(symbols: "pd.Series", group: str) -> "pd.Series":
+    """
+    mask of the symbols matching a MetaTrader5 group filter,
+    e.g "*" (all), "EURUSD" or "*USD*,!EUR*" (the masks with "!" exclude the symbols)
+    """
+    masks = [mask.strip() for mask in group.split(",") if mask.strip()]
+    include = [mask for mask in masks if not mask.startswith("!")]
+    exclude = [mask[1:] for mask in masks if mask.startswith("!")]
+    unique = symbols.drop_duplicates()
+    selected = {
+        symbol
+        for symbol in unique
+        if (not include or any(fnmatchcase(symbol, mask) for mask in include))
+        and not any(fnmatchcase(symbol, mask) for mask in exclude)
+    }
+    return symbols.isin(selected)
+
+
+class HistoryStore:
+    """
+    keeps the deals in a local SQLite database keyed by ticket, and remembers the synced period,
+    so only the missing periods are fetched from the terminal (in chunks of chunk_days),
+    the stored deals are loaded once in a DataFrame (sorted by time) that the new deals are merged into.
+    the periods are compared with the deals times (server time): naive dates are taken as server time,
+    aware dates are converted to UTC (see to_seconds())
+    """
+
+    def __init__(
+        self,
+        path: str = "history.sqlite",
+        chunk_days: int = 30,
+        overlap: timedelta = timedelta(days=1),
+    ) -> None:
+        """
+        Args:
+            path (optional) : the SQLite file, default is "history.sqlite" (":memory:" to keep the deals in memory)
+            chunk_days (optional) : days of deals fetched per terminal request, default is 30
+            overlap (optional) : period before the end of the synced period that is fetched again on every sync
+                (deals times are in server time, the overlap catches the deals recorded around the last sync), default is 1 day
+        """
+        if path != ":memory:" and (directory := os.path.dirname(path)):
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS synced (id INTEGER PRIMARY KEY CHECK (id = 0), start INTEGER, end INTEGER)"
+        )
+        self._chunk = timedelta(days=chunk_days)
+        self._overlap = overlap
+        self._lock = Lock()
+        self._stats = {"requests": 0, "fetched_deals": 0, "queries": 0}
+        # the stored deals sorted by time, loaded by the first query
+        self._frame: "pd.DataFrame|None" = None
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """close the database"""
+        with self._lock:
+            self._connection.close()
+
+    @property
+    def stats(self) -> dict:
+        """counters: terminal requests, fetched deals (including the overlaps) and queries"""
+        with self._lock:
+            return dict(self._stats)
+
+    @property
+    def synced_period(self) -> "tuple[datetime, datetime]|None":
+        """the synced (start, end) period (aware UTC dates, see to_seconds()), None if nothing is synced yet"""
+        with self._lock:
+            if (period := self._synced()) is None:
+                return None
+            return from_seconds(period[0]), from_seconds(period[1])
+
+    # ========== sync/query ==========#
+    def sync(self, from_date: datetime, to_date: datetime) -> None:
+        """fetch the deals of the period that are not synced yet"""
+        start, end = to_seconds(from_date), to_seconds(to_date)
+        with self._lock:
+            if (period := self._synced()) is None:
+                self._fetch(start, end)
+                self._set_synced(start, end)
+                return
+            synced_start, synced_end = period
+            if start < synced_start:
+                self._fetch(start, synced_start)
+                synced_start = start
+            if end > synced_end:
+                # from the end of the synced period (minus the overlap) to keep the synced period contiguous
+                self._fetch(synced_end - int(self._overlap.total_seconds()), end)
+                synced_end = end
+            self._set_synced(synced_start, synced_end)
+
+    def get(
+        self, from_date: datetime, to_date: datetime, group: str = "*"
+    ) -> "pd.DataFrame":
+        """sync the period and return its deals (sorted by time) matching the group filter"""
+        self.sync(from_date, to_date)
+        with self._lock:
+            self._stats["queries"] += 1
+            frame = self._load()
+        times = frame["time"].to_numpy()
+        start = times.searchsorted(to_seconds(from_date), side="left")
+        end = times.searchsorted(to_seconds(to_date), side="right")
+        deals = frame.iloc[start:end].reset_index(drop=True)
+        if group.strip() != "*":
+            deals = deals[match_group(deals["symbol"], group)].reset_index(drop=True)
+        return deals
+
+    def clear(self) -> None:
+        """remove all the stored deals"""
+        with self._lock:
+            self._connection.execute("DROP TABLE IF EXISTS deals")
+            self._connection.execute("DELETE FROM synced")
+            self._connection.commit()
+            self._frame = None
+
+    # ========== helpers (the lock must be held) ==========#
+    def _synced(self) -> "tuple[int, int]|None":
+        return self._connection.execute(
+            "SELECT start, end FROM synced WHERE id = 0"
+        ).fetchone()
+
+    def _set_synced(self, start: int, end: int) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO synced (id, start, end) VALUES (0, ?, ?)",
+            (start, end),
+        )
+        self._connection.commit()
+
+    def _has_deals(self) -> bool:
+        return (
+            self._connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'deals'"
+            ).fetchone()
+            is not None
+        )
+
+    def _load(self) -> "pd.DataFrame":
+        """return the stored deals (loaded from the database on the first call)"""
+        if self._frame is None:
+            if self._has_deals():
+                self._frame = pd.read_sql_query(
+                    "SELECT * FROM deals ORDER BY time, ticket", self._connection
+                )
+            else:
+                self._frame = deals_frame(())
+        return self._frame
+
+    def _merge(self, deals: list) -> None:
+        """merge the fetched deals into the loaded DataFrame (replacing the deals with the same tickets)"""
+        new = deals_frame(deals).drop_duplicates("ticket", keep="last")
+        if len(self._frame):
+            kept = self._frame[~self._frame["ticket"].isin(new["ticket"])]
+            new = pd.concat([kept, new], ignore_index=True)
+        self._frame = new.sort_values(["time", "ticket"], ignore_index=True)
+
+    def _fetch(self, start: int, end: int) -> None:
+        """fetch the deals of the period in chunks, upsert them and merge them into the loaded DataFrame"""
+        # loaded before the insertion, so a new store never reads back its deals
+        self._load()
+        chunk = int(self._chunk.total_seconds())
+        fetched = []
+        for chunk_start in range(start, end, chunk):
+            deals = fetch_deals(
+                from_seconds(chunk_start), from_seconds(min(chunk_start + chunk, end))
+            )
+            self._stats["requests"] += 1
+            if not deals:
+                continue
+            self._stats["fetched_deals"] += len(deals)
+            fields = deals[0]._fields
+            columns = ", ".join(f'"{field}"' for field in fields)
+            if not self._has_deals():
+                self._connection.execute(
+                    f'CREATE TABLE deals ({columns}, PRIMARY KEY ("ticket"))'
+                )
+            # the named tuples are inserted as they are
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO deals ({columns}) VALUES ({', '.join('?' * len(fields))})",
+                deals,
+            )
+            fetched.extend(deals)
+        self._connection.commit()
+        if fetched:
+            self._merge(fetched)
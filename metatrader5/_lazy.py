@@ -0,0 +1,55 @@
+"""
+the terminal lock and the deferred imports of MetaTrader5 and pandas used by the main module (mt5),
+the MetaTrader5 functions are called under the terminal lock
+"""
+
+from functools import wraps
+from importlib import import_module
+from threading import RLock
+
+# taken by every MetaTrader5 call: the terminal connection is shared by the whole process and its calls must not overlap
+# (e.g a reconnection of the supervisor and a read of the AsyncMt5 thread), hold it to run several calls as one,
+# the wrapped function (e.g mt.login.__wrapped__) runs without it
+TERMINAL_LOCK = RLock()
+
+
+class LazyModule:
+    """
+    a module imported on first use (e.g mt.initialize), whose functions are returned wrapped in the lock if one is given
+    (the constants and the result types are returned as they are)
+    """
+
+    def __init__(self, name: str, lock: "RLock|None" = None) -> None:
+        """
+        Args:
+            name : the module name
+            lock (optional) : a lock taken by every call of the module functions (e.g TERMINAL_LOCK), default is None
+        """
+        self.__name = name
+        self.__module = None
+        self.__lock = lock
+        # function name -> the function called under the lock
+        self.__locked: dict = {}
+
+    def __getattr__(self, attribute: str):
+        module = self.__module
+        if module is None:
+            module = self.__module = import_module(self.__name)
+        value = getattr(module, attribute)
+        if self.__lock is None or not callable(value) or isinstance(value, type):
+            return value
+        if (
+            locked := self.__locked.get(attribute)
+        ) is None or locked.__wrapped__ is not value:
+            locked = self.__locked[attribute] = self.__wrap(value)
+        return locked
+
+    def __wrap(self, function):
+        lock = self.__lock
+
+        @wraps(function)
+        def locked(*args, **kwargs):
+            with lock:
+                return function(*args, **kwargs)
+
+        return locked
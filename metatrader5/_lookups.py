@@ -0,0 +1,98 @@
+"""
+in-memory indexes of the deals/orders history and an LRU of the single lookups, used by the main module (mt5)
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from _lazy import TERMINAL_LOCK, LazyModule
+
+# loaded on first use (see LazyModule)
+mt = LazyModule("MetaTrader5", TERMINAL_LOCK)
+
+
+def fetch_orders(from_date: datetime, to_date: datetime) -> tuple:
+    """
+    return MetaTrader5.history_orders_get() orders of the period (empty tuple if no order),
+    it will raise an Exception if the terminal returns an error
+    """
+    orders = mt.history_orders_get(from_date, to_date)
+    if orders is None:
+        if (error := mt.last_error())[0] < 0:
+            raise Exception(f"Failed to get orders history: {error}")
+        return ()
+    return orders
+
+
+def closing_deal(deals) -> "mt.TradeDeal|None":
+    """
+    return the closing deal of a position among its deals (sorted by time): its last exit deal (DEAL_ENTRY_OUT or DEAL_ENTRY_OUT_BY),
+    None if the position is not closed yet
+    """
+    exits = (mt.DEAL_ENTRY_OUT, mt.DEAL_ENTRY_OUT_BY)
+    return next((deal for deal in reversed(deals) if deal.entry in exits), None)
+
+
+class LruCache:
+    """a thread-safe LRU of the history lookups (deals and orders never change once in the history)"""
+
+    def __init__(self, size: int = 4096) -> None:
+        self._size = size
+        self._items: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key):
+        """return the cached value, None if not cached"""
+        with self._lock:
+            if (value := self._items.get(key)) is None:
+                self._stats["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def put(self, key, value) -> None:
+        """cache the value (evicting the least recently used values)"""
+        if self._size <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self._size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    @property
+    def stats(self) -> dict:
+        """counters: hits, misses and cached items"""
+        with self._lock:
+            return {**self._stats, "items": len(self._items)}
+
+
+class HistoryIndex:
+    """
+    indexes of a history window: deals by ticket, deals by position id (sorted by time) and orders by ticket
+    """
+
+    def __init__(self, deals: tuple = (), orders: tuple = ()) -> None:
+        """
+        Args:
+            deals (optional) : MetaTrader5.history_deals_get() deals
+            orders (optional) : MetaTrader5.history_orders_get() orders
+        """
+        self.deals: dict = {deal.ticket: deal for deal in deals}
+        self.positions: "dict[int, list]" = {}
+        for deal in sorted(deals, key=lambda deal: (deal.time_msc, deal.ticket)):
+            self.positions.setdefault(deal.position_id, []).append(deal)
+        self.orders: dict = {order.ticket: order for order in orders}
+
+    def closing_deal(self, position_id: int):
+        """
+        return the closing deal of the position (see closing_deal()),
+        None if the position is not closed within the window (or not in the window)
+        """
+        return closing_deal(self.positions.get(position_id, ()))
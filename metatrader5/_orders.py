@@ -0,0 +1,129 @@
+"""
+structured orders results and the orders submission thread used by the main module (mt5)
+"""
+
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from time import perf_counter
+from _lazy import TERMINAL_LOCK, LazyModule
+
+# loaded on first use (see LazyModule)
+mt = LazyModule("MetaTrader5", TERMINAL_LOCK)
+
+# retcode -> (error code, message) of the known rejections
+_REJECTIONS = {
+    10027: (
+        "autotrading_disabled",
+        "Failed to open trade because AutoTrading is disabled!",
+    ),
+    10016: ("invalid_stops", "Failed to open trade due to invalid stops!"),
+}
+
+
+@dataclass
+class OrderError:
+    """
+    why an order was not executed, code is one of:
+        - "invalid_order": missing field or unknown type
+        - "unknown_pair": the price of the pair could not be fetched
+        - "invalid_price": the entry is too far from the current price
+        - "send_failed": MetaTrader5.order_send() raised or returned None
+        - "autotrading_disabled", "invalid_stops" or "rejected": the terminal rejected the order (see retcode)
+    """
+
+    code: str
+    message: str
+    retcode: "int|None" = None
+
+    def __str__(self) -> str:
+        return self.message
+
+
+@dataclass
+class OrderResult:
+    """
+    result of an order of open_trades():
+        - order: the order as given
+        - result: the MetaTrader5.OrderSendResult (None if the order was not sent)
+        - error: None if the trade is opened
+        - latency: seconds spent by the order -> {"validate", "queued", "send", "total"}
+    """
+
+    order: dict
+    result: "mt.OrderSendResult|None" = None
+    error: "OrderError|None" = None
+    latency: dict = field(default_factory=dict)
+
+    @property
+    def succeed(self) -> bool:
+        """True if the trade is opened"""
+        return self.error is None
+
+
+def check_send_result(result: "mt.OrderSendResult|None") -> "OrderError|None":
+    """return the error of a MetaTrader5.order_send() result, None if the trade is opened"""
+    # if the return is None
+    if result is None:
+        return OrderError(
+            "send_failed", f"Failed to open Trade (returns None): {mt.last_error()}"
+        )
+    # if succeed
+    if result.retcode == mt.TRADE_RETCODE_DONE:
+        return None
+    # known rejections
+    if result.retcode in _REJECTIONS:
+        code, message = _REJECTIONS[result.retcode]
+        return OrderError(code, message, result.retcode)
+    # other errors
+    return OrderError(
+        "rejected",
+        f"MT5 reject the trade: retcode={result.retcode} [{result.comment}]",
+        result.retcode,
+    )
+
+
+class OrderThread:
+    """
+    a dedicated thread sending the orders to the terminal one by one, in the submission order
+    """
+
+    def __init__(self, executor: "Executor|None" = None) -> None:
+        """
+        Args:
+            executor (optional) : a single thread executor owning the terminal calls (e.g the TerminalExecutor of AsyncMt5)
+                to send the orders on instead of a dedicated thread, default is None
+        """
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            1, thread_name_prefix="mt5-orders"
+        )
+
+    def submit(self, request: dict) -> Future:
+        """
+        queue the request, returns a Future of (MetaTrader5.OrderSendResult|None, OrderError|None, latency)
+        where latency is {"queued": seconds waiting for the thread, "send": seconds spent by order_send()}
+        """
+        return self._executor.submit(self._send, request, perf_counter())
+
+    def close(self) -> None:
+        """wait for the queued orders and stop the thread (a given executor is left running)"""
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _send(request: dict, queued_at: float) -> tuple:
+        start = perf_counter()
+        try:
+            result = mt.order_send(request)
+        except Exception as e:
+            result, error = None, OrderError(
+                "send_failed",
+                f"Unexpected error occur when trying to open the trade: {e}",
+            )
+        else:
+            error = check_send_result(result)
+        return (
+            result,
+            error,
+            {"queued": start - queued_at, "send": perf_counter() - start},
+        )
@@ -0,0 +1,184 @@
+"""
+a background quotes feed used by the main module (mt5) to read the prices without terminal round-trips
+"""
+
+from concurrent.futures import Executor, Future
+from threading import Event, Lock, Thread
+from time import monotonic
+from _lazy import TERMINAL_LOCK, LazyModule
+
+# loaded on first use (see LazyModule)
+mt = LazyModule("MetaTrader5", TERMINAL_LOCK)
+
+
+class PriceFeed:
+    """
+    polls MetaTrader5.symbol_info_tick() for the subscribed symbols on a background thread into a quotes table,
+    so the price lookups read the cached quotes in O(1) as long as they are fresh enough
+    (the MetaTrader5 module is resolved on import, a fake module can be put in sys.modules["MetaTrader5"] for tests)
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        max_age: float = 1.0,
+        executor: "Executor|None" = None,
+    ) -> None:
+        """
+        Args:
+            interval (optional) : seconds between two polls of the subscribed symbols, default is 0.1
+            max_age (optional) : seconds after which a quote is stale (not returned by get()), default is 1.0
+            executor (optional) : an executor owning the terminal calls (e.g the TerminalExecutor of AsyncMt5),
+                the polls and the symbols selections then run on it, default is None (they run on the feed thread)
+        """
+        self._interval = interval
+        self._max_age = max_age
+        self.executor = executor
+        # the poll queued on the executor
+        self._pending: "Future|None" = None
+        # symbol -> (bid, ask, tick time in ms, monotonic time of the poll)
+        self._quotes: "dict[str, tuple]" = {}
+        # replaced (never modified in place) so the polling thread iterates a snapshot
+        self._symbols: frozenset = frozenset()
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: "Thread|None" = None
+        self._stats = {"polls": 0, "errors": 0, "hits": 0, "misses": 0}
+
+    def __enter__(self) -> "PriceFeed":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # ========== subscriptions ==========#
+    def subscribe(self, *symbols: str) -> None:
+        """
+        add symbols to the feed,
+        they are selected in the MarketWatch (required by MetaTrader5.symbol_info_tick())
+        """
+        for symbol in symbols:
+            if self.executor is None:
+                mt.symbol_select(symbol, True)
+            else:
+                self.executor.submit(mt.symbol_select, symbol, True).result()
+        with self._lock:
+            self._symbols = self._symbols.union(symbols)
+
+    def unsubscribe(self, *symbols: str) -> None:
+        """remove symbols from the feed"""
+        with self._lock:
+            self._symbols = self._symbols.difference(symbols)
+            for symbol in symbols:
+                self._quotes.pop(symbol, None)
+
+    @property
+    def symbols(self) -> frozenset:
+        """subscribed symbols"""
+        return self._symbols
+
+    # ========== start/stop ==========#
+    def start(self) -> None:
+        """start polling on a background (daemon) thread"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="mt5-price-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """stop polling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+
+    @property
+    def running(self) -> bool:
+        """True if the feed is polling"""
+        return self._thread is not None and self._thread.is_alive()
+
+    # ========== quotes ==========#
+    def get(
+        self, symbol: str, max_age: "float|None" = None
+    ) -> "tuple[float, float]|None":
+        """
+        return the cached (bid, ask) of the symbol,
+        None if the symbol is not subscribed, not polled yet or its quote is stale
+        Args:
+            symbol : e.g "EURUSD"
+            max_age (optional) : overrides the staleness tolerance of the feed (in seconds)
+        """
+        with self._lock:
+            quote = self._quotes.get(symbol)
+            if quote is None or monotonic() - quote[3] > (
+                self._max_age if max_age is None else max_age
+            ):
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            return quote[0], quote[1]
+
+    def quote(self, symbol: str) -> "dict|None":
+        """
+        return the last quote of the symbol (even if stale), None if not polled yet
+        returns:
+        dict like -> {
+            "bid": float
+            "ask": float
+            "time_msc": int
+            "age": float (seconds since the quote was polled)
+        }
+        """
+        with self._lock:
+            quote = self._quotes.get(symbol)
+        if quote is None:
+            return None
+        bid, ask, time_msc, polled = quote
+        return {
+            "bid": bid,
+            "ask": ask,
+            "time_msc": time_msc,
+            "age": monotonic() - polled,
+        }
+
+    @property
+    def stats(self) -> dict:
+        """
+        feed counters:
+            - polls: polls of the subscribed symbols
+            - errors: failed MetaTrader5.symbol_info_tick() calls
+            - hits/misses: lookups answered/not answered from a fresh cached quote
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def poll(self) -> None:
+        """poll the subscribed symbols once (called by the background thread)"""
+        ticks = [(symbol, mt.symbol_info_tick(symbol)) for symbol in self._symbols]
+        now = monotonic()
+        with self._lock:
+            for symbol, tick in ticks:
+                if tick is None:
+                    self._stats["errors"] += 1
+                # skip the symbols unsubscribed during the poll
+                elif symbol in self._symbols:
+                    self._quotes[symbol] = (tick.bid, tick.ask, tick.time_msc, now)
+            self._stats["polls"] += 1
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.executor is None:
+                    self.poll()
+                # the poll is not waited for (the executor thread can stop the feed), skipped while the previous one is queued
+                elif self._pending is None or self._pending.done():
+                    self._pending = self.executor.submit(self.poll)
+            except Exception:
+                with self._lock:
+                    self._stats["errors"] += 1
+            self._stop.wait(self._interval)
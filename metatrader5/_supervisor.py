@@ -0,0 +1,331 @@
+"""
+a supervisor of the terminal connection (health probes and background reconnection) used by the main module (mt5)
+"""
+
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from random import uniform
+from threading import Condition, Event, Thread
+from time import monotonic, time
+from _executor import TerminalExecutor
+from _lazy import TERMINAL_LOCK, LazyModule
+
+# loaded on first use (see LazyModule)
+mt = LazyModule("MetaTrader5", TERMINAL_LOCK)
+
+CONNECTED = "connected"
+RECONNECTING = "reconnecting"
+STOPPED = "stopped"
+
+# MetaTrader5.last_error() codes of the lost IPC connection with the terminal (RES_E_INTERNAL_FAIL_*)
+_IPC_ERRORS = -10000
+
+
+def probe() -> bool:
+    """a cheap health probe: True if the terminal answers and is connected to the trade server"""
+    info = mt.terminal_info()
+    return info is not None and bool(info.connected)
+
+
+def connection_lost() -> bool:
+    """True if the last MetaTrader5 error is a lost IPC connection with the terminal"""
+    return mt.last_error()[0] <= _IPC_ERRORS
+
+
+class ConnectionSupervisor:
+    """
+    probes the terminal every interval seconds on a background thread and reconnects with exponential backoff when it is down,
+    the reads run through call(): while reconnecting, they wait (max_waiting at most) for the connection instead of failing,
+    with an executor (e.g the TerminalExecutor of AsyncMt5) the probes and the reconnections run on its thread like the other calls,
+    and a read of this thread finding the terminal down reconnects in place (the reconnection is queued behind it)
+    """
+
+    def __init__(
+        self,
+        reconnect: Callable[[], None],
+        interval: float = 5.0,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        max_waiting: int = 32,
+        wait_timeout: float = 30.0,
+        on_state_change: "Callable[[str, str, str], None]|None" = None,
+        executor: "TerminalExecutor|None" = None,
+    ) -> None:
+        """
+        Args:
+            reconnect : a function (re)connecting to the terminal, raising an Exception on failure
+            interval (optional) : seconds between two health probes, default is 5.0
+            backoff (optional) : seconds before the second reconnection attempt (doubled after each failed attempt), default is 0.5
+            max_backoff (optional) : max seconds between two reconnection attempts, default is 30.0
+            max_waiting (optional) : max reads waiting for the reconnection (the next ones raise an Exception), default is 32
+            wait_timeout (optional) : max seconds a read waits for the reconnection, default is 30.0
+            on_state_change (optional) : called with (old state, new state, reason) on every state transition
+            executor (optional) : the executor owning the terminal calls, default is None (the probes and reconnections run on the supervisor thread)
+        """
+        self._reconnect = reconnect
+        self._interval = interval
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._max_waiting = max_waiting
+        self._wait_timeout = wait_timeout
+        self._on_state_change = on_state_change
+        self.executor = executor
+        # the probe or reconnection queued on the executor
+        self._pending: "Future|None" = None
+        self._state = STOPPED
+        self._condition = Condition()
+        self._wake = Event()
+        self._stop = Event()
+        self._thread: "Thread|None" = None
+        self._down_since: "float|None" = None
+        self._waiting = 0
+        self._transitions: deque = deque(maxlen=100)
+        self._recoveries: deque = deque(maxlen=100)
+        self._stats = {
+            "probes": 0,
+            "failed_probes": 0,
+            "disconnections": 0,
+            "reconnect_attempts": 0,
+            "reconnections": 0,
+            "queued_reads": 0,
+            "rejected_reads": 0,
+            "retried_reads": 0,
+        }
+
+    # ========== start/stop ==========#
+    def start(self) -> None:
+        """start supervising (the connection is assumed up, the first probe checks it)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._set_state(CONNECTED, "supervision started")
+        self._wake.set()
+        self._thread = Thread(target=self._run, name="mt5-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """stop supervising, the waiting reads are released"""
+        self._stop.set()
+        self._wake.set()
+        # a probe queued behind the calling executor thread would never run
+        with self._condition:
+            if self._pending is not None:
+                self._pending.cancel()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._set_state(STOPPED, "supervision stopped")
+
+    # ========== state/metrics ==========#
+    @property
+    def state(self) -> str:
+        """ "connected", "reconnecting" or "stopped" """
+        return self._state
+
+    @property
+    def transitions(self) -> "list[dict]":
+        """the last state transitions -> [{"time": epoch, "from": str, "to": str, "reason": str}, ...]"""
+        with self._condition:
+            return list(self._transitions)
+
+    @property
+    def metrics(self) -> dict:
+        """
+        supervision metrics:
+            - state and waiting_reads (reads waiting for the reconnection)
+            - probes, failed_probes, disconnections, reconnect_attempts, reconnections
+            - queued_reads (reads that waited), rejected_reads (too many waiting reads or timed out), retried_reads
+            - last/mean/max_time_to_recover: seconds from the detected disconnection to the reconnection
+            - down_for: seconds since the disconnection (None if connected)
+        """
+        with self._condition:
+            recoveries = list(self._recoveries)
+            return {
+                "state": self._state,
+                "waiting_reads": self._waiting,
+                **self._stats,
+                "last_time_to_recover": recoveries[-1] if recoveries else None,
+                "mean_time_to_recover": (
+                    sum(recoveries) / len(recoveries) if recoveries else None
+                ),
+                "max_time_to_recover": max(recoveries) if recoveries else None,
+                "down_for": (
+                    None if self._down_since is None else monotonic() - self._down_since
+                ),
+            }
+
+    # ========== reads ==========#
+    def call(self, function: Callable, *args, **kwargs):
+        """
+        run a read (function(*args, **kwargs)) once the terminal is connected,
+        if it fails (raises or returns None) because the connection is lost, it is retried once after the reconnection
+        (writes like orders must not go through call(), they could be sent twice)
+        """
+        self._wait_connected()
+        reconnections = self._stats["reconnections"]
+        try:
+            result = function(*args, **kwargs)
+        except Exception:
+            if not self._lost(reconnections):
+                raise
+        else:
+            if result is not None or not self._lost(reconnections):
+                return result
+        with self._condition:
+            self._stats["retried_reads"] += 1
+        self._wait_connected()
+        return function(*args, **kwargs)
+
+    def notify_lost(self, reason: str = "connection lost") -> None:
+        """report a lost connection (the reconnection starts without waiting for the next probe)"""
+        if self._state == CONNECTED and self._thread is not None:
+            self._disconnected(reason)
+
+    # ========== helpers ==========#
+    def _lost(self, reconnections: int) -> bool:
+        """True if a read failed because of the lost connection (or the terminal reconnected since the read started)"""
+        with TERMINAL_LOCK:
+            if (
+                self._stats["reconnections"] != reconnections
+                or self._state == RECONNECTING
+            ):
+                return True
+            if self._state == STOPPED or not connection_lost():
+                return False
+            self.notify_lost(f"read failed: {mt.last_error()}")
+            return True
+
+    def _wait_connected(self) -> None:
+        executor = self.executor
+        if executor is not None and executor.in_thread():
+            # the reconnection queued on this thread runs after this read: reconnect now
+            if not self._attempt():
+                with self._condition:
+                    self._stats["rejected_reads"] += 1
+                raise Exception("MT5 terminal is reconnecting (reconnection failed)")
+            return
+        with self._condition:
+            if self._state != RECONNECTING:
+                return
+            if self._waiting >= self._max_waiting:
+                self._stats["rejected_reads"] += 1
+                raise Exception(
+                    f"MT5 terminal is reconnecting ({self._waiting} reads already waiting)"
+                )
+            self._waiting += 1
+            self._stats["queued_reads"] += 1
+            try:
+                if not self._condition.wait_for(
+                    lambda: self._state != RECONNECTING, self._wait_timeout
+                ):
+                    self._stats["rejected_reads"] += 1
+                    raise Exception(
+                        f"MT5 terminal is still reconnecting after {self._wait_timeout}s"
+                    )
+            finally:
+                self._waiting -= 1
+
+    def _set_state(self, state: str, reason: str) -> None:
+        with self._condition:
+            old, self._state = self._state, state
+            if old == state:
+                return
+            self._transitions.append(
+                {"time": time(), "from": old, "to": state, "reason": reason}
+            )
+            self._condition.notify_all()
+        if self._on_state_change is not None:
+            self._on_state_change(old, state, reason)
+
+    def _disconnected(self, reason: str) -> None:
+        with self._condition:
+            if self._state != CONNECTED:
+                return
+            self._down_since = monotonic()
+            self._stats["disconnections"] += 1
+        self._set_state(RECONNECTING, reason)
+        self._wake.set()
+
+    def _connected(self) -> None:
+        with self._condition:
+            if self._down_since is not None:
+                self._recoveries.append(monotonic() - self._down_since)
+                self._down_since = None
+            self._stats["reconnections"] += 1
+        self._set_state(CONNECTED, "reconnected")
+
+    def _on_terminal(self, function: Callable):
+        """run function on the executor thread (if any) and return its result"""
+        if self.executor is None:
+            return function()
+        with self._condition:
+            if self._stop.is_set():
+                raise Exception("supervision stopped")
+            future = self._pending = self.executor.submit(function)
+        try:
+            return future.result()
+        finally:
+            with self._condition:
+                self._pending = None
+
+    def _probe(self) -> "str|None":
+        """None if the terminal is healthy, the failure reason otherwise"""
+        try:
+            if probe():
+                return None
+            return f"health probe failed: {mt.last_error()}"
+        except Exception as e:
+            return f"health probe failed: {e}"
+
+    def _attempt(self) -> bool:
+        """a reconnection attempt (if still reconnecting), True if connected"""
+        if self._state != RECONNECTING:
+            return True
+        with self._condition:
+            self._stats["reconnect_attempts"] += 1
+        try:
+            self._reconnect()
+            # a read failing before the end of the reconnection sees it (see _lost())
+            with TERMINAL_LOCK:
+                if not probe():
+                    return False
+                self._connected()
+        except Exception:
+            return False
+        return True
+
+    def _run(self) -> None:
+        attempt = 0
+        while not self._stop.is_set():
+            if self._state == CONNECTED:
+                self._wake.wait(self._interval)
+                self._wake.clear()
+                if self._stop.is_set() or self._state != CONNECTED:
+                    continue
+                with self._condition:
+                    self._stats["probes"] += 1
+                try:
+                    failure = self._on_terminal(self._probe)
+                except Exception as e:
+                    if self._stop.is_set():
+                        continue
+                    failure = f"health probe failed: {e}"
+                if failure is not None:
+                    with self._condition:
+                        self._stats["failed_probes"] += 1
+                    self._disconnected(failure)
+                continue
+
+            # reconnecting
+            try:
+                reconnected = self._on_terminal(self._attempt)
+            except Exception:
+                reconnected = False
+            if reconnected:
+                attempt = 0
+                continue
+            # exponential backoff with jitter
+            delay = min(self._max_backoff, self._backoff * 2**attempt)
+            attempt += 1
+            self._stop.wait(uniform(0.5, 1.0) * delay)
@@ -0,0 +1,169 @@
+"""
+offline benchmark of Mt5.get_history()
+
+replaces the MetaTrader5 module by a simulated terminal holding generated deals
+(each request costs ipc_us microseconds per returned deal, to account for the terminal IPC),
+and reports the mean time per call of:
+    - legacy: the previous path (whole period + DataFrame built from list() and _asdict())
+    - frame: get_history() without store (the whole period + the same DataFrame construction as legacy,
+      it only adds the empty result handling, so it costs about the same)
+    - store_cold: the first call with the history store (the whole period is fetched in chunks)
+    - store_warm: the next calls with the history store (only the period since the last sync is fetched)
+
+usage:
+    python benchmark.py                              # 50000 deals, 20 calls per scenario
+    python benchmark.py --deals 200000 --calls 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import types
+from collections import namedtuple
+from datetime import datetime, timedelta
+from time import perf_counter, sleep
+
+DEAL_FIELDS = (
+    "ticket order time time_msc type entry magic position_id reason volume "
+    "price commission swap profit fee symbol comment external_id"
+).split()
+
+
+def simulated_terminal(
+    deals_count: int, ipc_us: float, seed: int = 0
+) -> types.ModuleType:
+    """return a MetaTrader5-like module holding deals_count deals (one every 10 minutes until now)"""
+    TradeDeal = namedtuple("TradeDeal", DEAL_FIELDS)
+    rng = random.Random(seed)
+    end = int(datetime.now().timestamp())
+    start = end - deals_count * 600
+    symbols = ("EURUSD", "GBPUSD", "USDJPY", "XAUUSD")
+    deals = [
+        TradeDeal(
+            i + 1,
+            i + 1,
+            start + i * 600,
+            (start + i * 600) * 1000,
+            i % 2,
+            i % 2,
+            1000,
+            i // 2 + 1,
+            0,
+            0.1,
+            rng.uniform(1, 2),
+            0.0,
+            0.0,
+            rng.uniform(-50, 50),
+            0.0,
+            rng.choice(symbols),
+            "",
+            "",
+        )
+        for i in range(deals_count)
+    ]
+    times = [deal.time for deal in deals]
+    module = types.ModuleType("MetaTrader5")
+    module.stats = {"requests": 0, "deals": 0}
+
+    def history_deals_get(from_date, to_date, group="*"):
+        from bisect import bisect_left, bisect_right
+
+        result = tuple(
+            deals[
+                bisect_left(times, from_date.timestamp()) : bisect_right(
+                    times, to_date.timestamp()
+                )
+            ]
+        )
+        module.stats["requests"] += 1
+        module.stats["deals"] += len(result)
+        sleep(len(result) * ipc_us / 1e6)
+        return result or None
+
+    module.history_deals_get = history_deals_get
+    module.last_error = lambda: (1, "Success")
+    # constants read by the Mt5 class
+    for name in (
+        "ORDER_TYPE_BUY",
+        "ORDER_TYPE_SELL",
+        "ORDER_FILLING_IOC",
+        "ORDER_FILLING_FOK",
+        "ORDER_FILLING_RETURN",
+    ):
+        setattr(module, name, 0)
+    module.OrderSendResult = tuple
+    module.first_deal = datetime.fromtimestamp(start)
+    return module
+
+
+def run(deals_count: int, calls: int, ipc_us: float) -> dict:
+    terminal = sys.modules["MetaTrader5"] = simulated_terminal(deals_count, ipc_us)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import pandas as pd
+    from mt5 import Mt5
+
+    mt = Mt5("server", 0, "password")
+    from_date = terminal.first_deal - timedelta(days=1)
+
+    def legacy() -> pd.DataFrame:
+        history = terminal.history_deals_get(from_date, datetime.now(), group="*")
+        return pd.DataFrame(list(history), columns=history[0]._asdict().keys())
+
+    def measure(function, repeat: int) -> dict:
+        before = dict(terminal.stats)
+        start = perf_counter()
+        for _ in range(repeat):
+            rows = len(function())
+        return {
+            "ms_per_call": (perf_counter() - start) / repeat * 1000,
+            "rows": rows,
+            "requests_per_call": (terminal.stats["requests"] - before["requests"])
+            / repeat,
+            "deals_per_call": (terminal.stats["deals"] - before["deals"]) / repeat,
+        }
+
+    results = {
+        "legacy": measure(legacy, calls),
+        "frame": measure(lambda: mt.get_history(from_date), calls),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        mt.open_history_store(os.path.join(directory, "history.sqlite"))
+        results["store_cold"] = measure(lambda: mt.get_history(from_date), 1)
+        results["store_warm"] = measure(lambda: mt.get_history(from_date), calls)
+        mt.close_history_store()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="offline benchmark of Mt5.get_history()"
+    )
+    parser.add_argument(
+        "--deals",
+        type=int,
+        default=50_000,
+        help="deals held by the simulated terminal (default: 50000)",
+    )
+    parser.add_argument(
+        "--calls", type=int, default=20, help="calls per scenario (default: 20)"
+    )
+    parser.add_argument(
+        "--ipc-us",
+        type=float,
+        default=2.0,
+        help="simulated terminal cost per returned deal in microseconds (default: 2)",
+    )
+    args = parser.parse_args()
+
+    for name, result in run(args.deals, args.calls, args.ipc_us).items():
+        print(
+            f"{name:<12} {result['ms_per_call']:10.2f} ms/call  rows={result['rows']:<8} "
+            f"terminal requests/call={result['requests_per_call']:<6.1f} deals/call={result['deals_per_call']:.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,27 @@
-import MetaTrader5 as mt
-from datetime import datetime
-import pandas as pd
+from datetime import datetime, timedelta
+from _price_feed import PriceFeed
+from _orders import OrderError, OrderResult, OrderThread, check_send_result
+from _history import HistoryStore, deals_frame, fetch_deals
+from _lookups import HistoryIndex, LruCache, closing_deal, fetch_orders
+from _account import AccountSnapshot
+from _executor import TerminalExecutor
+from _supervisor import ConnectionSupervisor
+from _lazy import TERMINAL_LOCK, LazyModule
+import asyncio
+from contextlib import contextmanager
+from collections.abc import Callable, Iterator
+from time import perf_counter
+
+# loaded on first use, importing mt5 stays fast (see LazyModule)
+mt = LazyModule("MetaTrader5", TERMINAL_LOCK)
+pd = LazyModule("pandas")
 
 
 class Mt5:
-    # trades types (actions)
-    _TRADES_TYPES = {"BUY": mt.ORDER_TYPE_BUY, "SELL": mt.ORDER_TYPE_SELL}
-    # filling types
-    _TRADES_FILLING_TYPES = {
-        "IOC": mt.ORDER_FILLING_IOC,
-        "FOK": mt.ORDER_FILLING_FOK,
-        "RETURN": mt.ORDER_FILLING_RETURN,
-    }
+    # trades types (actions), the values of MetaTrader5.ORDER_TYPE_BUY/SELL (MetaTrader5 is not imported yet)
+    _TRADES_TYPES = {"BUY": 0, "SELL": 1}
+    # filling types, the values of MetaTrader5.ORDER_FILLING_*
+    _TRADES_FILLING_TYPES = {"IOC": 1, "FOK": 0, "RETURN": 2}
 
     def __init__(
         self,
@@ -20,6 +30,9 @@ class Mt5:
         password: str,
         pair_extension: str = "",
         filling_type: str = "IOC",
+        lookups_cache_size: int = 4096,
+        account_max_age: float = 0.1,
+        login_timeout: int = 60_000,
     ) -> None:
         """
         Args:
@@ -29,14 +42,33 @@ class Mt5:
             pair_extension (optional) : in case that pairs are not the default (e.g: "EURUSDm#" for micro accounts, the extension is "m#"). default is empty string
             filling_type (optional) : the filling type, can be "IOC", "FOK", or "RETURN", depending on used broker, default is "IOC"
             acceptable_change_in_price (optional) : the acceptable change in entry price at the moment of executing the trade (in pip), default is 10
+            lookups_cache_size (optional) : the number of deals/orders/trade results kept in memory by the history lookups, default is 4096
+            account_max_age (optional) : seconds an account info snapshot is reused by the account properties
+                (the properties read one after the other share a terminal call), default is 0.1 (0 to call the terminal on every read)
+            login_timeout (optional) : the terminal login timeout in milliseconds, default is 60_000
         """
         # connections config
         self._SERVER = server
         self._LOGIN_ID = login
         self._PASSWORD = password
+        self._login_timeout = login_timeout
         # other config
         self._PAIR_EXTENSION = pair_extension
         self._filling_type = filling_type
+        # started by start_price_feed()
+        self._price_feed: "PriceFeed|None" = None
+        # started by the first open_trades()
+        self._order_thread: "OrderThread|None" = None
+        # opened by open_history_store()
+        self._history_store: "HistoryStore|None" = None
+        # deals, orders and trade results already found (never change once in the history)
+        self._lookups = LruCache(lookups_cache_size)
+        # read by the account properties
+        self._account = AccountSnapshot(account_max_age)
+        # started by start_supervisor()
+        self._supervisor: "ConnectionSupervisor|None" = None
+        # set by AsyncMt5, runs the terminal calls of the orders, the price feed and the account refresher
+        self._executor: "TerminalExecutor|None" = None
 
     def __repr__(self) -> str:
         return f"Mt5('{self._SERVER}', {self._LOGIN_ID}, '{self._PASSWORD}', '{self._PAIR_EXTENSION}', '{self._filling_type}')"
@@ -49,28 +81,136 @@ class Mt5:
         """
         start a connection with MT5 terminal, will raise an Exception in case of any error
         """
-        mt.initialize()
-        if not mt.login(
+        self._initialize()
+        self._login()
+
+    def _initialize(self) -> None:
+        if not mt.initialize():
+            raise Exception(f"Failed to initialize MT5 terminal: {self.last_error}")
+
+    def _login(self, locked: bool = True) -> None:
+        # not locked: the other threads calls do not wait for the trade server answer (up to login_timeout)
+        login = mt.login if locked else mt.login.__wrapped__
+        if not login(
             login=self._LOGIN_ID,
             server=self._SERVER,
             password=self._PASSWORD,
-            timeout=60_000,
+            timeout=self._login_timeout,
         ):
             raise Exception(f"Failed to connect with MT5 terminal: {self.last_error}")
 
     def disconnect(self) -> None:
-        """perform MetaTrader5.shutdown()"""
+        """stop the supervisor, the price feed, the account refresher and the orders thread, close the history store (if any) and perform MetaTrader5.shutdown()"""
+        self.stop_supervisor()
+        self.stop_price_feed()
+        self._account.stop()
+        if self._order_thread is not None:
+            self._order_thread.close()
+            self._order_thread = None
+        self.close_history_store()
         mt.shutdown()
 
+    # ========== connection supervision ==========#
+    def start_supervisor(
+        self,
+        interval: float = 5.0,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        max_waiting: int = 32,
+        wait_timeout: float = 30.0,
+        on_state_change: "Callable[[str, str, str], None]|None" = None,
+    ) -> ConnectionSupervisor:
+        """
+        probe the connection every interval seconds and reconnect in the background (with exponential backoff) when it is lost,
+        while reconnecting, the reads (prices, account and history) wait for the connection instead of failing,
+        and a read that failed because of the lost connection is retried once (the trades are never retried)
+        Args:
+            interval (optional) : seconds between two health probes, default is 5.0
+            backoff (optional) : seconds before the second reconnection attempt (doubled after each failed attempt), default is 0.5
+            max_backoff (optional) : max seconds between two reconnection attempts, default is 30.0
+            max_waiting (optional) : max reads waiting for the reconnection (the next ones raise an Exception), default is 32
+            wait_timeout (optional) : max seconds a read waits for the reconnection, default is 30.0
+            on_state_change (optional) : called with (old state, new state, reason) on every state transition
+        Returns:
+            ConnectionSupervisor: the started supervisor (see its state, transitions and metrics)
+        """
+        self.stop_supervisor()
+        self._supervisor = ConnectionSupervisor(
+            self._reconnect,
+            interval,
+            backoff,
+            max_backoff,
+            max_waiting,
+            wait_timeout,
+            on_state_change,
+            self._executor,
+        )
+        self._supervisor.start()
+        return self._supervisor
+
+    def stop_supervisor(self) -> None:
+        """stop the connection supervision"""
+        if self._supervisor is not None:
+            self._supervisor.stop()
+            self._supervisor = None
+
+    @property
+    def supervisor(self) -> "ConnectionSupervisor|None":
+        """the started supervisor, None if not started"""
+        return self._supervisor
+
+    def _reconnect(self) -> None:
+        """
+        shutdown the broken connection and connect again,
+        no call of another thread runs between the shutdown and the initialization, the login does not hold the terminal lock
+        """
+        with TERMINAL_LOCK:
+            mt.shutdown()
+            self._initialize()
+        self._login(locked=False)
+
+    def _read(self, function, *args, **kwargs):
+        """run a terminal read, through the supervisor if started"""
+        if self._supervisor is None:
+            return function(*args, **kwargs)
+        return self._supervisor.call(function, *args, **kwargs)
+
     # ========== account info properties ==========#
     def _get_info(self):
-        """return MetaTrader5.account_info()"""
-        return mt.account_info()
+        """return MetaTrader5.account_info() snapshot (the pinned one, or refreshed if older than account_max_age)"""
+        return self._read(self._account.get)
+
+    @contextmanager
+    def pinned_account(self, max_age: "float|None" = None) -> Iterator:
+        """
+        all the account properties read by the current thread within the block come from the same snapshot,
+        e.g: with mt.pinned_account(): check(mt.account_balance, mt.account_equity, mt.account_margins)
+        Args:
+            max_age (optional) : the snapshot is refreshed before pinning if older than max_age, default is account_max_age
+        """
+        with self._account.pin(max_age) as info:
+            yield info
+
+    def start_account_refresher(self, interval: float = 1.0) -> None:
+        """
+        refresh the account snapshot every interval seconds on a background thread
+        (set account_max_age >= interval so the properties read the refreshed snapshot)
+        """
+        self._account.start(interval)
+
+    def stop_account_refresher(self) -> None:
+        """stop the account background refresher"""
+        self._account.stop()
+
+    @property
+    def account_snapshot_stats(self) -> dict:
+        """account snapshot counters: refreshes, hits, errors and age (seconds since the last refresh)"""
+        return self._account.stats
 
     @property
     def account_info(self) -> dict:
         """all account information"""
-        return mt.account_info()._asdict()
+        return self._get_info()._asdict()
 
     @property
     def account_leverage(self) -> int:
@@ -126,7 +266,7 @@ class Mt5:
         return all pair info,
         it will raise an Exception if the pair is invalid or any unexpected error occur
         """
-        if info := mt.symbol_info(pair):
+        if info := self._read(mt.symbol_info, pair):
             return info._asdict()
         # failed
         raise Exception(f"failed to find '{pair}': {self.last_error}")
@@ -134,6 +274,7 @@ class Mt5:
     def get_current_pair_price(self, pair: str) -> dict:
         """
         return current [buy] and [sell] prices of pair,
+        read from the price feed if the pair is subscribed and its quote is fresh,
         it will raise an Exception if the pair is invalid or any unexpected error occur
         returns:
         dict like -> {
@@ -141,14 +282,64 @@ class Mt5:
             "buy": float
         }
         """
-        if info := self._get_pair_info(pair):
-            return {"sell": info["bid"], "buy": info["ask"]}
+        if self._price_feed is not None and (quote := self._price_feed.get(pair)):
+            return {"sell": quote[0], "buy": quote[1]}
+        if tick := self._read(mt.symbol_info_tick, pair):
+            return {"sell": tick.bid, "buy": tick.ask}
+        # the symbol may not be selected in the MarketWatch
+        info = self._get_pair_info(pair)
+        return {"sell": info["bid"], "buy": info["ask"]}
+
+    # ========== price feed ==========#
+    def start_price_feed(
+        self, pairs: "list[str]", interval: float = 0.1, max_age: float = 1.0
+    ) -> PriceFeed:
+        """
+        start polling the prices of the pairs on a background thread,
+        get_current_pair_price() and open_trade() then read the cached quotes of these pairs
+        (and fall back to the terminal if a quote is older than max_age)
+        Args:
+            pairs : the pairs to subscribe, e.g ["EURUSD", "USDJPY"]
+            interval (optional) : seconds between two polls, default is 0.1
+            max_age (optional) : the staleness tolerance of the quotes (in seconds), default is 1.0
+        Returns:
+            PriceFeed: the started feed (pairs can be added later with feed.subscribe())
+        """
+        if self._price_feed is None:
+            self._price_feed = PriceFeed(interval, max_age, self._executor)
+        self._price_feed.subscribe(*pairs)
+        self._price_feed.start()
+        return self._price_feed
+
+    def stop_price_feed(self) -> None:
+        """stop the price feed, the prices are then read from the terminal"""
+        if self._price_feed is not None:
+            self._price_feed.stop()
+            self._price_feed = None
+
+    @property
+    def price_feed(self) -> "PriceFeed|None":
+        """the started price feed, None if not started"""
+        return self._price_feed
+
+    def _use_executor(self, executor: "TerminalExecutor|None") -> None:
+        """run the terminal calls of the orders, the price feed and the account refresher on the executor (None: on their own threads)"""
+        self._executor = executor
+        self._account.executor = executor
+        if self._supervisor is not None:
+            self._supervisor.executor = executor
+        if self._price_feed is not None:
+            self._price_feed.executor = executor
+        # recreated on the next open_trades()
+        if self._order_thread is not None:
+            self._order_thread.close()
+            self._order_thread = None
 
     # ========== helpers ==========#
     def _calc_pips(self, price1: float, price2: float) -> int:
         """calculate the difference between two prices in pips"""
-        # JPY pairs
-        if str(price1).index(".") >= 2:
+        # JPY pairs (2 digits or more before the point)
+        if abs(price1) >= 10:
             vp = 0.01
         # all other forex pairs
         else:
@@ -162,15 +353,16 @@ class Mt5:
         entry_price: float,
         action: str,
         acceptable_change_in_price: int,
+        prices: "dict|None" = None,
     ) -> bool:
         """
         check if entry_price is valid (the difference between entry_price and the current price is less than or equal acceptable_change_in_price)
+        prices are the current prices of the pair (as returned by get_current_pair_price()), fetched if not given
         """
+        if prices is None:
+            prices = self.get_current_pair_price(pair)
         return (
-            self._calc_pips(
-                entry_price,
-                self.get_current_pair_price(pair)["buy" if action == "BUY" else "sell"],
-            )
+            self._calc_pips(entry_price, prices["buy" if action == "BUY" else "sell"])
             <= acceptable_change_in_price
         )
 
@@ -186,7 +378,7 @@ class Mt5:
         magic: int = 1000,
         note: str = "",
         acceptable_change_in_price: int = 10,
-    ) -> mt.OrderSendResult:
+    ) -> "mt.OrderSendResult":
         """
         execute the trade, it will return MetaTrader5.OrderSendResult object if trade is successfully opened,
         otherwise, it will raise an Exception
@@ -202,30 +394,29 @@ class Mt5:
             acceptable_change_in_price (optional) : the acceptable change in entry price at the moment of executing the trade (in pip), default is 10
         """
 
-        # check if entry_price is valid
+        # check if entry_price is valid (the prices are fetched once)
+        prices = self.get_current_pair_price(pair)
         if not self._is_entry_price_valid(
-            pair, entry, type, acceptable_change_in_price
+            pair, entry, type, acceptable_change_in_price, prices
         ):
             raise Exception(
-                f"Entry price is invalid: entry='{entry}'; current price = {self.get_current_pair_price(pair)}"
+                f"Entry price is invalid: entry='{entry}'; current price = {prices}"
             )
 
         # send order request to terminal
         try:
             result = mt.order_send(
-                {
-                    "action": mt.TRADE_ACTION_DEAL,
-                    "symbol": pair.upper() + self._PAIR_EXTENSION,
-                    "volume": volume,
-                    "type": self._TRADES_TYPES[type.upper()],
-                    "price": entry,
-                    "sl": sl,
-                    "tp": tp,
-                    "magic": magic,
-                    "comment": note,
-                    "type_time": mt.ORDER_TIME_GTC,
-                    "type_filling": self._TRADES_FILLING_TYPES[self._filling_type],
-                }
+                self._build_request(
+                    pair.upper() + self._PAIR_EXTENSION,
+                    self._TRADES_TYPES[type.upper()],
+                    volume,
+                    entry,
+                    sl,
+                    tp,
+                    magic,
+                    note,
+                    self._TRADES_FILLING_TYPES[self._filling_type],
+                )
             )
         # --- Trade is not executed ---#
         except Exception as e:
@@ -234,40 +425,185 @@ class Mt5:
             )
 
         # --- Trade is executed without exception ---#
-        # if the return is None
-        if result is None:
-            raise Exception(f"Failed to open Trade (returns None): {self.last_error}")
-
-        # if succeed
-        if result.retcode == self.SUCCESSFULLY_OPEN:
-            return result
-
-        # not succeed
-        # if auto trading option is disabled
-        if result.retcode == 10027:
-            raise Exception(f"Failed to open trade because AutoTrading is disabled!")
-        # invalid stops (TP|SL)
-        if result.retcode == 10016:
-            raise Exception(f"Failed to open trade due to invalid stops!")
-        # other errors
-        raise Exception(
-            f"MT5 reject the trade: retcode={result.retcode} [{result.comment}]"
-        )
+        if error := check_send_result(result):
+            raise Exception(error.message)
+        return result
+
+    def open_trades(self, orders: "list[dict]") -> "list[OrderResult]":
+        """
+        execute a batch of trades, the orders are validated against a single prices snapshot
+        and sent in the given order by a dedicated thread,
+        it never raises for a single order: each result holds the MetaTrader5.OrderSendResult or a structured OrderError
+        Args:
+            orders : dicts with the open_trade() args -> {
+                "pair": str,
+                "type": "BUY"|"SELL",
+                "volume": float,
+                "entry": float,
+                "sl": float,
+                "tp": float,
+                "magic": int (optional, default is 1000),
+                "note": str (optional, default is empty string),
+                "acceptable_change_in_price": int (optional, default is 10),
+            }
+        Returns:
+            list[OrderResult]: a result per order (in the same order),
+            with the latency (in seconds) of the validation, the wait in the orders queue, the sending and the total
+        """
+        start = perf_counter()
+        # one prices snapshot, symbol and filling type for the whole batch
+        prices, symbols, price_errors = {}, {}, {}
+        # the invalid pairs are reported by _validate_order()
+        for pair in {
+            order.get("pair") for order in orders if isinstance(order.get("pair"), str)
+        }:
+            symbols[pair] = pair.upper() + self._PAIR_EXTENSION
+            try:
+                prices[pair] = self.get_current_pair_price(pair)
+            except Exception as e:
+                price_errors[pair] = str(e)
+        filling_type = self._TRADES_FILLING_TYPES[self._filling_type]
+        if self._order_thread is None:
+            self._order_thread = OrderThread(self._executor)
+
+        results, pending = [], []
+        for order in orders:
+            validation_start = perf_counter()
+            result = OrderResult(order)
+            results.append(result)
+            result.error = self._validate_order(order, prices, price_errors)
+            result.latency["validate"] = perf_counter() - validation_start
+            if result.error is not None:
+                result.latency["total"] = perf_counter() - start
+                continue
+            request = self._build_request(
+                symbols[order["pair"]],
+                self._TRADES_TYPES[order["type"].upper()],
+                order["volume"],
+                order["entry"],
+                order["sl"],
+                order["tp"],
+                order.get("magic", 1000),
+                order.get("note", ""),
+                filling_type,
+            )
+            # valid orders are sent while the next ones are validated
+            pending.append((result, perf_counter(), self._order_thread.submit(request)))
+
+        for result, submitted, future in pending:
+            result.result, result.error, latency = future.result()
+            result.latency.update(latency)
+            result.latency["total"] = (
+                submitted - start + latency["queued"] + latency["send"]
+            )
+        return results
+
+    def _validate_order(
+        self, order: dict, prices: dict, price_errors: dict
+    ) -> "OrderError|None":
+        """return the error of an open_trades() order, None if it can be sent"""
+        if missing := [
+            key
+            for key in ("pair", "type", "volume", "entry", "sl", "tp")
+            if key not in order
+        ]:
+            return OrderError("invalid_order", f"Missing order fields: {missing}")
+        if (
+            not isinstance(order["type"], str)
+            or order["type"].upper() not in self._TRADES_TYPES
+        ):
+            return OrderError("invalid_order", f"Invalid order type: '{order['type']}'")
+        if not isinstance(order["pair"], str):
+            return OrderError("invalid_order", f"Invalid pair: {order['pair']!r}")
+        # bool is an int
+        if isinstance(order["entry"], bool) or not isinstance(
+            order["entry"], (int, float)
+        ):
+            return OrderError(
+                "invalid_order", f"Invalid entry price: {order['entry']!r}"
+            )
+        if order["pair"] in price_errors:
+            return OrderError("unknown_pair", price_errors[order["pair"]])
+        if not self._is_entry_price_valid(
+            order["pair"],
+            order["entry"],
+            order["type"].upper(),
+            order.get("acceptable_change_in_price", 10),
+            prices[order["pair"]],
+        ):
+            return OrderError(
+                "invalid_price",
+                f"Entry price is invalid: entry='{order['entry']}'; current price = {prices[order['pair']]}",
+            )
+        return None
+
+    @staticmethod
+    def _build_request(
+        symbol: str,
+        type: int,
+        volume: float,
+        entry: float,
+        sl: float,
+        tp: float,
+        magic: int,
+        note: str,
+        filling_type: int,
+    ) -> dict:
+        """return the MetaTrader5.order_send() request of a market order"""
+        return {
+            "action": mt.TRADE_ACTION_DEAL,
+            "symbol": symbol,
+            "volume": volume,
+            "type": type,
+            "price": entry,
+            "sl": sl,
+            "tp": tp,
+            "magic": magic,
+            "comment": note,
+            "type_time": mt.ORDER_TIME_GTC,
+            "type_filling": filling_type,
+        }
 
     # ========== Get historical info ==========#
     def get_history(
-        self, from_date: datetime, to_date: datetime = datetime.now(), group: str = "*"
-    ) -> pd.DataFrame:
+        self, from_date: datetime, to_date: "datetime|None" = None, group: str = "*"
+    ) -> "pd.DataFrame":
         """get history of all deals within the given period
+        (read from the history store if opened, only the missing periods are then fetched from the terminal,
+        the store takes naive dates as server time and converts aware dates to UTC)
         Args:
             from_date (datetime): the start date
-            to_date (datetime, optional): the end date. Defaults to datetime.now().
+            to_date (datetime, optional): the end date. Defaults to None (now).
             group (str, optional): the needed group e.g: "EURUSD". Defaults to "*" (all).
         Returns:
-            pd.DataFrame: a dataframe contains all deals within the given period
+            pd.DataFrame: a dataframe contains all deals within the given period (empty if no deal)
+        """
+        if to_date is None:
+            to_date = datetime.now()
+        if self._history_store is not None:
+            return self._read(self._history_store.get, from_date, to_date, group)
+        return deals_frame(self._read(fetch_deals, from_date, to_date, group))
+
+    def open_history_store(
+        self, path: str = "history.sqlite", chunk_days: int = 30
+    ) -> HistoryStore:
         """
-        history = mt.history_deals_get(from_date, to_date, group=group)
-        return pd.DataFrame(list(history), columns=history[0]._asdict().keys())
+        keep the deals in a local SQLite store, get_history() then fetches only the periods that are not stored yet
+        Args:
+            path (optional) : the SQLite file, default is "history.sqlite"
+            chunk_days (optional) : days of deals fetched per terminal request, default is 30
+        Returns:
+            HistoryStore: the opened store
+        """
+        self.close_history_store()
+        self._history_store = HistoryStore(path, chunk_days)
+        return self._history_store
+
+    def close_history_store(self) -> None:
+        """close the history store, get_history() then fetches the whole period from the terminal"""
+        if self._history_store is not None:
+            self._history_store.close()
+            self._history_store = None
 
     def get_deal(self, deal_ticket: int) -> "dict|None":
         """get deal info of the given ticket
@@ -276,8 +612,13 @@ class Mt5:
         Returns:
             dict|None: a dict contains the deal info, None if no deal found with the given ticket
         """
-        deals = mt.history_deals_get(ticket=deal_ticket)
-        return deals[0]._asdict() if deals else None
+        if (deal := self._lookups.get(("deal", deal_ticket))) is None:
+            deals = self._read(mt.history_deals_get, ticket=deal_ticket)
+            if not deals:
+                return None
+            deal = deals[0]
+            self._lookups.put(("deal", deal_ticket), deal)
+        return deal._asdict()
 
     def get_order(self, order_ticket: int) -> "dict|None":
         """get order info of the given ticket
@@ -286,8 +627,13 @@ class Mt5:
         Returns:
             dict|None: a dict contains the order info, None if no order found with the given ticket
         """
-        orders = mt.history_orders_get(ticket=order_ticket)
-        return orders[0]._asdict() if orders else None
+        if (order := self._lookups.get(("order", order_ticket))) is None:
+            orders = self._read(mt.history_orders_get, ticket=order_ticket)
+            if not orders:
+                return None
+            order = orders[0]
+            self._lookups.put(("order", order_ticket), order)
+        return order._asdict()
 
     def get_order_deals(self, order_ticket: int) -> "tuple[dict]|None":
         """get all deals of the given order ticket
@@ -296,7 +642,7 @@ class Mt5:
         Returns:
             tuple|None: a tuple contains all deals of the given position ticket, None if no deals found
         """
-        deals = mt.history_deals_get(position=order_ticket)
+        deals = self._read(mt.history_deals_get, position=order_ticket)
         return tuple(map(lambda d: d._asdict(), deals)) if deals else None
 
     def get_trade_result(self, order_ticket: int) -> "dict|None":
@@ -306,7 +652,247 @@ class Mt5:
         Returns:
             dict|None: a dict contains the trade(closing deal) result, None ticket is not found or the order is not closed yet
         """
-        deals = self.get_order_deals(order_ticket)
-        if deals is None or len(deals) < 2:
-            return None
-        return self.get_deal(deal_ticket=deals[-1]["ticket"])
+        if (deal := self._lookups.get(("result", order_ticket))) is None:
+            deals = self._read(mt.history_deals_get, position=order_ticket)
+            # the closing deal is the last exit deal (no need to query it again)
+            if not deals or (deal := closing_deal(deals)) is None:
+                return None
+            self._lookups.put(("result", order_ticket), deal)
+        return deal._asdict()
+
+    # ========== bulk lookups ==========#
+    def get_trade_results(
+        self,
+        order_tickets: "list[int]",
+        from_date: "datetime|None" = None,
+        to_date: "datetime|None" = None,
+    ) -> "dict[int, dict|None]":
+        """get trade results of many order tickets,
+        the deals of the period are fetched once and indexed by position,
+        the positions opened but not closed within a period ending now are open (None, no other terminal call),
+        the tickets without deals in the period (or not closed in a period ending before now) are looked up one by one
+        Args:
+            order_tickets (list[int]): orders/positions tickets
+            from_date (datetime, optional): the start of the period. Defaults to None (30 days ago).
+            to_date (datetime, optional): the end of the period. Defaults to None (now).
+        Returns:
+            dict: ticket -> a dict contains the trade(closing deal) result, None if the order is not found or not closed yet
+        """
+        results, missing = {}, []
+        for ticket in order_tickets:
+            if (deal := self._lookups.get(("result", ticket))) is None:
+                missing.append(ticket)
+            else:
+                results[ticket] = deal._asdict()
+        if missing:
+            index = self._history_index(from_date, to_date, orders=False)
+            # a position closed after the period has no exit deal in it
+            ends_now = to_date is None or to_date >= datetime.now(to_date.tzinfo)
+            for ticket in missing:
+                if (deal := index.closing_deal(ticket)) is None:
+                    if ends_now and ticket in index.positions:
+                        results[ticket] = None
+                    else:
+                        results[ticket] = self.get_trade_result(ticket)
+                else:
+                    self._lookups.put(("result", ticket), deal)
+                    results[ticket] = deal._asdict()
+        return {ticket: results[ticket] for ticket in order_tickets}
+
+    def get_orders(
+        self,
+        order_tickets: "list[int]",
+        from_date: "datetime|None" = None,
+        to_date: "datetime|None" = None,
+    ) -> "dict[int, dict|None]":
+        """get orders info of many tickets,
+        the orders of the period are fetched once and indexed by ticket (the tickets not in the period are looked up one by one)
+        Args:
+            order_tickets (list[int]): orders tickets
+            from_date (datetime, optional): the start of the period. Defaults to None (30 days ago).
+            to_date (datetime, optional): the end of the period. Defaults to None (now).
+        Returns:
+            dict: ticket -> a dict contains the order info, None if no order found with the ticket
+        """
+        results, missing = {}, []
+        for ticket in order_tickets:
+            if (order := self._lookups.get(("order", ticket))) is None:
+                missing.append(ticket)
+            else:
+                results[ticket] = order._asdict()
+        if missing:
+            index = self._history_index(from_date, to_date, deals=False)
+            for ticket in missing:
+                if (order := index.orders.get(ticket)) is None:
+                    results[ticket] = self.get_order(ticket)
+                else:
+                    self._lookups.put(("order", ticket), order)
+                    results[ticket] = order._asdict()
+        return {ticket: results[ticket] for ticket in order_tickets}
+
+    @property
+    def lookups_stats(self) -> dict:
+        """history lookups cache counters: hits, misses and cached items"""
+        return self._lookups.stats
+
+    def _history_index(
+        self,
+        from_date: "datetime|None",
+        to_date: "datetime|None",
+        deals: bool = True,
+        orders: bool = True,
+    ) -> HistoryIndex:
+        """fetch the deals and/or the orders of the period once and index them"""
+        if to_date is None:
+            to_date = datetime.now()
+        if from_date is None:
+            from_date = to_date - timedelta(days=30)
+        return HistoryIndex(
+            self._read(fetch_deals, from_date, to_date) if deals else (),
+            self._read(fetch_orders, from_date, to_date) if orders else (),
+        )
+
+
+class AsyncMt5:
+    """
+    asyncio facade of Mt5: all the terminal calls run one by one on a single dedicated thread (the event loop never blocks),
+    including the orders sent by open_trades(), the polls of the price feed and the refreshes of the account refresher,
+    every method accepts a timeout (seconds), a cancelled or timed out call is skipped if it did not start yet
+    """
+
+    def __init__(
+        self, mt5: Mt5, timeout: "float|None" = None, max_queue: int = 0
+    ) -> None:
+        """
+        Args:
+            mt5 : the wrapped Mt5 instance (not connected yet)
+            timeout (optional) : default timeout of the calls in seconds, default is None (no timeout)
+            max_queue (optional) : max queued calls (the calls raise an Exception when full), default is 0 (unbounded)
+        """
+        self.mt5 = mt5
+        self._timeout = timeout
+        self._executor = TerminalExecutor(max_queue)
+        mt5._use_executor(self._executor)
+
+    def __repr__(self) -> str:
+        return f"AsyncMt5({self.mt5!r})"
+
+    async def __aenter__(self) -> "AsyncMt5":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.disconnect()
+
+    @property
+    def metrics(self) -> dict:
+        """terminal calls metrics: queue depth, counters and latencies (see TerminalExecutor.metrics)"""
+        return self._executor.metrics
+
+    async def call(self, function, *args, timeout: "float|None" = None, **kwargs):
+        """
+        run function(*args, **kwargs) on the terminal thread and return its result,
+        it will raise TimeoutError if the call takes more than timeout seconds (default is the AsyncMt5 timeout)
+        """
+        future = self._executor.submit(function, *args, **kwargs)
+        # cancelling the awaited future cancels the queued call
+        return await asyncio.wait_for(
+            asyncio.wrap_future(future),
+            self._timeout if timeout is None else timeout,
+        )
+
+    # ========== connect/disconnect ==========#
+    async def connect(self, timeout: "float|None" = None) -> None:
+        """see Mt5.connect()"""
+        await self.call(self.mt5.connect, timeout=timeout)
+
+    async def disconnect(self, timeout: "float|None" = None) -> None:
+        """see Mt5.disconnect(), the terminal thread is then stopped"""
+        try:
+            await self.call(self.mt5.disconnect, timeout=timeout)
+        finally:
+            self._executor.shutdown(wait=False)
+            self.mt5._use_executor(None)
+
+    # ========== account info ==========#
+    async def account_info(self, timeout: "float|None" = None) -> dict:
+        """see Mt5.account_info"""
+        return await self.call(lambda: self.mt5.account_info, timeout=timeout)
+
+    async def account_balance(self, timeout: "float|None" = None) -> float:
+        """see Mt5.account_balance"""
+        return await self.call(lambda: self.mt5.account_balance, timeout=timeout)
+
+    async def account_equity(self, timeout: "float|None" = None) -> float:
+        """see Mt5.account_equity"""
+        return await self.call(lambda: self.mt5.account_equity, timeout=timeout)
+
+    async def account_profit(self, timeout: "float|None" = None) -> float:
+        """see Mt5.account_profit"""
+        return await self.call(lambda: self.mt5.account_profit, timeout=timeout)
+
+    async def account_margins(self, timeout: "float|None" = None) -> dict:
+        """see Mt5.account_margins"""
+        return await self.call(lambda: self.mt5.account_margins, timeout=timeout)
+
+    # ========== prices/trades ==========#
+    async def get_current_pair_price(
+        self, pair: str, timeout: "float|None" = None
+    ) -> dict:
+        """see Mt5.get_current_pair_price()"""
+        return await self.call(self.mt5.get_current_pair_price, pair, timeout=timeout)
+
+    async def open_trade(self, *args, timeout: "float|None" = None, **kwargs):
+        """see Mt5.open_trade() (a timed out trade that already started is not cancelled)"""
+        return await self.call(self.mt5.open_trade, *args, timeout=timeout, **kwargs)
+
+    async def open_trades(
+        self, orders: "list[dict]", timeout: "float|None" = None
+    ) -> "list[OrderResult]":
+        """see Mt5.open_trades()"""
+        return await self.call(self.mt5.open_trades, orders, timeout=timeout)
+
+    # ========== historical info ==========#
+    async def get_history(self, *args, timeout: "float|None" = None, **kwargs):
+        """see Mt5.get_history()"""
+        return await self.call(self.mt5.get_history, *args, timeout=timeout, **kwargs)
+
+    async def get_deal(
+        self, deal_ticket: int, timeout: "float|None" = None
+    ) -> "dict|None":
+        """see Mt5.get_deal()"""
+        return await self.call(self.mt5.get_deal, deal_ticket, timeout=timeout)
+
+    async def get_order(
+        self, order_ticket: int, timeout: "float|None" = None
+    ) -> "dict|None":
+        """see Mt5.get_order()"""
+        return await self.call(self.mt5.get_order, order_ticket, timeout=timeout)
+
+    async def get_order_deals(
+        self, order_ticket: int, timeout: "float|None" = None
+    ) -> "tuple[dict]|None":
+        """see Mt5.get_order_deals()"""
+        return await self.call(self.mt5.get_order_deals, order_ticket, timeout=timeout)
+
+    async def get_trade_result(
+        self, order_ticket: int, timeout: "float|None" = None
+    ) -> "dict|None":
+        """see Mt5.get_trade_result()"""
+        return await self.call(self.mt5.get_trade_result, order_ticket, timeout=timeout)
+
+    async def get_trade_results(
+        self, order_tickets: "list[int]", *args, timeout: "float|None" = None, **kwargs
+    ) -> "dict[int, dict|None]":
+        """see Mt5.get_trade_results()"""
+        return await self.call(
+            self.mt5.get_trade_results, order_tickets, *args, timeout=timeout, **kwargs
+        )
+
+    async def get_orders(
+        self, order_tickets: "list[int]", *args, timeout: "float|None" = None, **kwargs
+    ) -> "dict[int, dict|None]":
+        """see Mt5.get_orders()"""
+        return await self.call(
+            self.mt5.get_orders, order_tickets, *args, timeout=timeout, **kwargs
+        )
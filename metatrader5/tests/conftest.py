@@ -0,0 +1,172 @@
+import os
+import sys
+import threading
+from collections import namedtuple
+from time import sleep
+from types import ModuleType, SimpleNamespace
+import pytest
+
+# the modules are imported flat (from _orders import ...), like the main module does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+Tick = namedtuple("Tick", "bid ask time_msc")
+SymbolInfo = namedtuple("SymbolInfo", "name bid ask")
+AccountInfo = namedtuple(
+    "AccountInfo", "leverage balance equity profit margin margin_free margin_level"
+)
+TerminalInfo = namedtuple("TerminalInfo", "connected")
+SendResult = namedtuple("SendResult", "retcode comment order")
+Deal = namedtuple(
+    "Deal",
+    "ticket order time time_msc type entry position_id volume price profit symbol",
+)
+Order = namedtuple("Order", "ticket time_setup symbol")
+
+
+def _new_state() -> SimpleNamespace:
+    return SimpleNamespace(
+        up=True,
+        fail_initialize=0,
+        ticks={"EURUSD": (1.1, 1.1002), "USDJPY": (150.1, 150.12)},
+        balance=1000.0,
+        deals=[],
+        orders=[],
+        sent=[],
+        # (function name, thread id) of every terminal call
+        calls=[],
+        # function name -> seconds spent by its calls
+        delays={},
+        # calls running at the same time
+        active=0,
+        overlaps=0,
+        guard=threading.Lock(),
+    )
+
+
+def _fake_metatrader5() -> ModuleType:
+    """a MetaTrader5 stand-in, its terminal state is reset for each test (see the terminal fixture)"""
+    fake = ModuleType("MetaTrader5")
+    fake.state = _new_state()
+    fake.__dict__.update(
+        ORDER_TYPE_BUY=0,
+        ORDER_TYPE_SELL=1,
+        ORDER_FILLING_FOK=0,
+        ORDER_FILLING_IOC=1,
+        ORDER_FILLING_RETURN=2,
+        TRADE_ACTION_DEAL=1,
+        ORDER_TIME_GTC=0,
+        TRADE_RETCODE_DONE=10009,
+        DEAL_ENTRY_IN=0,
+        DEAL_ENTRY_OUT=1,
+        DEAL_ENTRY_INOUT=2,
+        DEAL_ENTRY_OUT_BY=3,
+        OrderSendResult=SendResult,
+    )
+
+    def terminal(function):
+        def call(*args, **kwargs):
+            state = fake.state
+            with state.guard:
+                state.calls.append((function.__name__, threading.get_ident()))
+                state.active += 1
+                state.overlaps += state.active > 1
+            try:
+                sleep(state.delays.get(function.__name__, 0))
+                return function(*args, **kwargs)
+            finally:
+                with state.guard:
+                    state.active -= 1
+
+        setattr(fake, function.__name__, call)
+        return function
+
+    @terminal
+    def initialize(**kwargs):
+        if fake.state.fail_initialize > 0:
+            fake.state.fail_initialize -= 1
+            return False
+        fake.state.up = True
+        return True
+
+    @terminal
+    def login(**kwargs):
+        return fake.state.up
+
+    @terminal
+    def shutdown():
+        fake.state.up = False
+
+    @terminal
+    def last_error():
+        return (1, "Success") if fake.state.up else (-10004, "No IPC connection")
+
+    @terminal
+    def terminal_info():
+        return TerminalInfo(True) if fake.state.up else None
+
+    @terminal
+    def account_info():
+        if not fake.state.up:
+            return None
+        balance = fake.state.balance
+        return AccountInfo(100, balance, balance, 0.0, 0.0, balance, 0.0)
+
+    @terminal
+    def symbol_select(symbol, enable):
+        return symbol in fake.state.ticks
+
+    @terminal
+    def symbol_info_tick(symbol):
+        if not fake.state.up or symbol not in fake.state.ticks:
+            return None
+        bid, ask = fake.state.ticks[symbol]
+        return Tick(bid, ask, 1)
+
+    @terminal
+    def symbol_info(symbol):
+        if not fake.state.up or symbol not in fake.state.ticks:
+            return None
+        return SymbolInfo(symbol, *fake.state.ticks[symbol])
+
+    @terminal
+    def order_send(request):
+        fake.state.sent.append(request)
+        if request["sl"] == 0:
+            return SendResult(10016, "Invalid stops", 0)
+        return SendResult(10009, "Request executed", len(fake.state.sent))
+
+    @terminal
+    def history_deals_get(
+        from_date=None, to_date=None, group="*", ticket=None, position=None
+    ):
+        deals = fake.state.deals
+        if ticket is not None:
+            return tuple(deal for deal in deals if deal.ticket == ticket)
+        if position is not None:
+            return tuple(deal for deal in deals if deal.position_id == position)
+        start, end = from_date.timestamp(), to_date.timestamp()
+        return tuple(deal for deal in deals if start <= deal.time <= end) or None
+
+    @terminal
+    def history_orders_get(from_date=None, to_date=None, ticket=None):
+        orders = fake.state.orders
+        if ticket is not None:
+            return tuple(order for order in orders if order.ticket == ticket) or None
+        start, end = from_date.timestamp(), to_date.timestamp()
+        return (
+            tuple(order for order in orders if start <= order.time_setup <= end) or None
+        )
+
+    return fake
+
+
+# installed before the modules resolve their lazy MetaTrader5
+sys.modules["MetaTrader5"] = _fake_metatrader5()
+
+
+@pytest.fixture
+def terminal() -> SimpleNamespace:
+    """the state of the fake MetaTrader5 terminal, reset for the test"""
+    fake = sys.modules["MetaTrader5"]
+    fake.state = _new_state()
+    return fake.state
@@ -0,0 +1,76 @@
+from threading import Thread
+import pytest
+import _account
+from mt5 import Mt5
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list:
+    """the monotonic time seen by the account snapshot, now[0] is moved by the tests"""
+    now = [100.0]
+    monkeypatch.setattr(_account, "monotonic", lambda: now[0])
+    return now
+
+
+def account_calls(terminal) -> int:
+    return sum(name == "account_info" for name, _ in terminal.calls)
+
+
+def test_the_properties_share_a_snapshot_by_default(terminal, clock):
+    mt5 = Mt5("server", 1, "password")
+    balance, equity, margins = (
+        mt5.account_balance,
+        mt5.account_equity,
+        mt5.account_margins,
+    )
+
+    assert (balance, equity, margins["free"]) == (1000.0, 1000.0, 1000.0)
+    assert account_calls(terminal) == 1
+    assert mt5.account_snapshot_stats["hits"] == 2
+
+
+def test_an_old_snapshot_is_refreshed(terminal, clock):
+    mt5 = Mt5("server", 1, "password", account_max_age=0.5)
+    assert mt5.account_balance == 1000.0
+
+    terminal.balance = 2000.0
+    clock[0] += 0.5
+    assert mt5.account_balance == 1000.0
+    clock[0] += 0.01
+    assert mt5.account_balance == 2000.0
+    assert account_calls(terminal) == 2
+
+    # not reused
+    mt5 = Mt5("server", 1, "password", account_max_age=0)
+    mt5.account_balance
+    clock[0] += 0.001
+    mt5.account_equity
+    assert account_calls(terminal) == 4
+
+
+def test_a_pinned_snapshot_is_kept_by_its_thread(terminal, clock):
+    mt5 = Mt5("server", 1, "password", account_max_age=0)
+    others = []
+    with mt5.pinned_account():
+        terminal.balance = 2000.0
+        clock[0] += 60
+        pinned = (mt5.account_balance, mt5.account_equity, mt5.account_info["balance"])
+        thread = Thread(target=lambda: others.append(mt5.account_balance))
+        thread.start()
+        thread.join()
+
+    assert pinned == (1000.0, 1000.0, 1000.0)
+    assert others == [2000.0]
+    assert mt5.account_balance == 2000.0
+
+
+def test_pinning_refreshes_a_snapshot_older_than_max_age(terminal, clock):
+    mt5 = Mt5("server", 1, "password", account_max_age=10)
+    mt5.account_balance
+    terminal.balance = 2000.0
+    clock[0] += 1
+    with mt5.pinned_account() as info:
+        assert info.balance == 1000.0
+    with mt5.pinned_account(max_age=0.5) as info:
+        assert info.balance == mt5.account_balance == 2000.0
+    assert account_calls(terminal) == 2
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from time import sleep
+from mt5 import Mt5, AsyncMt5
+from _executor import TerminalExecutor, percentile
+from test_orders import ORDER
+
+
+def test_all_terminal_calls_run_on_the_executor_thread(terminal):
+    mt5 = Mt5("server", 1, "password", account_max_age=10)
+
+    async def main():
+        async with AsyncMt5(mt5, timeout=5) as amt:
+            # started from the event loop thread
+            feed = mt5.start_price_feed(["EURUSD"], interval=0.01, max_age=10)
+            mt5.start_account_refresher(0.01)
+            results = await amt.open_trades([ORDER, {**ORDER, "sl": 0}])
+            balance = await amt.account_balance()
+            while (
+                feed.stats["polls"] < 3 or mt5.account_snapshot_stats["refreshes"] < 3
+            ):
+                await asyncio.sleep(0.01)
+            return results, balance
+
+    results, balance = asyncio.run(main())
+    assert [result.succeed for result in results] == [True, False]
+    assert balance == 1000.0
+    assert len(terminal.sent) == 2
+    threads = {thread for _, thread in terminal.calls}
+    assert len(threads) == 1 and threading.get_ident() not in threads
+    # the background threads are stopped by disconnect()
+    assert mt5.price_feed is None
+    assert not any(
+        thread.name in ("mt5-price-feed", "mt5-account")
+        for thread in threading.enumerate()
+    )
+
+
+def test_the_executor_thread_stops_the_background_threads(terminal):
+    mt5 = Mt5("server", 1, "password")
+
+    async def main():
+        amt = AsyncMt5(mt5)
+        await amt.connect()
+        await amt.call(mt5.start_price_feed, ["EURUSD"], 0.001)
+        await amt.call(mt5.start_account_refresher, 0.001)
+        # the background threads queue their calls while the executor thread is busy
+        await amt.call(sleep, 0.05)
+        await asyncio.wait_for(amt.disconnect(), 5)
+
+    asyncio.run(main())
+    assert mt5.price_feed is None
+
+
+def test_executor_metrics_count_the_inline_calls():
+    executor = TerminalExecutor()
+    try:
+        # the nested call runs inline on the executor thread
+        assert (
+            executor.submit(lambda: executor.submit(sum, [1, 2]).result()).result() == 3
+        )
+        metrics = executor.metrics
+    finally:
+        executor.shutdown()
+    assert metrics["submitted"] == metrics["completed"] == 2
+
+
+def test_percentile_is_the_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert [percentile(samples, p) for p in (1, 50, 99, 100)] == [
+        1.0,
+        50.0,
+        99.0,
+        100.0,
+    ]
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from conftest import Deal
+from _history import HistoryStore, match_group
+
+START = datetime(2024, 1, 1)
+# the seconds of START in server time (the deals times)
+BASE = int(START.replace(tzinfo=timezone.utc).timestamp())
+DAY = 24 * 3600
+
+
+def deal(ticket: int, days: float, symbol: str = "EURUSD", profit: float = 0.0) -> Deal:
+    time = int(BASE + days * DAY)
+    return Deal(
+        ticket, ticket, time, time * 1000, 0, 0, ticket, 0.1, 1.1, profit, symbol
+    )
+
+
+def requested_periods(terminal) -> int:
+    return sum(name == "history_deals_get" for name, _ in terminal.calls)
+
+
+def test_sync_fetches_only_the_missing_periods(terminal):
+    terminal.deals = [deal(i, i) for i in range(1, 90)]
+    with HistoryStore(":memory:", chunk_days=30) as store:
+        deals = store.get(START, START + timedelta(days=60))
+        assert list(deals["ticket"]) == list(range(1, 61))
+        assert store.stats["requests"] == 2
+
+        # already synced
+        store.get(START + timedelta(days=10), START + timedelta(days=20))
+        assert store.stats["requests"] == 2
+
+        # the end of the synced period is fetched again (1 day overlap), then the earlier period
+        store.sync(START + timedelta(days=-5), START + timedelta(days=70))
+        assert store.stats["requests"] == 4
+        # the chunks bounds are inclusive: the deal at day 30 is fetched twice, days 59-70 are fetched
+        assert store.stats["fetched_deals"] == 61 + 12
+        assert store.synced_period == (
+            (START - timedelta(days=5)).replace(tzinfo=timezone.utc),
+            (START + timedelta(days=70)).replace(tzinfo=timezone.utc),
+        )
+    assert requested_periods(terminal) == 4
+
+
+def test_the_overlap_replaces_the_changed_deals(terminal, tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    terminal.deals = [deal(1, 1), deal(2, 9.5, profit=1.0)]
+    with HistoryStore(path) as store:
+        store.sync(START, START + timedelta(days=10))
+
+    # the deal 2 is updated and a deal is recorded in the overlap after the sync
+    terminal.deals = [deal(1, 1), deal(2, 9.5, profit=5.0), deal(3, 9.8), deal(4, 12)]
+    with HistoryStore(path) as store:
+        deals = store.get(START, START + timedelta(days=15))
+
+    assert list(deals["ticket"]) == [1, 2, 3, 4]
+    assert list(deals["profit"]) == [0.0, 5.0, 0.0, 0.0]
+
+
+def test_group_filters(terminal):
+    symbols = ["EURUSD", "GBPUSD", "USDJPY", "EURJPY", "XAUUSD"]
+    terminal.deals = [deal(i, i, symbol) for i, symbol in enumerate(symbols, 1)]
+    with HistoryStore(":memory:") as store:
+        end = START + timedelta(days=10)
+        assert len(store.get(START, end)) == 5
+        assert list(store.get(START, end, "USDJPY")["symbol"]) == ["USDJPY"]
+        assert list(store.get(START, end, "*USD*,!EUR*")["symbol"]) == [
+            "GBPUSD",
+            "USDJPY",
+            "XAUUSD",
+        ]
+        assert list(store.get(START, end, "!*USD")["symbol"]) == ["USDJPY", "EURJPY"]
+
+    mask = match_group(pd.Series(["EURUSD", "EURUSD", "GBPUSD"]), " EUR* , ")
+    assert list(mask) == [True, True, False]
+
+
+def test_naive_dates_are_server_time_and_aware_dates_are_converted(terminal):
+    terminal.deals = [deal(1, 0), deal(2, 1 / 24), deal(3, 2 / 24), deal(4, 3 / 24)]
+    with HistoryStore(":memory:") as store:
+        naive = store.get(START, START + timedelta(hours=1))
+        aware = store.get(
+            START.replace(tzinfo=timezone.utc),
+            START.replace(tzinfo=timezone.utc) + timedelta(hours=1),
+        )
+        # 02:00 in UTC+2 is 00:00 UTC
+        shifted = store.get(
+            START.replace(hour=2, tzinfo=timezone(timedelta(hours=2))),
+            START.replace(hour=3, tzinfo=timezone(timedelta(hours=2))),
+        )
+
+    assert list(naive["ticket"]) == list(aware["ticket"]) == [1, 2]
+    assert list(shifted["ticket"]) == [1, 2]
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from conftest import Deal
+from mt5 import Mt5
+
+NOW = int(datetime.now().timestamp())
+
+
+def deal(ticket: int, position: int, entry: int, hours_ago: float) -> Deal:
+    time = int(NOW - hours_ago * 3600)
+    return Deal(
+        ticket,
+        ticket,
+        time,
+        time * 1000,
+        0,
+        entry,
+        position,
+        0.1,
+        1.1,
+        float(ticket),
+        "EURUSD",
+    )
+
+
+def test_trade_results_find_the_exit_deals(terminal):
+    terminal.deals = [
+        # closed
+        deal(1, 10, 0, 5),
+        deal(2, 10, 1, 4),
+        # partially closed then closed by an opposite position
+        deal(3, 20, 0, 5),
+        deal(4, 20, 1, 4),
+        deal(5, 20, 3, 3),
+        # scaled in, still open
+        deal(6, 30, 0, 5),
+        deal(7, 30, 0, 4),
+    ]
+    mt5 = Mt5("server", 1, "password")
+    results = mt5.get_trade_results([10, 20, 30, 40])
+
+    assert {
+        ticket: result and result["ticket"] for ticket, result in results.items()
+    } == {
+        10: 2,
+        20: 5,
+        30: None,
+        40: None,
+    }
+    assert mt5.get_trade_result(30) is None
+    assert mt5.get_trade_result(20)["ticket"] == 5
+
+
+def test_trade_results_look_up_the_positions_closed_after_the_window(terminal):
+    terminal.deals = [deal(1, 10, 0, 50), deal(2, 10, 1, 1), deal(3, 20, 0, 50)]
+    mt5 = Mt5("server", 1, "password")
+    to_date = datetime.fromtimestamp(NOW) - timedelta(hours=24)
+    results = mt5.get_trade_results([10, 20], to_date - timedelta(days=3), to_date)
+
+    assert results[10]["ticket"] == 2
+    assert results[20] is None
+    # the found results are cached
+    terminal.deals = []
+    assert mt5.get_trade_results([10])[10]["ticket"] == 2
+
+
+def test_trade_results_report_the_open_positions_without_more_calls(terminal):
+    terminal.deals = [
+        deal(1, 10, 0, 5),
+        deal(2, 10, 1, 4),
+        deal(3, 20, 0, 5),
+        deal(4, 30, 0, 5),
+        deal(5, 40, 0, 3),
+        deal(6, 40, 1, 2),
+    ]
+    mt5 = Mt5("server", 1, "password")
+    terminal.calls.clear()
+    results = mt5.get_trade_results([10, 20, 30, 40, 50])
+
+    assert {
+        ticket: result and result["ticket"] for ticket, result in results.items()
+    } == {10: 2, 20: None, 30: None, 40: 6, 50: None}
+    # the deals of the period, then the ticket without deals in it
+    assert [name for name, _ in terminal.calls if name.startswith("history")] == [
+        "history_deals_get",
+        "history_deals_get",
+    ]
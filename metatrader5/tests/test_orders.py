@@ -0,0 +1,70 @@
+from mt5 import Mt5
+
+ORDER = {
+    "pair": "EURUSD",
+    "type": "BUY",
+    "volume": 0.1,
+    "entry": 1.1002,
+    "sl": 1.09,
+    "tp": 1.12,
+}
+
+
+def test_open_trades_sends_the_valid_orders(terminal):
+    mt5 = Mt5("server", 1, "password", pair_extension="m")
+    orders = [
+        ORDER,
+        {
+            **ORDER,
+            "pair": "USDJPY",
+            "type": "sell",
+            "entry": 150.1,
+            "sl": 151,
+            "tp": 149,
+        },
+        {**ORDER, "sl": 0},
+        {**ORDER, "entry": 1.2},
+        {**ORDER, "pair": "XXXYYY"},
+    ]
+    results = mt5.open_trades(orders)
+
+    assert [result.succeed for result in results] == [True, True, False, False, False]
+    assert [result.error.code for result in results[2:]] == [
+        "invalid_stops",
+        "invalid_price",
+        "unknown_pair",
+    ]
+    assert [request["symbol"] for request in terminal.sent] == [
+        "EURUSDm",
+        "USDJPYm",
+        "EURUSDm",
+    ]
+    assert all("total" in result.latency for result in results)
+
+
+def test_open_trades_rejects_invalid_fields(terminal):
+    mt5 = Mt5("server", 1, "password")
+    orders = [
+        {key: value for key, value in ORDER.items() if key != "pair"},
+        {**ORDER, "pair": None},
+        {**ORDER, "pair": ["EURUSD"]},
+        {**ORDER, "type": 1},
+        {**ORDER, "entry": "1.1"},
+    ]
+    results = mt5.open_trades(orders)
+
+    assert [result.error.code for result in results] == ["invalid_order"] * 5
+    assert terminal.sent == []
+
+
+def test_integer_entry_prices(terminal):
+    mt5 = Mt5("server", 1, "password")
+    terminal.ticks["XAUUSD"] = (1999.9, 2000.0)
+    results = mt5.open_trades(
+        [{**ORDER, "pair": "XAUUSD", "entry": 2000, "sl": 1990, "tp": 2020}]
+    )
+
+    assert results[0].succeed
+    assert mt5.open_trade(
+        "USDJPY", "BUY", 0.1, 150, 149, 152, acceptable_change_in_price=20
+    )
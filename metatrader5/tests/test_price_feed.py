@@ -0,0 +1,39 @@
+from time import sleep
+from _price_feed import PriceFeed
+from mt5 import Mt5
+
+
+def test_poll_caches_the_subscribed_quotes(terminal):
+    feed = PriceFeed(max_age=10)
+    feed.subscribe("EURUSD", "GBPUSD")
+    feed.poll()
+
+    assert feed.get("EURUSD") == (1.1, 1.1002)
+    # unknown symbols are counted as errors and never cached
+    assert feed.get("GBPUSD") is None
+    assert feed.stats == {"polls": 1, "errors": 1, "hits": 1, "misses": 1}
+
+
+def test_stale_and_unsubscribed_quotes_are_not_returned(terminal):
+    feed = PriceFeed(max_age=0.01)
+    feed.subscribe("EURUSD", "USDJPY")
+    feed.poll()
+    sleep(0.02)
+
+    assert feed.get("EURUSD") is None
+    assert feed.get("EURUSD", max_age=10) == (1.1, 1.1002)
+    feed.unsubscribe("USDJPY")
+    assert feed.quote("USDJPY") is None
+    assert feed.symbols == frozenset({"EURUSD"})
+
+
+def test_price_lookups_read_the_feed(terminal):
+    mt5 = Mt5("server", 1, "password")
+    with mt5.start_price_feed(["EURUSD"], interval=0.01, max_age=10) as feed:
+        while feed.get("EURUSD") is None:
+            sleep(0.01)
+        terminal.ticks["EURUSD"] = (1.2, 1.2002)
+        feed.stop()
+        assert mt5.get_current_pair_price("EURUSD") == {"sell": 1.1, "buy": 1.1002}
+    # pairs out of the feed are read from the terminal
+    assert mt5.get_current_pair_price("USDJPY") == {"sell": 150.1, "buy": 150.12}
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from time import perf_counter, sleep
+from mt5 import Mt5, AsyncMt5, mt
+
+
+def test_reconnections_do_not_overlap_the_executor_calls(terminal):
+    # every read calls the terminal
+    mt5 = Mt5("server", 1, "password", account_max_age=0)
+    terminal.delays = {"initialize": 0.02, "login": 0.01, "account_info": 0.002}
+
+    async def main():
+        async with AsyncMt5(mt5, timeout=5) as amt:
+            supervisor = mt5.start_supervisor(interval=0.005, backoff=0.005)
+            balances = []
+            for i in range(60):
+                if i in (10, 40):
+                    # the connection is lost, found by a probe or by a read
+                    terminal.up = False
+                balances.append(await amt.account_balance())
+            return balances, supervisor.metrics
+
+    balances, metrics = asyncio.run(main())
+    assert balances == [1000.0] * 60
+    assert metrics["reconnections"] >= 2
+    assert terminal.overlaps == 0
+    # nothing runs between the shutdown and the login of a reconnection
+    names = [name for name, _ in terminal.calls]
+    for i, name in enumerate(names):
+        if name == "shutdown" and i + 2 < len(names):
+            assert names[i + 1 : i + 3] == ["initialize", "login"]
+
+
+def test_all_supervisor_calls_run_on_the_executor_thread(terminal):
+    mt5 = Mt5("server", 1, "password")
+
+    async def main():
+        async with AsyncMt5(mt5, timeout=5) as amt:
+            supervisor = mt5.start_supervisor(interval=0.001, backoff=0.001)
+            while supervisor.metrics["probes"] < 3:
+                await asyncio.sleep(0.005)
+            terminal.up = False
+            while supervisor.metrics["reconnections"] < 1:
+                await asyncio.sleep(0.005)
+            return await amt.account_balance()
+
+    assert asyncio.run(main()) == 1000.0
+    assert {"terminal_info", "shutdown", "initialize", "login"} <= {
+        name for name, _ in terminal.calls
+    }
+    threads = {thread for _, thread in terminal.calls}
+    assert len(threads) == 1 and threading.get_ident() not in threads
+
+
+def test_the_login_of_a_reconnection_does_not_block_the_other_calls(terminal):
+    mt5 = Mt5("server", 1, "password")
+    terminal.delays = {"login": 0.5}
+    supervisor = mt5.start_supervisor(interval=0.001, backoff=0.001)
+    try:
+        terminal.up = False
+        while not any(name == "login" for name, _ in terminal.calls):
+            sleep(0.001)
+        start = perf_counter()
+        mt.order_send({"sl": 1})
+        blocked = perf_counter() - start
+        while supervisor.metrics["reconnections"] < 1:
+            sleep(0.01)
+    finally:
+        mt5.stop_supervisor()
+    assert blocked < 0.25
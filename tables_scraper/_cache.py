@@ -0,0 +1,213 @@
+"""
+a persistent on-disk cache of the scraped tables used by the main module (tables_scraper)
+"""
+
+import os
+import pickle
+import sqlite3
+from hashlib import sha256
+from threading import Lock
+from time import time
+from importlib.util import find_spec
+from typing import TYPE_CHECKING
+from _lazy import LazyModule
+
+#loaded on first use (see LazyModule), pyarrow is optional, it is only required by TablesCache
+pa = LazyModule("pyarrow")
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+def hash_source(source:"str|bytes") -> str:
+    """return the hash of a page source code, used as a part of the cache key"""
+    if isinstance(source, str):
+        source = source.encode("utf-8", errors="surrogatepass")
+    return sha256(source).hexdigest()
+
+
+class TablesCache:
+    """
+    stores the parsed tables on disk (Arrow IPC files) keyed by url, visible_only and the hash of the page source code,
+    the tables of an unchanged page are loaded (memory-mapped) from the cache instead of parsing the page again.
+    entries expire after ttl seconds, and the least recently used ones are evicted when the cache exceeds max_size bytes.
+    """
+    _METADATA_KEY = b"tables_scraper.columns"
+
+    def __init__(self, directory:str="tables_cache", ttl:"float|None"=None, max_size:int=512 * 1024 * 1024) -> None:
+        """
+        Params:
+            - directory ["tables_cache" by default]: the cache directory (created if not found)
+            - ttl [None by default]: seconds after which an entry expires (None: never)
+            - max_size [512 MB by default]: maximum size of the cached tables in bytes
+        """
+        if find_spec("pyarrow") is None:
+            raise Exception("pyarrow is required by TablesCache (pip install pyarrow)")
+        self._directory = directory
+        self._ttl = ttl
+        self._max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+        self._lock = Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False, isolation_level=None)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT NOT NULL,
+                visible_only INTEGER NOT NULL,
+                source_hash TEXT NOT NULL,
+                file_prefix TEXT NOT NULL,
+                tables INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (url, visible_only)
+            )
+        """)
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "uncacheable": 0}
+
+    def __enter__(self) -> "TablesCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """close the cache index"""
+        with self._lock:
+            self._db.close()
+
+    @property
+    def stats(self) -> dict:
+        """cache counters: hits, misses, expired, evictions and uncacheable (pages whose tables cannot be stored in Arrow format)"""
+        with self._lock:
+            return dict(self._stats)
+
+    @property
+    def size(self) -> int:
+        """the size of the cached tables in bytes"""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, url:str, visible_only:bool, source_hash:str) -> "list[DataFrame]|None":
+        """
+        return the cached tables of the page, None if not found, expired or the page source changed
+
+        Params:
+            - url: web page url
+            - visible_only: the visible_only used to extract the tables
+            - source_hash: the hash of the page source code (see hash_source())
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT source_hash, file_prefix, tables, created FROM entries WHERE url = ? AND visible_only = ?",
+                (url, int(visible_only)),
+            ).fetchone()
+            if row is None or row[0] != source_hash:
+                self._stats["misses"] += 1
+                return None
+            _, file_prefix, count, created = row
+            if self._ttl is not None and time() - created > self._ttl:
+                self._delete(url, visible_only, file_prefix, count)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            try:
+                tables = [self._read_table(self._path(file_prefix, i)) for i in range(count)]
+            #files deleted or corrupted
+            except Exception:
+                self._delete(url, visible_only, file_prefix, count)
+                self._stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE entries SET accessed = ? WHERE url = ? AND visible_only = ?", (time(), url, int(visible_only)))
+            self._stats["hits"] += 1
+            return tables
+
+    def put(self, url:str, visible_only:bool, source_hash:str, tables:"list[DataFrame]") -> bool:
+        """
+        store the tables of the page, return False if they cannot be stored in Arrow format
+
+        Params:
+            - url: web page url
+            - visible_only: the visible_only used to extract the tables
+            - source_hash: the hash of the page source code (see hash_source())
+            - tables: the extracted tables
+        """
+        try:
+            arrow_tables = [self._to_arrow(table) for table in tables]
+        except (pa.ArrowException, TypeError, ValueError):
+            with self._lock:
+                self._stats["uncacheable"] += 1
+            return False
+
+        file_prefix = hash_source(f"{int(visible_only)}|{url}")
+        with self._lock:
+            old = self._db.execute(
+                "SELECT tables FROM entries WHERE url = ? AND visible_only = ?", (url, int(visible_only))
+            ).fetchone()
+            if old is not None:
+                self._delete(url, visible_only, file_prefix, old[0])
+            size = 0
+            for i, arrow_table in enumerate(arrow_tables):
+                size += self._write_table(self._path(file_prefix, i), arrow_table)
+            now = time()
+            self._db.execute(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, int(visible_only), source_hash, file_prefix, len(arrow_tables), size, now, now),
+            )
+            self._evict()
+        return True
+
+    def clear(self) -> None:
+        """delete all cached tables"""
+        with self._lock:
+            for url, visible_only, file_prefix, count in self._db.execute("SELECT url, visible_only, file_prefix, tables FROM entries").fetchall():
+                self._delete(url, visible_only, file_prefix, count)
+
+    # ========== helpers (the lock must be held) ==========#
+    def _evict(self) -> None:
+        """delete the least recently used entries until the cache fits in max_size"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self._max_size:
+            return
+        for url, visible_only, file_prefix, count, size in self._db.execute(
+            "SELECT url, visible_only, file_prefix, tables, size FROM entries ORDER BY accessed"
+        ).fetchall():
+            self._delete(url, visible_only, file_prefix, count)
+            self._stats["evictions"] += 1
+            total -= size
+            if total <= self._max_size:
+                return
+
+    def _delete(self, url:str, visible_only:bool, file_prefix:str, count:int) -> None:
+        """delete the entry and its files"""
+        self._db.execute("DELETE FROM entries WHERE url = ? AND visible_only = ?", (url, int(visible_only)))
+        for i in range(count):
+            try:
+                os.remove(self._path(file_prefix, i))
+            except FileNotFoundError:
+                pass
+
+    def _path(self, file_prefix:str, index:int) -> str:
+        return os.path.join(self._directory, f"{file_prefix}_{index}.arrow")
+
+    def _to_arrow(self, table:"DataFrame") -> "pa.Table":
+        """convert the DataFrame to an Arrow table, the original columns (may be duplicated, MultiIndex or not strings) are kept in the metadata"""
+        renamed = table.set_axis([str(i) for i in range(table.shape[1])], axis=1)
+        arrow_table = pa.Table.from_pandas(renamed)
+        metadata = {**(arrow_table.schema.metadata or {}), self._METADATA_KEY: pickle.dumps(table.columns)}
+        return arrow_table.replace_schema_metadata(metadata)
+
+    def _read_table(self, path:str) -> "DataFrame":
+        """load a DataFrame from an Arrow IPC file (memory-mapped, the mapping lives as long as the zero-copy columns use it)"""
+        arrow_table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        table = arrow_table.to_pandas()
+        table.columns = pickle.loads(arrow_table.schema.metadata[self._METADATA_KEY])
+        return table
+
+    @staticmethod
+    def _write_table(path:str, arrow_table:"pa.Table") -> int:
+        """write the Arrow table to an IPC file (atomically) and return the file size"""
+        temp_path = f"{path}.tmp"
+        with pa.OSFile(temp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+        os.replace(temp_path, path)
+        return os.path.getsize(path)
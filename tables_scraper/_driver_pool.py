@@ -0,0 +1,160 @@
+"""
+a pool of reusable Chrome drivers used by the main module (tables_scraper)
+"""
+
+from contextlib import contextmanager
+from collections.abc import Callable, Iterable, Iterator
+from threading import Condition
+from time import monotonic
+from typing import TYPE_CHECKING
+from _tables_scraper import init_chrome_driver
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+class DriverPool:
+    """
+    a thread-safe pool of Chrome drivers,
+    drivers are launched lazily (only when needed) and reused across pages instead of launching a browser per page.
+    a driver is recycled (quit and replaced) after max_pages pages or when it stops responding.
+
+    usage:
+        with DriverPool(driver_path, size=2) as pool:
+            response = TablesScraper.scrape_dynamic_page(url, driver_path, driver_pool=pool)
+    """
+
+    def __init__(self, driver_path:"str|None"=None, size:int=2, show_browser:bool=False, max_pages:int=50, driver_factory:"Callable[[], webdriver.Chrome]|None"=None, block_resources:Iterable[str]=()) -> None:
+        """
+        Params:
+            - driver_path [None by default]: path to the chrome driver (.exe), required if driver_factory is not given
+            - size [2 by default]: maximum number of drivers running at the same time
+            - show_browser [False by default]: True to show the chrome browsers, False to hide them.
+            - max_pages [50 by default]: number of pages loaded by a driver before recycling it
+            - driver_factory [None by default]: a function without parameters returning a new driver (init_chrome_driver() is used by default)
+            - block_resources [nothing by default]: resources types blocked by the launched browsers (see init_chrome_driver()), ignored if driver_factory is given
+        """
+        if driver_factory is None:
+            if driver_path is None:
+                raise Exception("driver_path or driver_factory must be given")
+            block_resources = tuple(block_resources)
+            driver_factory = lambda: init_chrome_driver(driver_path, show_browser, block_resources)
+        self._driver_factory = driver_factory
+        self._size = size
+        self._max_pages = max_pages
+        #idle drivers as [driver, loaded pages]
+        self._idle:list[list] = []
+        #number of launched drivers (idle + borrowed)
+        self._launched = 0
+        self._closed = False
+        self._condition = Condition()
+        self._stats = {"launches": 0, "hits": 0, "waits": 0, "recycles": 0}
+
+    def __enter__(self) -> "DriverPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def stats(self) -> dict:
+        """
+        pool counters:
+            - launches: drivers launched
+            - hits: borrows served by an already running driver
+            - waits: borrows that had to wait for a driver to be released
+            - recycles: drivers quit after max_pages pages or after a crash
+        """
+        with self._condition:
+            return {**self._stats, "running": self._launched, "idle": len(self._idle)}
+
+    @contextmanager
+    def driver(self, timeout:"float|None"=None) -> "Iterator[webdriver.Chrome]":
+        """
+        borrow a driver from the pool, it is given back when the `with` block ends
+
+        Params:
+            - timeout [None by default]: maximum seconds to wait for a free driver (None to wait forever)
+        """
+        driver, pages = self._acquire(timeout)
+        failed = False
+        try:
+            yield driver
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._release(driver, pages + 1, failed)
+
+    def close(self) -> None:
+        """quit all idle drivers, borrowed drivers are quit when they are given back"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._launched -= len(idle)
+            self._condition.notify_all()
+        for driver, _ in idle:
+            self._quit(driver)
+
+    def _acquire(self, timeout:"float|None") -> tuple:
+        """return an idle driver or launch a new one if the pool is not full, otherwise wait for a driver to be released"""
+        deadline = None if timeout is None else monotonic() + timeout
+        waited = False
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise Exception("the drivers pool is closed")
+                if self._idle:
+                    self._stats["hits"] += 1
+                    return tuple(self._idle.pop())
+                if self._launched < self._size:
+                    self._launched += 1
+                    break
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0 or not self._condition.wait(remaining):
+                    raise Exception("Time Out: no free driver in the pool")
+
+        #launch outside the lock, it takes seconds
+        try:
+            driver = self._driver_factory()
+        except Exception as e:
+            with self._condition:
+                self._launched -= 1
+                self._condition.notify()
+            raise Exception(f"failed to launch the driver: {e}")
+        with self._condition:
+            self._stats["launches"] += 1
+        return driver, 0
+
+    def _release(self, driver:"webdriver.Chrome", pages:int, failed:bool) -> None:
+        """give the driver back to the pool, or quit it if it must be recycled"""
+        recycle = pages >= self._max_pages or (failed and not self._is_alive(driver))
+        with self._condition:
+            if not (recycle or self._closed):
+                self._idle.append([driver, pages])
+                self._condition.notify()
+                return
+            self._launched -= 1
+            if recycle:
+                self._stats["recycles"] += 1
+            self._condition.notify()
+        self._quit(driver)
+
+    @staticmethod
+    def _is_alive(driver:"webdriver.Chrome") -> bool:
+        """health check: True if the browser still responds"""
+        try:
+            driver.title
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver:"webdriver.Chrome") -> None:
+        """quit the driver, ignoring errors of already crashed browsers"""
+        try:
+            driver.quit()
+        except Exception:
+            pass
@@ -0,0 +1,249 @@
+"""
+a pooled HTTP client used by the main module (tables_scraper) to download static pages
+"""
+
+import gzip
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from random import uniform
+from socket import timeout as SocketTimeout
+from ssl import create_default_context
+from threading import Lock
+from time import sleep
+from urllib.parse import urljoin, urlsplit
+from _tables_scraper import USER_AGENT, http_error_message
+
+#brotli is optional, it is negotiated only if installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+@dataclass
+class FetchResult:
+    """the result of HttpFetcher.fetch()"""
+    url:str
+    status:int
+    body:bytes
+    charset:"str|None" = None
+    not_modified:bool = False
+
+    @property
+    def source(self) -> "str|bytes":
+        """the source code, decoded if the server sent its charset, otherwise left to the parser to detect"""
+        if self.charset is None:
+            return self.body
+        try:
+            return self.body.decode(self.charset, errors="replace")
+        except LookupError:
+            return self.body
+
+
+class HttpFetcher:
+    """
+    a thread-safe HTTP client for static pages, it:
+        - keeps the connections alive and reuses them (pooled per host)
+        - negotiates gzip/deflate compression (and brotli if installed)
+        - remembers ETag/Last-Modified of the pages to send conditional requests (a 304 costs no download)
+        - retries the failed requests with a jittered exponential backoff
+    """
+    _REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+    _RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, timeout:float=30, retries:int=3, backoff:float=0.5, max_idle_per_host:int=4, max_redirects:int=5, headers:"dict|None"=None, memo_size:int=256) -> None:
+        """
+        Params:
+            - timeout [30 by default]: maximum seconds to wait for the server (per network operation)
+            - retries [3 by default]: number of retries of a failed request (network errors, 429 and 5xx responses)
+            - backoff [0.5 by default]: base delay (seconds) between retries, doubled on each retry
+            - max_idle_per_host [4 by default]: maximum number of kept-alive connections per host
+            - max_redirects [5 by default]: maximum number of followed redirections
+            - headers [None by default]: extra request headers
+            - memo_size [256 by default]: number of pages whose validators (and remembered data) are kept
+        """
+        self._timeout = timeout
+        self._retries = retries
+        self._backoff = backoff
+        self._max_idle_per_host = max_idle_per_host
+        self._max_redirects = max_redirects
+        self._headers = {
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,*/*;q=0.8",
+            "Accept-Encoding": "gzip, deflate, br" if brotli else "gzip, deflate",
+            "Connection": "keep-alive",
+            **(headers or {}),
+        }
+        self._memo_size = memo_size
+        #idle connections per (scheme, host)
+        self._idle:dict[tuple, list] = {}
+        #url -> (etag, last_modified)
+        self._validators:OrderedDict = OrderedDict()
+        #data remembered by the callers for the pages (e.g parsed tables)
+        self._memo:OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self._ssl_context = create_default_context()
+
+    def __enter__(self) -> "HttpFetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """close all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    # ========== remembered data ==========#
+    def remember(self, key, value) -> None:
+        """remember a value (e.g the parsed tables of a page) until it is evicted by newer ones"""
+        with self._lock:
+            self._memo[key] = value
+            self._memo.move_to_end(key)
+            while len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+
+    def remembered(self, key):
+        """return the remembered value of the key, None if not found"""
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+            return None
+
+    # ========== fetch ==========#
+    def fetch(self, url:str, conditional:bool=False) -> FetchResult:
+        """
+        download the page, it will raise an Exception if it fails
+
+        Params:
+            - url: web page url
+            - conditional [False by default]: True to send If-None-Match/If-Modified-Since with the known validators of the page,
+                the result is `not_modified` (with empty body) if the page did not change
+        """
+        headers = dict(self._headers)
+        if conditional:
+            with self._lock:
+                etag, last_modified = self._validators.get(url, (None, None))
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        location = url
+        for _ in range(self._max_redirects + 1):
+            status, response_headers, body = self._request(location, headers)
+            if status in self._REDIRECT_STATUSES and response_headers.get("Location"):
+                location = urljoin(location, response_headers["Location"])
+                continue
+            break
+        else:
+            raise Exception(f"Too many redirections: {url}")
+
+        if status == 304:
+            return FetchResult(location, status, b"", not_modified=True)
+        if status >= 300:
+            raise Exception(http_error_message(status))
+
+        #keep the validators for the next conditional requests
+        etag, last_modified = response_headers.get("ETag"), response_headers.get("Last-Modified")
+        if etag or last_modified:
+            with self._lock:
+                self._validators[url] = (etag, last_modified)
+                self._validators.move_to_end(url)
+                while len(self._validators) > self._memo_size:
+                    self._validators.popitem(last=False)
+
+        body = self._decompress(body, response_headers.get("Content-Encoding", ""))
+        return FetchResult(location, status, body, response_headers.get_content_charset())
+
+    def _request(self, url:str, headers:dict) -> tuple:
+        """send a GET request (with retries) and return (status, headers, body)"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise Exception(f"Invalid URL")
+        key = (parts.scheme, parts.netloc)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        attempt = 0
+        while True:
+            connection, reused = self._get_connection(key)
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, HTTPException) as e:
+                connection.close()
+                #the server closed a kept-alive connection, retry on a new one immediately
+                if reused and isinstance(e, (ConnectionError, HTTPException)) and not isinstance(e, SocketTimeout):
+                    continue
+                if attempt >= self._retries:
+                    if isinstance(e, SocketTimeout):
+                        raise Exception("Time Out")
+                    raise Exception(f"Connection Error: {e}")
+                self._wait_before_retry(attempt)
+                attempt += 1
+                continue
+
+            if response.will_close:
+                connection.close()
+            else:
+                self._release_connection(key, connection)
+
+            if response.status in self._RETRY_STATUSES and attempt < self._retries:
+                self._wait_before_retry(attempt, response.headers.get("Retry-After"))
+                attempt += 1
+                continue
+            return response.status, response.headers, body
+
+    def _wait_before_retry(self, attempt:int, retry_after:"str|None"=None) -> None:
+        """sleep before the next retry, honoring the Retry-After header (in seconds) if given"""
+        if retry_after and retry_after.isdigit():
+            sleep(min(int(retry_after), 60))
+            return
+        sleep(self._backoff * 2 ** attempt * uniform(0.5, 1.5))
+
+    def _get_connection(self, key:tuple) -> tuple:
+        """return (connection, reused), an idle connection of the host if any, otherwise a new one"""
+        with self._lock:
+            connections = self._idle.get(key)
+            if connections:
+                return connections.pop(), True
+        scheme, host = key
+        if scheme == "https":
+            return HTTPSConnection(host, timeout=self._timeout, context=self._ssl_context), False
+        return HTTPConnection(host, timeout=self._timeout), False
+
+    def _release_connection(self, key:tuple, connection:HTTPConnection) -> None:
+        """keep the connection alive for the next requests to the same host"""
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self._max_idle_per_host:
+                connections.append(connection)
+                return
+        connection.close()
+
+    @staticmethod
+    def _decompress(body:bytes, encoding:str) -> bytes:
+        """decode the body according to the Content-Encoding header"""
+        encoding = encoding.strip().lower()
+        try:
+            if encoding == "gzip":
+                return gzip.decompress(body)
+            if encoding == "deflate":
+                try:
+                    return zlib.decompress(body)
+                #raw deflate stream (without zlib header)
+                except zlib.error:
+                    return zlib.decompress(body, -zlib.MAX_WBITS)
+            if encoding == "br" and brotli:
+                return brotli.decompress(body)
+        except Exception as e:
+            raise Exception(f"Failed to decompress the response ({encoding}): {e}")
+        return body
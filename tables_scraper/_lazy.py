@@ -0,0 +1,19 @@
+"""
+deferred imports of the dependencies of the main module (tables_scraper): a static scrape never loads selenium,
+and the optional ones (aiohttp, pyarrow) are only required by the classes using them
+"""
+
+from importlib import import_module
+
+
+class LazyModule:
+    """a module imported on the first access to one of its attributes (e.g pd.read_html), ImportError is raised there if it is missing"""
+
+    def __init__(self, name:str) -> None:
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, attribute:str):
+        if self.__module is None:
+            self.__module = import_module(self.__name)
+        return getattr(self.__module, attribute)
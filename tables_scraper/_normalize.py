@@ -0,0 +1,172 @@
+"""
+vectorized cleaning and dtypes optimization of the scraped tables, used by the main module (tables_scraper)
+"""
+
+import re
+import warnings
+from typing import TYPE_CHECKING
+from _lazy import LazyModule
+
+#loaded on first use (see LazyModule)
+pd = LazyModule("pandas")
+if TYPE_CHECKING:
+    from pandas import DataFrame, Series
+
+#footnotes markers like [3], [a] or [note 1]
+_FOOTNOTES = re.compile(r"\[[^\]]{1,12}\]")
+_CURRENCIES = re.compile(r"US\$|[$€£¥₹₽₩]|\b(?:USD|EUR|GBP|JPY)\b")
+#thousands separators (and spaces)
+_SEPARATORS = re.compile(r"[,\s']")
+_PARENTHESES = re.compile(r"^\((.*)\)$")
+_SUFFIX = re.compile(r"(?i)(k|m|bn|b|t)$")
+_MULTIPLIERS = {"k": 1e3, "m": 1e6, "b": 1e9, "bn": 1e9, "t": 1e12}
+_NA_VALUES = ["", "-", "–", "—", "?", "n/a", "N/A", "NA", "na", "null", "None", "nan", "NaN"]
+
+
+def flatten_columns(columns:"pd.Index") -> "pd.Index":
+    """
+    join the levels of MultiIndex columns with a space, skipping the "Unnamed: ..." and the repeated levels
+    e.g ("Population", "Numbers") -> "Population Numbers", ("Rank", "Rank") -> "Rank"
+    """
+    if not isinstance(columns, pd.MultiIndex):
+        return columns
+    flat = []
+    for levels in columns:
+        parts = []
+        for level in map(str, levels):
+            level = level.strip()
+            if level and not level.startswith("Unnamed:") and level not in parts:
+                parts.append(level)
+        flat.append(" ".join(parts))
+    return pd.Index(flat)
+
+
+def _clean_text(column:"Series") -> "Series":
+    """strip the values and the footnotes markers, the missing values markers become NA"""
+    text = column.astype("string").str.replace(_FOOTNOTES, "", regex=True).str.strip()
+    return text.mask(text.isin(_NA_VALUES))
+
+
+def _to_numeric(text:"Series", min_valid:float) -> "tuple[Series, str]|None":
+    """
+    convert numbers like "1,234.5", "12%", "$3.4M" or "(1,200)" to floats,
+    returns (values, kind) or None if less than min_valid of the present values are numbers
+    """
+    present = text.notna()
+    #match() does not warn about the group (kept for the replacement)
+    negative = text.str.match(_PARENTHESES).fillna(False).to_numpy(dtype=bool)
+    body = text.str.replace(_PARENTHESES, r"\1", regex=True).str.replace("−", "-", regex=False)
+    percent = body.str.endswith("%").fillna(False)
+    currency = body.str.contains(_CURRENCIES, regex=True).fillna(False)
+    body = body.str.rstrip("%").str.replace(_CURRENCIES, "", regex=True).str.replace(_SEPARATORS, "", regex=True)
+    suffix = body.str.extract(_SUFFIX, expand=False).str.lower()
+    body = body.str.replace(_SUFFIX, "", regex=True)
+
+    values = pd.to_numeric(body.astype(object), errors="coerce")
+    if values[present].notna().mean() < min_valid:
+        return None
+    values = values * pd.to_numeric(suffix.astype(object).map(_MULTIPLIERS), errors="coerce").fillna(1.0).to_numpy()
+    values = values.mask(negative, -values)
+
+    if percent[present].mean() >= min_valid:
+        kind = "percent"
+    elif currency[present].mean() >= min_valid:
+        kind = "currency"
+    else:
+        kind = "numeric"
+    return values.astype(float), kind
+
+
+def _to_datetime(text:"Series", min_valid:float) -> "Series|None":
+    """convert the dates, None if less than min_valid of the present values are dates"""
+    present = text.notna()
+    #dates contain digits, skip the plain text columns without trying to parse them
+    if text[present].str.contains(r"\d", regex=True).mean() < min_valid:
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        dates = pd.to_datetime(text.astype(object), errors="coerce")
+    if dates[present].notna().mean() < min_valid:
+        return None
+    return dates
+
+
+def _downcast(column:"Series") -> "Series":
+    """convert the numbers to the smallest dtype that keeps their values"""
+    if pd.api.types.is_integer_dtype(column):
+        return pd.to_numeric(column, downcast="integer")
+    if not pd.api.types.is_float_dtype(column):
+        return column
+    values = column.dropna()
+    if len(values) == len(column) and (values % 1 == 0).all():
+        return pd.to_numeric(column, downcast="integer")
+    smaller = column.astype("float32")
+    #float32 only if no precision is lost
+    if ((smaller.astype(column.dtype) == column) | column.isna()).all():
+        return smaller
+    return column
+
+
+def normalize_table(table:"DataFrame", min_valid:float=0.9, dates:bool=True, category_ratio:float=0.5, downcast:bool=False, arrow:bool=False) -> tuple:
+    """
+    return (normalized copy of the table, report), see normalize_tables() for the params
+    """
+    before = int(table.memory_usage(deep=True).sum())
+    names = flatten_columns(table.columns)
+    converted = {}
+    columns = []
+    for position in range(table.shape[1]):
+        column, name = table.iloc[:, position], names[position]
+        #text columns with at least a value (object dtype, or the str dtype of pandas >= 3)
+        is_text = pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column)
+        if is_text and (text := _clean_text(column)).notna().any():
+            if (numeric := _to_numeric(text, min_valid)) is not None:
+                column, converted[name] = numeric
+            elif dates and (datetimes := _to_datetime(text, min_valid)) is not None:
+                column, converted[name] = datetimes, "datetime"
+            else:
+                #low cardinality strings -> category, only if it takes less memory
+                present = text.dropna()
+                if len(present) and present.nunique() / len(present) <= category_ratio:
+                    category = text.astype("category")
+                    if category.memory_usage(deep=True) < column.memory_usage(deep=True):
+                        column, converted[name] = category, "category"
+        if downcast:
+            column = _downcast(column)
+        columns.append(column.reset_index(drop=True))
+
+    result = pd.concat(columns, axis=1) if columns else table.copy()
+    result.columns = names
+    result.index = table.index
+    if arrow:
+        try:
+            result = result.convert_dtypes(dtype_backend="pyarrow")
+        except TypeError:
+            raise Exception("arrow dtypes require pandas >= 2.0 and pyarrow")
+    after = int(result.memory_usage(deep=True).sum())
+    return result, {"before": before, "after": after, "saved": before - after, "converted": converted}
+
+
+def normalize_tables(tables:"list[DataFrame]", min_valid:float=0.9, dates:bool=True, category_ratio:float=0.5, downcast:bool=False, arrow:bool=False) -> tuple:
+    """
+    convert the text columns of the tables to proper dtypes with vectorized operations, returns (normalized tables, report per table):
+        - numbers with thousands separators, percentages ("12%" -> 12.0), currencies ("$3.4M" -> 3400000.0) and "(1,200)" -> -1200.0
+        - dates
+        - low cardinality strings -> category
+        - MultiIndex columns are flattened
+    each report is a dict like -> {"before": bytes, "after": bytes, "saved": bytes, "converted": {column: kind}}
+
+    Params:
+        - tables: the scraped tables
+        - min_valid [0.9 by default]: minimum ratio of the present values that must be converted to convert a column
+        - dates [True by default]: True to convert the dates columns
+        - category_ratio [0.5 by default]: maximum ratio of unique values to convert a column to category
+        - downcast [False by default]: True to downcast the numbers to the smallest dtypes that keep their values
+        - arrow [False by default]: True to use Arrow-backed dtypes (requires pandas >= 2.0 and pyarrow)
+    """
+    normalized, report = [], []
+    for table in tables:
+        table, table_report = normalize_table(table, min_valid, dates, category_ratio, downcast, arrow)
+        normalized.append(table)
+        report.append(table_report)
+    return normalized, report
@@ -0,0 +1,141 @@
+"""
+per domain memory of the scraping strategies used by auto_scrape_tables() in the main module (tables_scraper)
+"""
+
+import json
+import os
+from threading import Lock
+from urllib.parse import urlsplit
+
+
+class StrategyMemory:
+    """
+    remembers per domain (saved in a JSON file) which strategy worked last time:
+        - "dynamic" domains go straight to the browser, skipping the static attempt (re-probed every reprobe_every pages)
+        - on domains where the browser did not find more tables, an empty static result is accepted without falling back
+          (the browser is tried again every reprobe_every empty pages)
+    """
+
+    def __init__(self, path:"str|None"="strategies.json", reprobe_every:int=50) -> None:
+        """
+        Params:
+            - path ["strategies.json" by default]: the JSON file the strategies are loaded from and saved to (None to keep them in memory only)
+            - reprobe_every [50 by default]: number of pages of a "dynamic" domain after which the static strategy is tried again,
+                and of accepted empty pages after which the browser is tried again
+        """
+        self._path = path
+        self._reprobe_every = reprobe_every
+        self._lock = Lock()
+        self._domains:dict[str, dict] = {}
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._domains = json.load(f)
+        self._stats = {"static": 0, "dynamic": 0, "fallbacks": 0, "skipped_static": 0, "skipped_fallbacks": 0, "time_saved": 0.0}
+
+    def __enter__(self) -> "StrategyMemory":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.save()
+
+    @property
+    def stats(self) -> dict:
+        """
+        counters:
+            - static/dynamic: pages scraped with each strategy
+            - fallbacks: static attempts that fell back to the browser
+            - skipped_static: static attempts skipped on "dynamic" domains
+            - skipped_fallbacks: useless fallbacks skipped on domains where the browser did not help
+            - time_saved: estimated seconds saved by the skipped attempts
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def strategy(self, url:str) -> str:
+        """return the remembered strategy of the url domain, "static" if unknown"""
+        with self._lock:
+            return self._domains.get(self._domain(url), {}).get("strategy", "static")
+
+    def choose(self, url:str) -> str:
+        """return the strategy to try first for the url: "static" or "dynamic" """
+        with self._lock:
+            entry = self._entry(url)
+            if entry["strategy"] != "dynamic":
+                return "static"
+            entry["since_probe"] += 1
+            #check from time to time if the static strategy works again
+            if entry["since_probe"] >= self._reprobe_every:
+                entry["since_probe"] = 0
+                return "static"
+            self._stats["skipped_static"] += 1
+            self._stats["time_saved"] += entry["static_cost"]
+            return "dynamic"
+
+    def accept_empty(self, url:str) -> bool:
+        """return True if an empty static result should be accepted (the browser did not find more tables on this domain)"""
+        with self._lock:
+            entry = self._entry(url)
+            if not entry["dynamic_useless"]:
+                return False
+            entry["since_probe"] += 1
+            #check from time to time if the browser finds tables again
+            if entry["since_probe"] >= self._reprobe_every:
+                entry["since_probe"] = 0
+                return False
+            self._stats["skipped_fallbacks"] += 1
+            self._stats["time_saved"] += entry["dynamic_cost"]
+            return True
+
+    def record(self, url:str, strategy:str, seconds:float, worked:bool, failed:bool=False) -> None:
+        """
+        record the result of a strategy
+
+        Params:
+            - url: web page url
+            - strategy: "static" or "dynamic"
+            - seconds: time spent by the strategy
+            - worked: True if the strategy found the tables
+            - failed [False by default]: True if the strategy raised an error (e.g a browser crash), it says nothing about the domain
+        """
+        with self._lock:
+            entry = self._entry(url)
+            before = (entry["strategy"], entry["dynamic_useless"])
+            self._stats[strategy] += 1
+            cost = f"{strategy}_cost"
+            entry[cost] = seconds if not entry[cost] else 0.8 * entry[cost] + 0.2 * seconds
+            if strategy == "static":
+                if worked:
+                    entry["strategy"] = "static"
+                else:
+                    self._stats["fallbacks"] += 1
+            elif worked:
+                entry["strategy"], entry["dynamic_useless"] = "dynamic", False
+            #the browser loaded the page but found no tables
+            elif not failed:
+                entry["strategy"], entry["dynamic_useless"] = "static", True
+            changed = before != (entry["strategy"], entry["dynamic_useless"])
+        #save only when a domain changes its strategy
+        if changed:
+            self.save()
+
+    def save(self) -> None:
+        """save the strategies to the JSON file"""
+        if self._path is None:
+            return
+        with self._lock:
+            content = json.dumps(self._domains, indent=2)
+            temp_path = f"{self._path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(temp_path, self._path)
+
+    # ========== helpers (the lock must be held) ==========#
+    @staticmethod
+    def _domain(url:str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def _entry(self, url:str) -> dict:
+        return self._domains.setdefault(
+            self._domain(url),
+            {"strategy": "static", "dynamic_useless": False, "static_cost": 0.0, "dynamic_cost": 0.0, "since_probe": 0},
+        )
@@ -2,57 +2,310 @@
 helpers functions used in the main module (tables_scraper)
 """
 
-from pandas import read_html, DataFrame
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, ExitStack
+from io import BytesIO, StringIO
+from time import monotonic, perf_counter
+from collections.abc import Callable, Iterable, Iterator
 from urllib.error import HTTPError, URLError
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, InvalidArgumentException
+from http import HTTPStatus
+from threading import Lock
+from typing import TYPE_CHECKING
+from _lazy import LazyModule
 
+#loaded on first use (see LazyModule), a static scrape never loads selenium
+etree = LazyModule("lxml.etree")
+pd = LazyModule("pandas")
+webdriver = LazyModule("selenium.webdriver")
+support_ui = LazyModule("selenium.webdriver.support.ui")
+exceptions = LazyModule("selenium.common.exceptions")
+if TYPE_CHECKING:
+    from pandas import DataFrame
 
-def extract_tables(src:str, visible_only:bool=True) -> list[DataFrame]:
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/78.0.3904.108 Safari/537.36"
+
+#URL patterns blocked for each resource type (see init_chrome_driver())
+BLOCKABLE_RESOURCES = {
+    "fonts": ["*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*fonts.googleapis.com*", "*fonts.gstatic.com*"],
+    "css": ["*.css*"],
+    "media": ["*.mp4*", "*.webm*", "*.ogg*", "*.mp3*", "*.wav*", "*.m3u8*", "*.mov*", "*.avi*"],
+    #well-known analytics/ads/widgets hosts
+    "third_party_scripts": [
+        "*googletagmanager.com*", "*google-analytics.com*", "*googlesyndication.com*", "*doubleclick.net*",
+        "*adservice.google.com*", "*connect.facebook.net*", "*platform.twitter.com*", "*hotjar.com*",
+        "*segment.com*", "*scorecardresearch.com*", "*quantserve.com*", "*amazon-adsystem.com*",
+        "*taboola.com*", "*outbrain.com*", "*criteo.com*", "*newrelic.com*", "*nr-data.net*",
+    ],
+}
+
+
+def http_error_message(err:int) -> str:
+    """
+    return a readable message for the given HTTP status code (e.g "Client Error: 404 Not Found")
+    """
+    try:
+        reason = HTTPStatus(err).phrase
+    except ValueError:
+        reason = ""
+    if err >= 500:
+        kind = "Server Error"
+    elif err >= 400:
+        kind = "Client Error"
+    elif err >= 300:
+        kind = "Redirection"
+    else:
+        kind = "No HTTP Error"
+    return f"{kind}: {err} {reason}".strip()
+
+
+@contextmanager
+def timed(timings:"dict|None", stage:str) -> Iterator[None]:
+    """
+    add the seconds spent in the `with` block to timings[stage] (does nothing if timings is None)
+    """
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0) + perf_counter() - start
+
+
+def extract_tables(src:"str|bytes", visible_only:bool=True, timings:"dict|None"=None) -> "list[DataFrame]":
     """
     returns all tables as a list of pandas DataFrames
 
     Params:
-        - src: a string can be either a URL or a source code
+        - src: a string can be either a URL or a source code, or the raw source code as bytes
         - visible_only [True by default]: True to extract only visible tables, False to extract hidden tables as well.
-
+        - timings [None by default]: a dict to add the spent seconds to, under "parse" ("fetch+parse" if src is a URL)
     """
+    is_url = isinstance(src, str) and src.lstrip()[:8].lower().startswith(("http://", "https://", "ftp://", "file://"))
+    #already downloaded source code, let the parser detect its encoding
+    if isinstance(src, bytes):
+        src = BytesIO(src)
+    #decoded source code (read_html takes a literal string for a file path)
+    elif not is_url:
+        src = StringIO(src)
     try:
-        return read_html(src, displayed_only=visible_only)
+        with timed(timings, "fetch+parse" if is_url else "parse"):
+            return pd.read_html(src, displayed_only=visible_only)
     #no tables are found
     except ValueError:
         return []
     except HTTPError as e:
-        err = e.getcode()
-        if err > 500:
-            raise Exception(f"Server Error: {err}")
-        if err > 400:
-            raise Exception(f"Client Error: {err}")
-        if err > 300:
-            raise Exception(f"Redirection: {err}")
-        else:
-            raise Exception(f"No HTTP Error: {err}")
+        raise Exception(http_error_message(e.getcode()))
     except URLError:
         raise Exception(f"Invalid URL")
     except Exception as e:
         raise Exception(f"unexpected error occurred: {e}")
 
 
-def init_chrome_driver(driver_path:str, show_browser:bool) -> webdriver:
+_SCRIPTS_AND_STYLES = re.compile(r"<(script|style|noscript)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(r"<[^>]*>")
+#a text read_html looks for in the tables (its default match)
+_TEXT = re.compile(".+")
+_EMPTY_APP_ROOT = re.compile(r"""<div[^>]*\bid\s*=\s*["'](root|app|__next|__nuxt|svelte)["'][^>]*>\s*</div>""", re.IGNORECASE)
+
+
+#the parsing processes shared by the scrape_many() calls, by number of processes
+_parse_pools:"dict[int, ProcessPoolExecutor]" = {}
+_parse_pools_lock = Lock()
+
+
+def preload_parser() -> None:
+    """
+    initializer of the parsing processes: loads pandas and lxml once per process, before its first page
+    """
+    #the first attribute access imports the module
+    pd.read_html
+    etree.iterparse
+
+
+def parse_pool(workers:"int|None"=None) -> ProcessPoolExecutor:
+    """
+    return the shared pool of parsing processes, started on first use (the processes are reused by the next calls)
+
+    Params:
+        - workers [None by default]: number of processes (None: number of CPUs)
+    """
+    workers = workers or os.cpu_count() or 1
+    with _parse_pools_lock:
+        pool = _parse_pools.get(workers)
+        if pool is None:
+            pool = _parse_pools[workers] = ProcessPoolExecutor(workers, initializer=preload_parser)
+        return pool
+
+
+def retire_parse_pool(pool:ProcessPoolExecutor) -> None:
+    """
+    stop sharing the pool (e.g a timed out parse keeps its process busy, or a process crashed), the next parse_pool() starts a new one,
+    the pool stops once its running parses end
+    """
+    with _parse_pools_lock:
+        for workers, shared in list(_parse_pools.items()):
+            if shared is pool:
+                del _parse_pools[workers]
+    pool.shutdown(wait=False)
+
+
+def looks_like_js_shell(src:"str|bytes", min_words:int=50) -> bool:
+    """
+    return True if the source code looks like a JavaScript application shell (the content is rendered by JS),
+    i.e. an empty application root element (e.g <div id="root"></div>), or scripts with almost no text
+
+    Params:
+        - src: the source code
+        - min_words [50 by default]: pages with scripts and less words than min_words are considered shells
+    """
+    if isinstance(src, bytes):
+        src = src.decode("utf-8", errors="ignore")
+    if _EMPTY_APP_ROOT.search(src):
+        return True
+    if "<script" not in src.lower():
+        return False
+    text = _TAGS.sub(" ", _SCRIPTS_AND_STYLES.sub(" ", src))
+    return len(text.split()) < min_words
+
+
+def iter_tables(src:"str|bytes", visible_only:bool=True, match:"str|None"=None, index:"int|Iterable[int]|None"=None, attrs:"dict|None"=None, min_rows:int=0, min_cols:int=0, max_tables:"int|None"=None) -> "Iterator[DataFrame]":
+    """
+    yield the tables one by one while scanning the source code (streaming parser),
+    the tables not matching the selectors are skipped before building their DataFrames.
+    the yielded tables are identical to the ones returned by extract_tables()
+
+    Params:
+        - src: the source code (str or bytes)
+        - visible_only [True by default]: True to extract only visible tables, False to extract hidden tables as well.
+        - match [None by default]: a regex, only the tables containing a text matching it are extracted
+        - index [None by default]: the position(s) of the needed tables in the list that extract_tables() returns
+            (the tables before the last needed one are parsed to count the tables read_html leaves out)
+        - attrs [None by default]: the attributes of the needed tables e.g {"id": "prices"} or {"class": "wikitable sortable"} (exact values)
+        - min_rows [0 by default]: minimum number of rows (<tr> elements, header rows included)
+        - min_cols [0 by default]: minimum number of columns (cells of the widest row)
+        - max_tables [None by default]: stop after extracting max_tables tables
+    """
+    pattern = re.compile(match) if match is not None else None
+    indexes = {index} if isinstance(index, int) else set(index) if index is not None else None
+    if isinstance(src, str):
+        source, encoding = BytesIO(src.encode("utf-8")), "utf-8"
+    else:
+        source, encoding = BytesIO(src), None
+
+    position = 0
+    extracted = 0
+    #number of currently opened tables
+    depth = 0
+    for event, element in etree.iterparse(source, events=("start", "end"), html=True, encoding=encoding):
+        if element.tag != "table":
+            #free the parsed elements outside the tables
+            if event == "end" and depth == 0:
+                _free_element(element)
+            continue
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        #wait for the outer table to end, nested tables are listed after it (same as read_html)
+        if depth:
+            continue
+
+        for table in element.iter("table"):
+            rows = [row for row in table.iter("tr") if _row_width(row)]
+            #read_html skips the hidden tables and the tables without text
+            if visible_only and "display:none" in table.get("style", "").replace(" ", ""):
+                continue
+            if not rows or not any(_TEXT.search(text) for text in table.itertext()):
+                continue
+            frame = None
+            if indexes is not None:
+                #the position counts the tables read_html returns, the tables left empty are known once parsed
+                frame = _parse_table(table, visible_only)
+                if frame is None:
+                    continue
+                position += 1
+                if position - 1 not in indexes:
+                    #all needed tables are passed
+                    if position - 1 > max(indexes):
+                        return
+                    continue
+            if attrs and any(table.get(name) != value for name, value in attrs.items()):
+                continue
+            if len(rows) < min_rows or max(map(_row_width, rows)) < min_cols:
+                continue
+            if pattern is not None and not any(pattern.search(text) for text in table.itertext()):
+                continue
+            if frame is None:
+                frame = _parse_table(table, visible_only)
+                if frame is None:
+                    continue
+            yield frame
+            extracted += 1
+            if max_tables is not None and extracted >= max_tables:
+                return
+            #all needed tables are extracted
+            if indexes is not None and position - 1 >= max(indexes):
+                return
+        _free_element(element)
+
+
+def _parse_table(table:"etree._Element", visible_only:bool) -> "DataFrame|None":
+    """the DataFrame of the table element (as read_html builds it), None if read_html finds no data in it"""
+    html = etree.tostring(table, encoding="unicode", method="html", with_tail=False)
+    try:
+        tables = pd.read_html(StringIO(html), displayed_only=visible_only)
+    except ValueError:
+        return None
+    return tables[0] if tables else None
+
+
+def _row_width(row:"etree._Element") -> int:
+    """number of columns of the table row (colspans included)"""
+    width = 0
+    for cell in row:
+        if cell.tag in ("td", "th"):
+            try:
+                width += max(1, int(cell.get("colspan", 1)))
+            except ValueError:
+                width += 1
+    return width
+
+
+def _free_element(element:"etree._Element") -> None:
+    """release the memory of an already processed element and its previous siblings"""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def init_chrome_driver(driver_path:str, show_browser:bool, block_resources:Iterable[str]=()) -> "webdriver.Chrome":
     """
     instantiate and return a Chrome driver
 
     Params:
         - driver_path: path to the chrome driver (.exe)
         - show_browser: True to show the chrome browser, False to hide it.
+        - block_resources [nothing by default]: resources types to block in addition to the images, any of: "fonts", "css", "media", "third_party_scripts"
     """
+    blocked_urls = []
+    for resource in block_resources:
+        if resource not in BLOCKABLE_RESOURCES:
+            raise Exception(f"Invalid resource type to block: '{resource}'")
+        blocked_urls.extend(BLOCKABLE_RESOURCES[resource])
+
     #setup options
-    options = Options()
+    options = webdriver.ChromeOptions()
     #show/hide the browser
     options.headless = not show_browser
     #change the default user-agent
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/78.0.3904.108 Safari/537.36")
+    options.add_argument(f"user-agent={USER_AGENT}")
     #hide Chrome console output
     options.add_experimental_option('excludeSwitches', ['enable-logging'])
     #block images
@@ -61,30 +314,103 @@ def init_chrome_driver(driver_path:str, show_browser:bool) -> webdriver:
     }}
 
     #! invalid path will raise an unhandled exception
-    return webdriver.Chrome(driver_path, options=options)
+    driver = webdriver.Chrome(driver_path, options=options)
+    #block the other resources through the DevTools protocol
+    if blocked_urls:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
+    return driver
 
 
-def get_js_driven_source_code(url:str, driver_path:str, show_browser:bool=False) -> str:
+def tables_ready(count:int=1) -> "Callable[[webdriver.Chrome], bool]":
     """
-    return the source code of the needed page
+    readiness condition: the page contains at least `count` tables
+    """
+    return lambda driver: driver.execute_script("return document.getElementsByTagName('table').length") >= count
+
+
+def selector_ready(css_selector:str) -> "Callable[[webdriver.Chrome], bool]":
+    """
+    readiness condition: the page contains an element matching the css selector
+    """
+    return lambda driver: driver.execute_script("return document.querySelector(arguments[0]) !== null", css_selector)
+
+
+#install a MutationObserver on the first call, then return the milliseconds since the last DOM change
+_QUIET_TIME_SCRIPT = """
+if (window.__tablesScraperLastChange === undefined) {
+    window.__tablesScraperLastChange = performance.now();
+    new MutationObserver(function () { window.__tablesScraperLastChange = performance.now(); })
+        .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+return performance.now() - window.__tablesScraperLastChange;
+"""
+
+
+def dom_stable(quiet_ms:int=500) -> "Callable[[webdriver.Chrome], bool]":
+    """
+    readiness condition: the DOM did not change for `quiet_ms` milliseconds
+    """
+    return lambda driver: driver.execute_script(_QUIET_TIME_SCRIPT) >= quiet_ms
+
+
+def load_page(driver:"webdriver.Chrome", url:str, wait_until:"Callable[[webdriver.Chrome], bool]|None"=None, wait_timeout:float=10) -> str:
+    """
+    load the url in the given driver and return the page source code
 
     Params:
+        - driver: a running Chrome driver
         - url: webpage url
-        - driver_path: path to the chrome driver (.exe)
-        - show_browser [False by default]: True to show the chrome browser, False otherwise.
+        - wait_until [None by default]: a readiness condition (e.g tables_ready()), the source code is returned as soon as it returns True
+        - wait_timeout [10 by default]: maximum seconds to load the page and wait for wait_until
     """
-    driver = init_chrome_driver(driver_path, show_browser)
-    #get the URL
+    deadline = monotonic() + wait_timeout
     try:
+        #the load is bounded by the deadline too (pooled drivers keep the timeout of their previous page)
+        driver.set_page_load_timeout(max(0, deadline - monotonic()))
         driver.get(url)
-    except TimeoutException:
+    except exceptions.TimeoutException:
        raise Exception("Time Out")
-    except InvalidArgumentException:
+    except exceptions.InvalidArgumentException:
        raise Exception("Invalid URL")
     except Exception as e:
         raise Exception(f"unexpected error occurred: {e}")
 
+    if wait_until is not None:
+        try:
+            support_ui.WebDriverWait(driver, max(0, deadline - monotonic()), poll_frequency=0.1).until(wait_until)
+        except exceptions.TimeoutException:
+            raise Exception("Time Out: the page is not ready")
+    return driver.page_source
+
+
+def get_js_driven_source_code(url:str, driver_path:str, show_browser:bool=False, driver_pool:"DriverPool|None"=None, wait_until:"Callable[[webdriver.Chrome], bool]|None"=None, wait_timeout:float=10, block_resources:Iterable[str]=(), timings:"dict|None"=None) -> str:
+    """
+    return the source code of the needed page
+
+    Params:
+        - url: webpage url
+        - driver_path: path to the chrome driver (.exe)
+        - show_browser [False by default]: True to show the chrome browser, False otherwise.
+        - driver_pool [None by default]: a DriverPool to borrow the driver from, instead of launching a new driver
+        - wait_until [None by default]: a readiness condition (e.g tables_ready()), the source code is returned as soon as it returns True
+        - wait_timeout [10 by default]: maximum seconds to load the page and wait for wait_until
+        - block_resources [nothing by default]: resources types to block (see init_chrome_driver()), ignored if driver_pool is given
+        - timings [None by default]: a dict to add the spent seconds to, under "driver" (launch/borrow and quit) and "render" (load and wait)
+    """
+    if driver_pool is not None:
+        with ExitStack() as borrowed:
+            with timed(timings, "driver"):
+                driver = borrowed.enter_context(driver_pool.driver())
+            with timed(timings, "render"):
+                return load_page(driver, url, wait_until, wait_timeout)
+
+    with timed(timings, "driver"):
+        driver = init_chrome_driver(driver_path, show_browser, block_resources)
     #close the driver and return the source code
-    source_code = driver.page_source
-    driver.quit()
-    return source_code
+    try:
+        with timed(timings, "render"):
+            return load_page(driver, url, wait_until, wait_timeout)
+    finally:
+        with timed(timings, "driver"):
+            driver.quit()
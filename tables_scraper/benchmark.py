@@ -0,0 +1,203 @@
+"""
+offline benchmark of the tables_scraper pipeline
+
+generates HTML corpora (small, large and many-tables pages), serves them from a local HTTP server,
+and reports for each scenario: the throughput, the p50/p99 latency, the mean time of each stage and the peak RSS.
+each scenario runs in a fresh process, so its peak RSS is not affected by the other scenarios.
+
+usage:
+    python benchmark.py                                 # run all scenarios
+    python benchmark.py --pages 100 --save base.json    # save the results
+    python benchmark.py --compare base.json             # exit with code 1 if a scenario regressed
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from math import ceil
+from multiprocessing import get_context
+from statistics import mean
+from threading import Thread
+from time import perf_counter
+
+#corpus name -> (tables per page, rows per table)
+CORPORA = {
+    "small": (1, 20),
+    "large": (1, 5000),
+    "many_tables": (200, 10),
+}
+SCENARIOS = ("static", "fetcher", "scrape_many", "lazy_first_table")
+
+
+def generate_page(tables:int, rows:int, rng:random.Random) -> str:
+    """return the HTML of a page containing `tables` tables of `rows` rows"""
+    parts = ["<html><head><title>benchmark</title></head><body>"]
+    for t in range(tables):
+        parts.append(f'<h2>Table {t}</h2><table class="data" id="table-{t}"><thead><tr><th>Rank</th><th>Name</th><th>Value</th><th>Share</th><th>Date</th></tr></thead><tbody>')
+        for r in range(rows):
+            parts.append(
+                f"<tr><td>{r + 1}</td><td>item {rng.randrange(10 ** 6)}</td><td>{rng.uniform(0, 10 ** 7):,.2f}</td>"
+                f"<td>{rng.uniform(0, 100):.1f}%</td><td>2022-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}</td></tr>"
+            )
+        parts.append("</tbody></table>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def generate_corpora(directory:str, seed:int=0) -> None:
+    """write one page per corpus in the directory (same seed -> same pages)"""
+    rng = random.Random(seed)
+    for name, (tables, rows) in CORPORA.items():
+        with open(os.path.join(directory, f"{name}.html"), "w", encoding="utf-8") as f:
+            f.write(generate_page(tables, rows, rng))
+
+
+def serve(directory:str) -> ThreadingHTTPServer:
+    """serve the directory on a free local port (in a background thread)"""
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        #send the charset like most servers do, the pages are then parsed from decoded strings
+        extensions_map = {**SimpleHTTPRequestHandler.extensions_map, ".html": "text/html; charset=utf-8"}
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss() -> "int|None":
+    """peak resident memory of the current process in bytes (None if not supported, e.g on Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values:list, p:float) -> float:
+    """the p-th percentile (nearest rank) of the values"""
+    ordered = sorted(values)
+    return ordered[max(0, ceil(p / 100 * len(ordered)) - 1)]
+
+
+def run_scenario(scenario:str, corpus:str, base_url:str, pages:int) -> dict:
+    """run the scenario in the current process and return its results"""
+    from tables_scraper import TablesScraper, HttpFetcher
+
+    #a unique query per request, so no page is served from the fetcher memory (304)
+    urls = [f"{base_url}/{corpus}.html?page={i}" for i in range(pages)]
+    latencies, stages, failures = [], {}, 0
+
+    def record(response) -> None:
+        nonlocal failures
+        if not response.succeed:
+            failures += 1
+        latencies.append(response.timings["total"])
+        for stage, seconds in response.timings.items():
+            stages.setdefault(stage, []).append(seconds)
+
+    start = perf_counter()
+    if scenario == "static":
+        for url in urls:
+            record(TablesScraper.scrape_static_page(url))
+    elif scenario == "fetcher":
+        with HttpFetcher() as fetcher:
+            for url in urls:
+                record(TablesScraper.scrape_static_page(url, fetcher=fetcher))
+    elif scenario == "scrape_many":
+        for response in TablesScraper.scrape_many(urls, max_workers=8, max_per_host=8):
+            record(response)
+    elif scenario == "lazy_first_table":
+        with HttpFetcher() as fetcher:
+            for url in urls:
+                page_start = perf_counter()
+                next(TablesScraper.iter_static_page(url, max_tables=1, fetcher=fetcher), None)
+                latencies.append(perf_counter() - page_start)
+    elapsed = perf_counter() - start
+
+    return {
+        "pages": pages,
+        "failures": failures,
+        "throughput": pages / elapsed,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "stages": {stage: mean(seconds) for stage, seconds in stages.items()},
+        "peak_rss": peak_rss(),
+    }
+
+
+def compare(results:dict, baseline:dict, tolerance:float) -> list:
+    """return the regressions of results against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if result["p50"] > base["p50"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {base['p50'] * 1000:.1f} ms -> {result['p50'] * 1000:.1f} ms")
+        if result["p99"] > base["p99"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {base['p99'] * 1000:.1f} ms -> {result['p99'] * 1000:.1f} ms")
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput']:.1f} -> {result['throughput']:.1f} pages/s")
+        if result["peak_rss"] and base.get("peak_rss") and result["peak_rss"] > base["peak_rss"] * (1 + tolerance):
+            regressions.append(f"{name}: peak RSS {base['peak_rss'] / 2 ** 20:.0f} MB -> {result['peak_rss'] / 2 ** 20:.0f} MB")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="offline benchmark of the tables_scraper pipeline")
+    parser.add_argument("--pages", type=int, default=50, help="pages scraped per scenario (default: 50)")
+    parser.add_argument("--corpus", choices=CORPORA, action="append", help="corpus to run (default: all)")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append", help="scenario to run (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated pages (default: 0)")
+    parser.add_argument("--save", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with this JSON file (exit code 1 on regression)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="accepted slowdown ratio when comparing (default: 0.2)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        generate_corpora(directory, args.seed)
+        server = serve(directory)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            for corpus in args.corpus or CORPORA:
+                for scenario in args.scenario or SCENARIOS:
+                    #a fresh process per scenario to measure its own peak RSS
+                    with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+                        result = executor.submit(run_scenario, scenario, corpus, base_url, args.pages).result()
+                    name = f"{corpus}/{scenario}"
+                    results[name] = result
+                    rss = f"{result['peak_rss'] / 2 ** 20:.0f} MB" if result["peak_rss"] else "n/a"
+                    stages = ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in result["stages"].items() if stage != "total")
+                    print(
+                        f"{name:<30} {result['throughput']:8.1f} pages/s  p50={result['p50'] * 1000:8.1f} ms  "
+                        f"p99={result['p99'] * 1000:8.1f} ms  peak RSS={rss:>7}  failures={result['failures']}  {stages}"
+                    )
+        finally:
+            server.shutdown()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,69 +1,569 @@
-from pandas import DataFrame
-from _tables_scraper import extract_tables, get_js_driven_source_code
-from dataclasses import dataclass
+import asyncio
+import os
+from _tables_scraper import extract_tables, iter_tables, parse_pool, retire_parse_pool, preload_parser, get_js_driven_source_code, looks_like_js_shell, timed, http_error_message, tables_ready, selector_ready, dom_stable, USER_AGENT
+from _driver_pool import DriverPool
+from _fetcher import HttpFetcher
+from _cache import TablesCache, hash_source
+from _strategy import StrategyMemory
+from _normalize import normalize_tables
+from dataclasses import dataclass, field
+from contextlib import nullcontext, ExitStack
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Executor, as_completed, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from threading import BoundedSemaphore
+from urllib.parse import urlsplit
+from time import monotonic, perf_counter
+from collections.abc import AsyncIterator
+from importlib.util import find_spec
+from typing import TYPE_CHECKING
+from _lazy import LazyModule
+
+#loaded on first use (see LazyModule), aiohttp is optional, it is only required by AsyncTablesScraper
+aiohttp = LazyModule("aiohttp")
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+#scrape_many() parses in the processes by default from this number of urls
+_MIN_URLS_PER_PARSE_POOL = 16
 
 @dataclass
 class TablesScraperResponse:
     """the response of each method in TableScraper"""
     succeed:bool
     msg:str
-    tables:list[DataFrame]
+    tables:"list[DataFrame]"
+    url:str = ""
+    #cache counters, whether this page was served from the cache ("hit") and whether it was not modified ("revalidated", 304), None if no cache is used
+    cache_info:"dict|None" = None
+    #seconds spent in each stage: "wait" (host limit), "fetch", "driver", "render", "cache", "parse" (HTML parsing + DataFrames construction) and "total"
+    timings:dict = field(default_factory=dict)
+
+    def normalize(self, min_valid:float=0.9, dates:bool=True, category_ratio:float=0.5, downcast:bool=False, arrow:bool=False) -> list[dict]:
+        """
+        convert the text columns of the tables to proper dtypes (numbers, percentages, currencies, dates, categories) and flatten the MultiIndex columns,
+        the tables are replaced by the normalized ones, returns the memory report of each table (see normalize_tables() for the params)
+        """
+        self.tables, report = normalize_tables(self.tables, min_valid, dates, category_ratio, downcast, arrow)
+        return report
 
 
 class TablesScraper:
-    
+    #optional function called with (method name, response) after each scrape, e.g. to export the timings to a metrics system,
+    #a scrape is reported once, by the method called (auto_scrape_tables() does not report its static and dynamic attempts)
+    metrics_hook:"Callable[[str, TablesScraperResponse], None]|None" = None
+
     @staticmethod
-    def scrape_static_page(url:str, visible_only:bool=True) -> TablesScraperResponse:
+    def scrape_static_page(url:str, visible_only:bool=True, fetcher:"HttpFetcher|None"=None, cache:"TablesCache|None"=None) -> TablesScraperResponse:
         """
         scrape tables from a static web page
 
         Params:
             - url: web page url
             - visible_only [True by default]: True to scrape only visible tables, False otherwise
+            - fetcher [None by default]: an HttpFetcher to download the page with (kept-alive connections, compression, retries),
+                scraping again an unchanged page costs a 304 response and no parsing
+            - cache [None by default]: a TablesCache, the tables of an unchanged page are loaded from it instead of parsing the page
         """
+        if fetcher is not None or cache is not None:
+            with nullcontext(fetcher) if fetcher is not None else HttpFetcher() as page_fetcher:
+                return TablesScraper._report("scrape_static_page", TablesScraper._scrape_static(url, visible_only, page_fetcher, cache)[0])
+
+        start, timings = perf_counter(), {}
         try:
-            result = extract_tables(url, visible_only)
+            result = extract_tables(url, visible_only, timings)
             msg = "Done" if len(result) else "No Tables are found"
-            return TablesScraperResponse(True, msg, result)
+            response = TablesScraperResponse(True, msg, result, url, timings=timings)
         except Exception as e:
-            return TablesScraperResponse(False, e, [])
+            response = TablesScraperResponse(False, e, [], url, timings=timings)
+        return TablesScraper._report("scrape_static_page", response, start)
 
 
     @staticmethod
-    def scrape_dynamic_page(url:str, driver_path:str, visible_only:bool=True, show_browser:bool=False) -> TablesScraperResponse:
+    def scrape_dynamic_page(url:str, driver_path:str, visible_only:bool=True, show_browser:bool=False, driver_pool:"DriverPool|None"=None, wait_until:"Callable|None"=None, wait_timeout:float=10, block_resources:Iterable[str]=(), cache:"TablesCache|None"=None) -> TablesScraperResponse:
         """
         scrape tables from a dynamic web page
 
         Params:
             - url: web page url
-            - driver_path: path to the chrome driver (.exe)
+            - driver_path: path to the chrome driver (.exe), ignored if driver_pool is given
             - visible_only [True by default]: True to scrape only visible tables, False otherwise
             - show_browser [False by default]: True to show the chrome browser, False to hide it.
+            - driver_pool [None by default]: a DriverPool to borrow a running driver from, instead of launching a new browser
+            - wait_until [None by default]: a readiness condition, tables_ready(n), selector_ready(css), dom_stable(ms) or any function(driver) -> bool,
+                the page is scraped as soon as it returns True
+            - wait_timeout [10 by default]: maximum seconds to load the page and wait for wait_until
+            - block_resources [nothing by default]: resources types to block (images are always blocked), any of: "fonts", "css", "media", "third_party_scripts",
+                ignored if driver_pool is given (set it on the pool instead)
+            - cache [None by default]: a TablesCache, the tables of an unchanged page are loaded from it instead of parsing the page
+        """
+        response = TablesScraper._scrape_dynamic(url, driver_path, visible_only, show_browser, driver_pool, wait_until, wait_timeout, block_resources, cache)
+        return TablesScraper._report("scrape_dynamic_page", response)
+
+
+    @staticmethod
+    def auto_scrape_tables(url:str, driver_path:str, visible_only:bool=True, show_browser:bool=False, driver_pool:"DriverPool|None"=None, wait_until:"Callable|None"=None, wait_timeout:float=10, block_resources:Iterable[str]=(), fetcher:"HttpFetcher|None"=None, cache:"TablesCache|None"=None, strategy_memory:"StrategyMemory|None"=None) -> TablesScraperResponse:
         """
+        try to scrape the web page using scrape_static_page(), if that fails, finds no tables or gets a JavaScript shell page, it will use scrape_dynamic_page().
+        with a strategy_memory, the domains that need the browser skip the static attempt,
+        and the domains where the browser finds no more tables skip the fallback on empty results
+        
+        Params:
+            - url: web page url
+            - driver_path: path to the chrome driver (.exe), ignored if driver_pool is given
+            - visible_only [True by default]: True to scrape only visible tables, False otherwise
+            - show_browser [False by default]: True to show the chrome browser, False to hide it.
+            - driver_pool [None by default]: a DriverPool to borrow a running driver from, instead of launching a new browser
+            - wait_until [None by default]: a readiness condition, tables_ready(n), selector_ready(css), dom_stable(ms) or any function(driver) -> bool,
+                the page is scraped as soon as it returns True
+            - wait_timeout [10 by default]: maximum seconds to load the page and wait for wait_until
+            - block_resources [nothing by default]: resources types to block (images are always blocked), any of: "fonts", "css", "media", "third_party_scripts",
+                ignored if driver_pool is given (set it on the pool instead)
+            - fetcher [None by default]: an HttpFetcher to download the page with (see scrape_static_page())
+            - cache [None by default]: a TablesCache, the tables of an unchanged page are loaded from it instead of parsing the page
+            - strategy_memory [None by default]: a StrategyMemory remembering the strategy that worked for each domain
+        """
+        start = perf_counter()
+        strategy = strategy_memory.choose(url) if strategy_memory is not None else "static"
+        static_response = None
+        with nullcontext(fetcher) if fetcher is not None else HttpFetcher() as page_fetcher:
+            if strategy == "static":
+                static_response, source = TablesScraper._scrape_static(url, visible_only, page_fetcher, cache)
+                fallback = TablesScraper._needs_fallback(url, static_response, source, strategy_memory)
+                if strategy_memory is not None:
+                    strategy_memory.record(url, "static", static_response.timings["total"], not fallback)
+                #if 'scrape_static_page' succeed
+                if not fallback:
+                    return TablesScraper._report("auto_scrape_tables", static_response, start)
+
+            response = TablesScraper._scrape_dynamic(url, driver_path, visible_only, show_browser, driver_pool, wait_until, wait_timeout, block_resources, cache)
+            worked = response.succeed and len(response.tables) > 0
+            if strategy_memory is not None:
+                strategy_memory.record(url, "dynamic", response.timings["total"], worked, failed=not response.succeed)
+            #the browser was chosen first and did not work: try the static strategy
+            if not worked and static_response is None:
+                static_response, _ = TablesScraper._scrape_static(url, visible_only, page_fetcher, cache)
+                if strategy_memory is not None:
+                    strategy_memory.record(url, "static", static_response.timings["total"], static_response.succeed and len(static_response.tables) > 0)
+
+        #keep the static response if the browser did not do better
+        final, other, prefix = response, static_response, "static_"
+        if not worked and static_response.succeed:
+            final, other, prefix = static_response, response, "dynamic_"
+        #return the response with the timings of the other attempt
+        if other is not None:
+            final.timings = {**{f"{prefix}{stage}": seconds for stage, seconds in other.timings.items()}, **final.timings}
+        return TablesScraper._report("auto_scrape_tables", final, start)
+
+
+    @staticmethod
+    def iter_static_page(url:str, visible_only:bool=True, match:"str|None"=None, index:"int|Iterable[int]|None"=None, attrs:"dict|None"=None, min_rows:int=0, min_cols:int=0, max_tables:"int|None"=None, fetcher:"HttpFetcher|None"=None) -> "Iterator[DataFrame]":
+        """
+        yield the tables of a static web page one by one, only the tables matching the selectors are built (useful for huge pages),
+        it will raise an Exception if the page cannot be downloaded
+
+        Params:
+            - url: web page url
+            - visible_only [True by default]: True to scrape only visible tables, False otherwise
+            - match [None by default]: a regex, only the tables containing a text matching it are scraped
+            - index [None by default]: the position(s) of the needed tables in the tables list of scrape_static_page()
+            - attrs [None by default]: the attributes of the needed tables e.g {"id": "prices"} or {"class": "wikitable sortable"} (exact values)
+            - min_rows [0 by default]: minimum number of rows (header rows included)
+            - min_cols [0 by default]: minimum number of columns
+            - max_tables [None by default]: stop after scraping max_tables tables
+            - fetcher [None by default]: the HttpFetcher used to download the page (a new one is used by default)
+        """
+        with nullcontext(fetcher) if fetcher is not None else HttpFetcher() as page_fetcher:
+            source = page_fetcher.fetch(url).source
+        yield from iter_tables(source, visible_only, match, index, attrs, min_rows, min_cols, max_tables)
+
+
+    @staticmethod
+    def scrape_many(urls:Iterable[str], max_workers:int=16, visible_only:bool=True, timeout:float=30, max_per_host:int=4, parse_workers:"int|None"=None, fetcher:"HttpFetcher|None"=None, cache:"TablesCache|None"=None) -> Iterator[TablesScraperResponse]:
+        """
+        scrape tables from many static web pages concurrently,
+        the downloads run in a pool of threads and the HTML parsing runs in a pool of processes (shared by the calls, see parse_workers).
+        responses are yielded as soon as they are ready (NOT in the order of urls), use response.url to match them.
+
+        Params:
+            - urls: web pages urls
+            - max_workers [16 by default]: maximum number of pages downloaded at the same time
+            - visible_only [True by default]: True to scrape only visible tables, False otherwise
+            - timeout [30 by default]: maximum seconds spent on a single url (download + parse)
+            - max_per_host [4 by default]: maximum number of pages downloaded at the same time from the same host
+            - parse_workers [None by default]: number of parsing processes (0: parse in the downloading threads),
+                None: the number of CPUs, or 0 on a single CPU or for less than 16 urls (starting the processes costs more than they save)
+            - fetcher [None by default]: the HttpFetcher used to download the pages (a new one is used by default)
+            - cache [None by default]: a TablesCache, the tables of unchanged pages are loaded from it instead of parsing the pages
+
+        * on Windows/macOS the calling script must be guarded by `if __name__ == "__main__":` (required by the processes pool)
+        """
+        urls = list(urls)
+        #one limit per host, created before starting the workers
+        hosts_limits = {}
+        for url in urls:
+            host = urlsplit(url).netloc.lower()
+            if host not in hosts_limits:
+                hosts_limits[host] = BoundedSemaphore(max_per_host)
+
+        if parse_workers is None:
+            cpus = os.cpu_count() or 1
+            parse_workers = cpus if cpus > 1 and len(urls) >= _MIN_URLS_PER_PARSE_POOL else 0
+
+        own_fetcher = fetcher is None
+        if own_fetcher:
+            fetcher = HttpFetcher(timeout=timeout, max_idle_per_host=max_per_host)
+        try:
+            with ThreadPoolExecutor(max_workers) as fetchers:
+                futures = [
+                    fetchers.submit(TablesScraper._scrape_one, url, visible_only, timeout, hosts_limits[urlsplit(url).netloc.lower()], parse_workers, fetcher, cache)
+                    for url in urls
+                ]
+                try:
+                    for future in as_completed(futures):
+                        yield TablesScraper._report("scrape_many", future.result())
+                #the caller stopped iterating (or an error occurred): drop the pending urls
+                finally:
+                    for future in futures:
+                        future.cancel()
+        finally:
+            if own_fetcher:
+                fetcher.close()
+
+
+    @staticmethod
+    def _scrape_static(url:str, visible_only:bool, fetcher:HttpFetcher, cache:"TablesCache|None") -> tuple:
+        """
+        scrape_static_page() with a fetcher (not reported), returns (response, source code or None if not available)
+        """
+        start, timings, source = perf_counter(), {}, None
+        try:
+            result, cache_hit, source = TablesScraper._fetch_and_extract(url, visible_only, fetcher, cache, timings=timings)
+            msg = "Done" if len(result) else "No Tables are found"
+            response = TablesScraperResponse(True, msg, result, url, TablesScraper._cache_info(cache, cache_hit, source is None), timings)
+        except Exception as e:
+            response = TablesScraperResponse(False, e, [], url, timings=timings)
+        timings["total"] = perf_counter() - start
+        return response, source
+
+
+    @staticmethod
+    def _scrape_dynamic(url:str, driver_path:str, visible_only:bool, show_browser:bool, driver_pool:"DriverPool|None", wait_until:"Callable|None", wait_timeout:float, block_resources:Iterable[str], cache:"TablesCache|None") -> TablesScraperResponse:
+        """
+        scrape_dynamic_page() (not reported)
+        """
+        start, timings = perf_counter(), {}
         #get source code
         try:
-            source = get_js_driven_source_code(url, driver_path, show_browser)
-            result = extract_tables(source, visible_only)
+            source = get_js_driven_source_code(url, driver_path, show_browser, driver_pool, wait_until, wait_timeout, block_resources, timings)
+            result, cache_hit = TablesScraper._extract_cached(url, source, visible_only, cache, timings=timings)
             msg = "Done" if len(result) else "No Tables are found"
-            return TablesScraperResponse(True, msg, result)
+            response = TablesScraperResponse(True, msg, result, url, TablesScraper._cache_info(cache, cache_hit), timings)
         except Exception as e:
-            return TablesScraperResponse(False, e, [])
+            response = TablesScraperResponse(False, e, [], url, timings=timings)
+        timings["total"] = perf_counter() - start
+        return response
 
 
     @staticmethod
-    def auto_scrape_tables(url:str, driver_path:str, visible_only:bool=True, show_browser:bool=False) -> TablesScraperResponse:
+    def _needs_fallback(url:str, response:TablesScraperResponse, source:"str|bytes|None", strategy_memory:"StrategyMemory|None") -> bool:
+        """
+        True if the static response must fall back to the browser: it failed, or it found no tables and the page is a JavaScript shell,
+        or it found no tables (unless the strategy memory knows that the browser does not find more tables on this domain)
+        """
+        if not response.succeed:
+            return True
+        if response.tables:
+            return False
+        if source is not None and looks_like_js_shell(source):
+            return True
+        return strategy_memory is None or not strategy_memory.accept_empty(url)
+
+
+    @staticmethod
+    def _scrape_one(url:str, visible_only:bool, timeout:float, host_limit:BoundedSemaphore, parse_workers:int, fetcher:HttpFetcher, cache:"TablesCache|None") -> TablesScraperResponse:
+        """
+        download and parse a single page for scrape_many() (in the shared parsing processes if parse_workers)
+        """
+        start, timings = perf_counter(), {}
+        try:
+            parsers = parse_pool(parse_workers) if parse_workers else None
+            result, cache_hit, source = TablesScraper._fetch_and_extract(url, visible_only, fetcher, cache, host_limit, parsers, timeout, timings)
+            msg = "Done" if len(result) else "No Tables are found"
+            response = TablesScraperResponse(True, msg, result, url, TablesScraper._cache_info(cache, cache_hit, source is None), timings)
+        except Exception as e:
+            response = TablesScraperResponse(False, e, [], url, timings=timings)
+        timings["total"] = perf_counter() - start
+        return response
+
+
+    @staticmethod
+    def _fetch_and_extract(url:str, visible_only:bool, fetcher:HttpFetcher, cache:"TablesCache|None"=None, host_limit:"BoundedSemaphore|None"=None, parsers:"Executor|None"=None, timeout:"float|None"=None, timings:"dict|None"=None) -> tuple:
+        """
+        download the page with the fetcher and extract its tables, returns (tables, cache hit or None if no cache, source or None if not modified),
+        the tables of unchanged pages (304 response) are taken from the fetcher memory instead of being parsed again (not a cache hit).
+        the timeout (download + parse) starts once the host limit is acquired
+        """
+        key = (url, visible_only)
+        known_tables = fetcher.remembered(key)
+        with ExitStack() as limit:
+            if host_limit is not None:
+                with timed(timings, "wait"):
+                    limit.enter_context(host_limit)
+            deadline = None if timeout is None else monotonic() + timeout
+            with timed(timings, "fetch"):
+                page = fetcher.fetch(url, conditional=known_tables is not None)
+        if page.not_modified:
+            return [table.copy() for table in known_tables], None if cache is None else False, None
+
+        result, cache_hit = TablesScraper._extract_cached(url, page.source, visible_only, cache, parsers, deadline, timings)
+        #remember a copy, the caller may modify the returned tables
+        fetcher.remember(key, [table.copy() for table in result])
+        return result, cache_hit, page.source
+
+
+    @staticmethod
+    def _extract_cached(url:str, source:"str|bytes", visible_only:bool, cache:"TablesCache|None"=None, parsers:"Executor|None"=None, deadline:"float|None"=None, timings:"dict|None"=None) -> tuple:
+        """
+        extract the tables of the source code, returns (tables, cache hit or None if no cache),
+        the tables are loaded from the cache if the source code did not change, otherwise the source is parsed (in parsers if given)
+        """
+        if cache is not None:
+            with timed(timings, "cache"):
+                source_hash = hash_source(source)
+                cached = cache.get(url, visible_only, source_hash)
+            if cached is not None:
+                return cached, True
+
+        if parsers is None:
+            result = extract_tables(source, visible_only, timings)
+        else:
+            with timed(timings, "parse"):
+                parsing = parsers.submit(extract_tables, source, visible_only)
+                try:
+                    result = parsing.result(timeout=None if deadline is None else max(0, deadline - monotonic()))
+                except FutureTimeoutError:
+                    #a running parse cannot be stopped, the next pages are parsed by new processes instead of waiting for it
+                    if not parsing.cancel():
+                        retire_parse_pool(parsers)
+                    raise Exception("Time Out")
+                except BrokenProcessPool:
+                    retire_parse_pool(parsers)
+                    raise Exception("The parsing process crashed")
+
+        if cache is None:
+            return result, None
+        with timed(timings, "cache"):
+            cache.put(url, visible_only, source_hash, result)
+        return result, False
+
+
+    @staticmethod
+    def _cache_info(cache:"TablesCache|None", cache_hit:"bool|None", revalidated:bool=False) -> "dict|None":
+        """the cache_info of the response, revalidated: the page was not modified (304), its tables were reused without reading the cache"""
+        if cache is None:
+            return None
+        return {"hit": bool(cache_hit), "revalidated": revalidated, **cache.stats}
+
+
+    @staticmethod
+    def _report(method:str, response:TablesScraperResponse, start:"float|None"=None) -> TablesScraperResponse:
+        """set the total time of the response (if start is given) and pass it to the metrics hook (the hook errors are ignored)"""
+        if start is not None:
+            response.timings["total"] = perf_counter() - start
+        if TablesScraper.metrics_hook is not None:
+            try:
+                TablesScraper.metrics_hook(method, response)
+            except Exception:
+                pass
+        return response
+
+
+
+class AsyncTablesScraper:
+    """
+    asyncio counterpart of TablesScraper: the pages are downloaded with a non-blocking HTTP client (aiohttp),
+    the HTML parsing runs in a pool of processes and the browsers (dynamic pages) run in threads, so the event loop is never blocked.
+    cancelling a call cancels its download, timeouts return a failed response ("Time Out").
+
+    usage:
+        async with AsyncTablesScraper(max_concurrency=500) as scraper:
+            response = await scraper.scrape_static_page(url)
+            async for response in scraper.scrape_many(urls):
+                ...
+    """
+
+    def __init__(self, max_concurrency:int=100, max_per_host:int=6, timeout:float=30, parse_workers:"int|None"=None, headers:"dict|None"=None) -> None:
         """
-        try to scrape the web page using scrape_static_page(), if that fails, it will use scrape_dynamic_page()
-        
+        Params:
+            - max_concurrency [100 by default]: maximum number of pages scraped at the same time
+            - max_per_host [6 by default]: maximum number of connections to the same host
+            - timeout [30 by default]: maximum seconds spent on a single url (download + parse)
+            - parse_workers [None by default]: number of parsing processes (None: number of CPUs, 0: parse in the default threads pool)
+            - headers [None by default]: extra request headers
+        """
+        if find_spec("aiohttp") is None:
+            raise Exception("aiohttp is required by AsyncTablesScraper (pip install aiohttp)")
+        self._max_concurrency = max_concurrency
+        self._max_per_host = max_per_host
+        self._timeout = timeout
+        self._parse_workers = parse_workers
+        self._headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        self._session:"aiohttp.ClientSession|None" = None
+        self._parsers:"ProcessPoolExecutor|None" = None
+        self._semaphore:"asyncio.Semaphore|None" = None
+
+    async def __aenter__(self) -> "AsyncTablesScraper":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """open the HTTP session and start the parsing processes (called by `async with`)"""
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self._max_concurrency, limit_per_host=self._max_per_host),
+            headers=self._headers,
+        )
+        self._parsers = ProcessPoolExecutor(self._parse_workers, initializer=preload_parser) if self._parse_workers != 0 else None
+
+    async def close(self) -> None:
+        """close the HTTP session and stop the parsing processes"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._parsers is not None:
+            self._parsers.shutdown(wait=False, cancel_futures=True)
+            self._parsers = None
+
+    async def scrape_static_page(self, url:str, visible_only:bool=True, cache:"TablesCache|None"=None) -> TablesScraperResponse:
+        """
+        scrape tables from a static web page
+
         Params:
             - url: web page url
-            - driver_path: path to the chrome driver (.exe)
             - visible_only [True by default]: True to scrape only visible tables, False otherwise
-            - show_browser [False by default]: True to show the chrome browser, False to hide it.
+            - cache [None by default]: a TablesCache, the tables of an unchanged page are loaded from it instead of parsing the page
+        """
+        return TablesScraper._report("async_scrape_static_page", (await self._scrape_static(url, visible_only, cache))[0])
+
+    async def scrape_dynamic_page(self, url:str, driver_path:str, visible_only:bool=True, show_browser:bool=False, driver_pool:"DriverPool|None"=None, wait_until:"Callable|None"=None, wait_timeout:float=10, block_resources:Iterable[str]=(), cache:"TablesCache|None"=None) -> TablesScraperResponse:
+        """
+        scrape tables from a dynamic web page, the browser runs in a thread (use a DriverPool to bound the number of browsers),
+        see TablesScraper.scrape_dynamic_page() for the params
+        """
+        response = await self._scrape_dynamic(url, driver_path, visible_only, show_browser, driver_pool, wait_until, wait_timeout, block_resources, cache)
+        return TablesScraper._report("async_scrape_dynamic_page", response)
+
+    async def auto_scrape_tables(self, url:str, driver_path:str, visible_only:bool=True, show_browser:bool=False, driver_pool:"DriverPool|None"=None, wait_until:"Callable|None"=None, wait_timeout:float=10, block_resources:Iterable[str]=(), cache:"TablesCache|None"=None, strategy_memory:"StrategyMemory|None"=None) -> TablesScraperResponse:
+        """
+        try to scrape the web page using scrape_static_page(), if that fails, finds no tables or gets a JavaScript shell page, it will use scrape_dynamic_page(),
+        see TablesScraper.auto_scrape_tables() for the params
+        """
+        start = perf_counter()
+        strategy = strategy_memory.choose(url) if strategy_memory is not None else "static"
+        static_response = None
+        if strategy == "static":
+            static_response, source = await self._scrape_static(url, visible_only, cache)
+            fallback = TablesScraper._needs_fallback(url, static_response, source, strategy_memory)
+            if strategy_memory is not None:
+                strategy_memory.record(url, "static", static_response.timings["total"], not fallback)
+            if not fallback:
+                return TablesScraper._report("async_auto_scrape_tables", static_response, start)
+
+        response = await self._scrape_dynamic(url, driver_path, visible_only, show_browser, driver_pool, wait_until, wait_timeout, block_resources, cache)
+        worked = response.succeed and len(response.tables) > 0
+        if strategy_memory is not None:
+            strategy_memory.record(url, "dynamic", response.timings["total"], worked, failed=not response.succeed)
+        #the browser was chosen first and did not work: try the static strategy
+        if not worked and static_response is None:
+            static_response, _ = await self._scrape_static(url, visible_only, cache)
+            if strategy_memory is not None:
+                strategy_memory.record(url, "static", static_response.timings["total"], static_response.succeed and len(static_response.tables) > 0)
+
+        #keep the static response if the browser did not do better
+        final, other, prefix = response, static_response, "static_"
+        if not worked and static_response.succeed:
+            final, other, prefix = static_response, response, "dynamic_"
+        if other is not None:
+            final.timings = {**{f"{prefix}{stage}": seconds for stage, seconds in other.timings.items()}, **final.timings}
+        return TablesScraper._report("async_auto_scrape_tables", final, start)
+
+    async def scrape_many(self, urls:Iterable[str], visible_only:bool=True, cache:"TablesCache|None"=None) -> AsyncIterator[TablesScraperResponse]:
+        """
+        scrape tables from many static web pages concurrently (at most max_concurrency at the same time),
+        responses are yielded as soon as they are ready (NOT in the order of urls), use response.url to match them
+
+        Params:
+            - urls: web pages urls
+            - visible_only [True by default]: True to scrape only visible tables, False otherwise
+            - cache [None by default]: a TablesCache, the tables of unchanged pages are loaded from it instead of parsing the pages
         """
-        response = TablesScraper.scrape_static_page(url, visible_only)
-        #if 'scrape_static_page' succeed
-        if response.succeed:
-            return response
-        #return the response of 'scrape_dynamic_page'
-        return TablesScraper.scrape_dynamic_page(url, driver_path, visible_only, show_browser)
\ No newline at end of file
+        tasks = [asyncio.ensure_future(self.scrape_static_page(url, visible_only, cache)) for url in urls]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        #the caller stopped iterating (or was cancelled): cancel the pending urls
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _scrape_static(self, url:str, visible_only:bool, cache:"TablesCache|None") -> tuple:
+        """scrape_static_page() (not reported), returns (response, source code or None if not downloaded)"""
+        if self._session is None:
+            raise Exception("AsyncTablesScraper is not started, use `async with AsyncTablesScraper() as scraper:`")
+        start, timings, source = perf_counter(), {}, None
+        #the timeout starts once the page is allowed to run
+        with timed(timings, "wait"):
+            await self._semaphore.acquire()
+        try:
+            result, cache_hit, source = await asyncio.wait_for(self._scrape(url, visible_only, cache, timings), self._timeout)
+            msg = "Done" if len(result) else "No Tables are found"
+            response = TablesScraperResponse(True, msg, result, url, TablesScraper._cache_info(cache, cache_hit), timings)
+        except asyncio.TimeoutError:
+            response = TablesScraperResponse(False, Exception("Time Out"), [], url, timings=timings)
+        except Exception as e:
+            response = TablesScraperResponse(False, e, [], url, timings=timings)
+        finally:
+            self._semaphore.release()
+        timings["total"] = perf_counter() - start
+        return response, source
+
+    async def _scrape_dynamic(self, url:str, driver_path:str, visible_only:bool, show_browser:bool, driver_pool:"DriverPool|None", wait_until:"Callable|None", wait_timeout:float, block_resources:Iterable[str], cache:"TablesCache|None") -> TablesScraperResponse:
+        """scrape_dynamic_page() (not reported), the browser runs in a thread"""
+        return await asyncio.to_thread(
+            TablesScraper._scrape_dynamic, url, driver_path, visible_only, show_browser, driver_pool, wait_until, wait_timeout, block_resources, cache
+        )
+
+    async def _scrape(self, url:str, visible_only:bool, cache:"TablesCache|None", timings:dict) -> tuple:
+        """download the page and extract its tables, returns (tables, cache hit or None if no cache, source code)"""
+        loop = asyncio.get_running_loop()
+        with timed(timings, "fetch"):
+            source = await self._fetch(url)
+        if cache is not None:
+            with timed(timings, "cache"):
+                source_hash = hash_source(source)
+                cached = await asyncio.to_thread(cache.get, url, visible_only, source_hash)
+            if cached is not None:
+                return cached, True, source
+        with timed(timings, "parse"):
+            result = await loop.run_in_executor(self._parsers, extract_tables, source, visible_only)
+        if cache is None:
+            return result, None, source
+        with timed(timings, "cache"):
+            await asyncio.to_thread(cache.put, url, visible_only, source_hash, result)
+        return result, False, source
+
+    async def _fetch(self, url:str) -> bytes:
+        """download the raw source code of the page"""
+        try:
+            async with self._session.get(url) as response:
+                if response.status >= 300:
+                    raise Exception(http_error_message(response.status))
+                return await response.read()
+        except aiohttp.InvalidURL:
+            raise Exception("Invalid URL")
+        except aiohttp.ClientError as e:
+            raise Exception(f"Connection Error: {e}")
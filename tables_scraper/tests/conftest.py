@@ -0,0 +1,95 @@
+import os
+import sys
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from urllib.request import urlopen
+import pytest
+
+#the modules are imported flat (from _fetcher import ...), like the main module does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TABLE_PAGE = """<html><head><meta charset="utf-8"><title>test</title></head><body>
+<table id="prices"><thead><tr><th>Name</th><th>Price</th></tr></thead>
+<tbody><tr><td>café</td><td>1,234.5</td></tr><tr><td>thé</td><td>12</td></tr></tbody></table>
+<table class="other"><tr><th>Key</th><th>Value</th></tr><tr><td>a</td><td>1</td></tr></table>
+</body></html>"""
+
+EMPTY_PAGE = "<html><body><p>no tables here</p></body></html>"
+
+#a JavaScript shell containing a small table (the static scrape finds it)
+SCRIPT_PAGE = """<html><head><script>var x = 1;</script></head><body>
+<table><tr><th>A</th><th>B</th></tr><tr><td>1</td><td>2</td></tr></table>
+</body></html>"""
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _serve(directory:str, charset:"str|None") -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {
+        "extensions_map": {**_Handler.extensions_map, ".html": "text/html" + (f"; charset={charset}" if charset else "")}
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=directory))
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(scope="session")
+def pages_dir(tmp_path_factory) -> str:
+    directory = tmp_path_factory.mktemp("pages")
+    for name, page in (("tables", TABLE_PAGE), ("empty", EMPTY_PAGE), ("script", SCRIPT_PAGE)):
+        (directory / f"{name}.html").write_text(page, encoding="utf-8")
+    return str(directory)
+
+
+@pytest.fixture(scope="session", params=[None, "utf-8"], ids=["no_charset", "charset"])
+def base_url(request, pages_dir) -> str:
+    """the url of a local http.server serving the test pages, without and with a charset in the Content-Type"""
+    server = _serve(pages_dir, request.param)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+class FakeDriver:
+    """a Chrome driver stand-in loading the pages with urllib (no JavaScript), records the loaded urls"""
+    loads:list = []
+
+    def __init__(self, fail:bool=False) -> None:
+        self.fail = fail
+        self.page_source = ""
+        self.title = "fake"
+        self.page_load_timeout = None
+
+    def set_page_load_timeout(self, seconds:float) -> None:
+        self.page_load_timeout = seconds
+
+    def get(self, url:str) -> None:
+        FakeDriver.loads.append(url)
+        if self.fail:
+            raise RuntimeError("chrome crashed")
+        with urlopen(url) as response:
+            self.page_source = response.read().decode("utf-8")
+
+    def quit(self) -> None:
+        pass
+
+
+@pytest.fixture
+def driver_pool():
+    """a DriverPool of FakeDrivers (FakeDriver.loads is reset)"""
+    from _driver_pool import DriverPool
+    FakeDriver.loads = []
+    with DriverPool(driver_factory=FakeDriver, size=1) as pool:
+        yield pool
+
+
+@pytest.fixture
+def failing_driver_pool():
+    """a DriverPool of FakeDrivers failing to load any page"""
+    from _driver_pool import DriverPool
+    FakeDriver.loads = []
+    with DriverPool(driver_factory=lambda: FakeDriver(fail=True), size=1) as pool:
+        yield pool
@@ -0,0 +1,31 @@
+import asyncio
+from tables_scraper import TablesScraper, AsyncTablesScraper
+from conftest import FakeDriver
+
+
+def test_async_scrape_many(base_url):
+    urls = [f"{base_url}/tables.html?page={i}" for i in range(5)] + [f"{base_url}/missing.html"]
+
+    async def main():
+        async with AsyncTablesScraper(parse_workers=0) as scraper:
+            return {response.url: response async for response in scraper.scrape_many(urls)}
+
+    responses = asyncio.run(main())
+    assert set(responses) == set(urls)
+    assert all(len(responses[url].tables) == 2 for url in urls[:-1])
+    assert not responses[urls[-1]].succeed
+
+
+def test_async_metrics_hook_reports_each_scrape_once(base_url, driver_pool, monkeypatch):
+    reports = []
+    monkeypatch.setattr(TablesScraper, "metrics_hook", lambda method, response: reports.append(method))
+
+    async def main():
+        async with AsyncTablesScraper(parse_workers=0) as scraper:
+            await scraper.auto_scrape_tables(f"{base_url}/empty.html", None, driver_pool=driver_pool)
+            await scraper.scrape_static_page(f"{base_url}/tables.html")
+            await scraper.scrape_dynamic_page(f"{base_url}/tables.html", None, driver_pool=driver_pool)
+
+    asyncio.run(main())
+    assert len(FakeDriver.loads) == 2
+    assert reports == ["async_auto_scrape_tables", "async_scrape_static_page", "async_scrape_dynamic_page"]
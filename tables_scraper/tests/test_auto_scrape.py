@@ -0,0 +1,65 @@
+from tables_scraper import TablesScraper, HttpFetcher
+from _strategy import StrategyMemory
+from conftest import FakeDriver
+
+
+def test_page_with_scripts_and_tables_does_not_launch_the_browser(base_url, driver_pool):
+    response = TablesScraper.auto_scrape_tables(f"{base_url}/script.html", None, driver_pool=driver_pool)
+
+    assert response.succeed
+    assert len(response.tables) == 1
+    assert FakeDriver.loads == []
+
+
+def test_empty_page_falls_back_to_the_browser(base_url, driver_pool):
+    response = TablesScraper.auto_scrape_tables(f"{base_url}/empty.html", None, driver_pool=driver_pool)
+
+    assert response.succeed
+    assert response.tables == []
+    assert FakeDriver.loads == [f"{base_url}/empty.html"]
+
+
+def test_browser_without_more_tables_marks_the_domain_useless(base_url, driver_pool):
+    memory = StrategyMemory(path=None, reprobe_every=3)
+    url = f"{base_url}/empty.html"
+    with HttpFetcher() as fetcher:
+        TablesScraper.auto_scrape_tables(url, None, driver_pool=driver_pool, fetcher=fetcher, strategy_memory=memory)
+        assert len(FakeDriver.loads) == 1
+        #the empty static results are accepted, the browser is probed again every 3 pages
+        for _ in range(3):
+            TablesScraper.auto_scrape_tables(url, None, driver_pool=driver_pool, fetcher=fetcher, strategy_memory=memory)
+    assert len(FakeDriver.loads) == 2
+    assert memory.stats["skipped_fallbacks"] == 2
+
+
+def test_failed_browser_does_not_mark_the_domain_useless(base_url, failing_driver_pool):
+    memory = StrategyMemory(path=None)
+    url = f"{base_url}/empty.html"
+    with HttpFetcher() as fetcher:
+        for _ in range(2):
+            response = TablesScraper.auto_scrape_tables(url, None, driver_pool=failing_driver_pool, fetcher=fetcher, strategy_memory=memory)
+            #the static response is kept
+            assert response.succeed
+    #the browser is tried again after its failure
+    assert len(FakeDriver.loads) == 2
+    assert memory.stats["skipped_fallbacks"] == 0
+
+
+def test_metrics_hook_reports_each_scrape_once(base_url, driver_pool, monkeypatch):
+    reports = []
+    monkeypatch.setattr(TablesScraper, "metrics_hook", lambda method, response: reports.append((method, response.url)))
+    url = f"{base_url}/empty.html"
+    with HttpFetcher() as fetcher:
+        TablesScraper.auto_scrape_tables(url, None, driver_pool=driver_pool, fetcher=fetcher)
+        TablesScraper.scrape_static_page(url, fetcher=fetcher)
+    TablesScraper.scrape_dynamic_page(url, None, driver_pool=driver_pool)
+
+    assert reports == [("auto_scrape_tables", url), ("scrape_static_page", url), ("scrape_dynamic_page", url)]
+
+
+def test_dynamic_page_load_is_bounded_by_wait_timeout(base_url, driver_pool):
+    response = TablesScraper.scrape_dynamic_page(f"{base_url}/tables.html", None, driver_pool=driver_pool, wait_timeout=3)
+
+    assert len(response.tables) == 2
+    with driver_pool.driver() as driver:
+        assert 0 < driver.page_load_timeout <= 3
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+import _cache
+from _cache import TablesCache, hash_source
+from _fetcher import HttpFetcher
+from tables_scraper import TablesScraper
+
+TABLE = pd.DataFrame({"Name": ["gold", "silver"], "Price": [1234.5, 12.0]})
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list:
+    """the time seen by the cache, now[0] is moved by the tests"""
+    now = [1000.0]
+    monkeypatch.setattr(_cache, "time", lambda: now[0])
+    return now
+
+
+def test_hits_and_misses_are_counted(tmp_path):
+    with TablesCache(str(tmp_path)) as cache:
+        assert cache.get("a", True, hash_source("v1")) is None
+        cache.put("a", True, hash_source("v1"), [TABLE])
+        (cached,) = cache.get("a", True, hash_source("v1"))
+        #another visible_only or a changed source is not the same entry
+        assert cache.get("a", False, hash_source("v1")) is None
+        assert cache.get("a", True, hash_source("v2")) is None
+        stats = cache.stats
+
+    assert cached.equals(TABLE)
+    assert (stats["hits"], stats["misses"], stats["expired"]) == (1, 3, 0)
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    with TablesCache(str(tmp_path), ttl=60) as cache:
+        cache.put("a", True, hash_source("v1"), [TABLE])
+        clock[0] += 59
+        assert cache.get("a", True, hash_source("v1")) is not None
+        clock[0] += 2
+        assert cache.get("a", True, hash_source("v1")) is None
+        stats, size = cache.stats, cache.size
+
+    assert (stats["hits"], stats["misses"], stats["expired"]) == (1, 1, 1)
+    #the expired entry and its files are deleted
+    assert size == 0
+    assert [path.name for path in tmp_path.iterdir()] == ["index.sqlite"]
+
+
+def test_the_least_recently_used_entries_are_evicted(tmp_path, clock):
+    with TablesCache(str(tmp_path)) as cache:
+        cache.put("a", True, hash_source("a"), [TABLE])
+        entry_size = cache.size
+    with TablesCache(str(tmp_path), max_size=2 * entry_size) as cache:
+        clock[0] += 1
+        cache.put("b", True, hash_source("b"), [TABLE])
+        clock[0] += 1
+        #"a" becomes more recently used than "b"
+        assert cache.get("a", True, hash_source("a")) is not None
+        clock[0] += 1
+        cache.put("c", True, hash_source("c"), [TABLE])
+
+        assert cache.get("b", True, hash_source("b")) is None
+        assert cache.get("a", True, hash_source("a")) is not None
+        assert cache.get("c", True, hash_source("c")) is not None
+        assert cache.stats["evictions"] == 1
+        assert cache.size == 2 * entry_size
+
+
+def test_a_not_modified_page_is_reported_as_revalidated(base_url, tmp_path):
+    url = f"{base_url}/tables.html"
+    with HttpFetcher() as fetcher, TablesCache(str(tmp_path)) as cache:
+        first = TablesScraper.scrape_static_page(url, fetcher=fetcher, cache=cache)
+        #the http.server answers 304 to the If-Modified-Since of the known page
+        second = TablesScraper.scrape_static_page(url, fetcher=fetcher, cache=cache)
+        with HttpFetcher() as other_fetcher:
+            third = TablesScraper.scrape_static_page(url, fetcher=other_fetcher, cache=cache)
+
+    assert first.succeed and second.succeed and third.succeed
+    assert {key: first.cache_info[key] for key in ("hit", "revalidated", "hits", "misses")} == {"hit": False, "revalidated": False, "hits": 0, "misses": 1}
+    assert {key: second.cache_info[key] for key in ("hit", "revalidated", "hits", "misses")} == {"hit": False, "revalidated": True, "hits": 0, "misses": 1}
+    assert {key: third.cache_info[key] for key in ("hit", "revalidated", "hits", "misses")} == {"hit": True, "revalidated": False, "hits": 1, "misses": 1}
+    assert all(a.equals(b) for a, b in zip(second.tables, first.tables))
+
+
+def test_no_cache_info_without_a_cache(base_url):
+    assert TablesScraper.scrape_static_page(f"{base_url}/tables.html").cache_info is None
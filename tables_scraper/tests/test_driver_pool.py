@@ -0,0 +1,101 @@
+from itertools import count
+from threading import Thread
+from time import sleep
+import pytest
+from _driver_pool import DriverPool
+
+
+class Driver:
+    """a driver stand-in, numbered by launch, crashed drivers do not answer title"""
+    launched = count()
+
+    def __init__(self) -> None:
+        self.number = next(Driver.launched)
+        self.crashed = False
+        self.quit_called = False
+
+    @property
+    def title(self) -> str:
+        if self.crashed:
+            raise RuntimeError("chrome not reachable")
+        return "page"
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+def test_drivers_are_reused_then_recycled_after_max_pages():
+    with DriverPool(driver_factory=Driver, size=1, max_pages=3) as pool:
+        drivers = []
+        for _ in range(4):
+            with pool.driver() as driver:
+                drivers.append(driver)
+        stats = pool.stats
+
+    assert drivers[0] is drivers[1] is drivers[2] and drivers[3] is not drivers[0]
+    assert drivers[0].quit_called
+    assert (stats["launches"], stats["hits"], stats["recycles"]) == (2, 2, 1)
+
+
+def test_a_crashed_driver_is_replaced():
+    with DriverPool(driver_factory=Driver, size=1) as pool:
+        with pytest.raises(RuntimeError):
+            with pool.driver() as driver:
+                driver.crashed = True
+                driver.title
+        with pool.driver() as replacement:
+            pass
+        stats = pool.stats
+
+    assert driver.quit_called and replacement is not driver
+    assert (stats["launches"], stats["recycles"]) == (2, 1)
+
+
+def test_a_failed_page_keeps_a_responding_driver():
+    with DriverPool(driver_factory=Driver, size=1) as pool:
+        with pytest.raises(ValueError):
+            with pool.driver() as driver:
+                raise ValueError("no tables")
+        with pool.driver() as again:
+            pass
+
+    assert again is driver
+
+
+def test_borrows_wait_when_all_drivers_are_busy():
+    with DriverPool(driver_factory=Driver, size=1) as pool:
+        borrowed = []
+
+        def borrow() -> None:
+            with pool.driver(timeout=5) as driver:
+                borrowed.append(driver)
+
+        with pool.driver() as first:
+            thread = Thread(target=borrow)
+            thread.start()
+            sleep(0.05)
+            #still waiting for the busy driver
+            assert borrowed == []
+            with pytest.raises(Exception, match="Time Out"):
+                with pool.driver(timeout=0.01):
+                    pass
+        thread.join(5)
+        stats = pool.stats
+
+    assert borrowed == [first]
+    assert (stats["launches"], stats["hits"], stats["waits"]) == (1, 1, 2)
+    assert (stats["running"], stats["idle"]) == (1, 1)
+
+
+def test_a_closed_pool_quits_its_drivers():
+    pool = DriverPool(driver_factory=Driver, size=2)
+    with pool.driver() as borrowed:
+        with pool.driver() as idle:
+            pass
+        pool.close()
+        assert idle.quit_called and not borrowed.quit_called
+    assert borrowed.quit_called
+    assert pool.stats["running"] == 0
+    with pytest.raises(Exception, match="closed"):
+        with pool.driver():
+            pass
@@ -0,0 +1,36 @@
+from tables_scraper import TablesScraper, HttpFetcher
+from _tables_scraper import extract_tables
+from conftest import TABLE_PAGE
+
+
+def test_extract_tables_from_str_and_bytes_sources():
+    for source in (TABLE_PAGE, TABLE_PAGE.encode("utf-8")):
+        tables = extract_tables(source)
+        assert len(tables) == 2
+        assert tables[0]["Name"].tolist() == ["café", "thé"]
+
+
+def test_scrape_static_page_with_fetcher(base_url):
+    with HttpFetcher() as fetcher:
+        response = TablesScraper.scrape_static_page(f"{base_url}/tables.html", fetcher=fetcher)
+        assert response.succeed, response.msg
+        assert len(response.tables) == 2
+        assert response.tables[0]["Name"].tolist() == ["café", "thé"]
+
+        #unchanged page: a conditional request, the tables come from the fetcher memory
+        again = TablesScraper.scrape_static_page(f"{base_url}/tables.html", fetcher=fetcher)
+        assert again.succeed
+        assert again.tables[0].equals(response.tables[0])
+
+
+def test_fetch_decodes_the_declared_charset(base_url):
+    with HttpFetcher() as fetcher:
+        page = fetcher.fetch(f"{base_url}/tables.html")
+    assert page.status == 200
+    assert "café" in (page.source if isinstance(page.source, str) else page.source.decode("utf-8"))
+
+
+def test_iter_static_page(base_url):
+    tables = list(TablesScraper.iter_static_page(f"{base_url}/tables.html", attrs={"id": "prices"}))
+    assert len(tables) == 1
+    assert tables[0].shape == (2, 2)
@@ -0,0 +1,52 @@
+import pytest
+from _tables_scraper import extract_tables, iter_tables
+
+#empty, hidden, nested and wide tables mixed with regular ones
+PAGE = """<html><body>
+<table id="first"><tr><th>A</th><th>B</th></tr><tr><td>1</td><td>2</td></tr></table>
+<table id="empty"><tr><td></td><td></td></tr></table>
+<table id="hidden" style="display: none"><tr><th>H</th></tr><tr><td>secret</td></tr></table>
+<table id="hidden_rows"><tr style="display:none"><td>x</td></tr></table>
+<table id="outer"><tr><td>outer</td><td><table id="inner"><tr><td>inner</td></tr></table></td></tr></table>
+<table id="wide" class="data"><tr><th>A</th><th>B</th><th>C</th></tr><tr><td>1</td><td>2</td><td>3</td></tr><tr><td>4</td><td>5</td><td>6</td></tr></table>
+<table id="price"><tr><th>Name</th><th>Price</th></tr><tr><td>gold</td><td>1,234.5</td></tr></table>
+</body></html>"""
+
+
+@pytest.mark.parametrize("visible_only", [True, False])
+def test_index_selects_the_extract_tables_position(visible_only):
+    tables = extract_tables(PAGE, visible_only)
+
+    for i, table in enumerate(tables):
+        (selected,) = list(iter_tables(PAGE, visible_only, index=i))
+        assert selected.equals(table)
+    assert list(iter_tables(PAGE, visible_only, index=len(tables))) == []
+    selected = list(iter_tables(PAGE, visible_only, index=[0, len(tables) - 1]))
+    assert [table.shape for table in selected] == [tables[0].shape, tables[-1].shape]
+
+
+def test_without_selectors_the_tables_are_the_extract_tables_ones():
+    tables = extract_tables(PAGE, visible_only=False)
+    streamed = list(iter_tables(PAGE.encode("utf-8"), visible_only=False))
+
+    assert len(streamed) == len(tables)
+    assert all(a.equals(b) for a, b in zip(streamed, tables))
+
+
+def test_match_selector():
+    tables = list(iter_tables(PAGE, match=r"gold|inner"))
+
+    assert [list(table.columns) for table in tables] == [[0, 1], [0], ["Name", "Price"]]
+
+
+def test_min_rows_and_min_cols_selectors():
+    assert [table.shape for table in iter_tables(PAGE, min_rows=3)] == [(2, 3)]
+    assert [table.shape for table in iter_tables(PAGE, min_cols=3)] == [(2, 3)]
+    #the rows of the nested tables are counted
+    assert [table.shape for table in iter_tables(PAGE, min_rows=2, min_cols=2)] == [(1, 2), (1, 2), (2, 3), (1, 2)]
+
+
+def test_max_tables_and_attrs_selectors():
+    assert [table.shape for table in iter_tables(PAGE, max_tables=2)] == [(1, 2), (1, 2)]
+    assert [table.shape for table in iter_tables(PAGE, attrs={"class": "data"})] == [(2, 3)]
+    assert [table.shape for table in iter_tables(PAGE, attrs={"id": "price"}, index=[3, 4])] == [(1, 2)]
@@ -0,0 +1,39 @@
+import warnings
+import pandas as pd
+from _normalize import normalize_table
+
+
+def test_normalize_table_converts_the_text_columns():
+    table = pd.DataFrame({
+        "price": ["1,234.5", "12", "(1,200)"],
+        "change": ["12%", "-3%", "0.5%"],
+        "cap": ["$3.4M", "$1K", "$2bn"],
+        "date": ["2024-01-05", "2024-02-10", "2024-03-15"],
+        "name": ["a", "b", "c"],
+    })
+    normalized, report = normalize_table(table)
+
+    assert report["converted"] == {"price": "numeric", "change": "percent", "cap": "currency", "date": "datetime"}
+    assert normalized["price"].tolist() == [1234.5, 12.0, -1200.0]
+    assert normalized["change"].tolist() == [12.0, -3.0, 0.5]
+    assert normalized["cap"].tolist() == [3.4e6, 1e3, 2e9]
+    assert pd.api.types.is_datetime64_any_dtype(normalized["date"])
+    assert normalized["name"].tolist() == ["a", "b", "c"]
+
+
+def test_normalize_table_converts_string_dtype_columns():
+    table = pd.DataFrame({"price": pd.Series(["1,234.5", "12"], dtype="string"), "missing": ["n/a", "3"]})
+    normalized, report = normalize_table(table)
+
+    assert report["converted"] == {"price": "numeric", "missing": "numeric"}
+    assert normalized["price"].tolist() == [1234.5, 12.0]
+    assert normalized["missing"].isna().tolist() == [True, False]
+
+
+def test_normalize_table_does_not_warn():
+    table = pd.DataFrame({"price": ["(1,200)", "3"], "name": ["(a)", "b"]})
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", UserWarning)
+        normalized, _ = normalize_table(table)
+
+    assert normalized["price"].tolist() == [-1200.0, 3.0]
@@ -0,0 +1,98 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import sleep
+import _tables_scraper
+from _tables_scraper import parse_pool
+from tables_scraper import TablesScraper, HttpFetcher
+
+
+def test_scrape_many_scrapes_all_urls(base_url):
+    urls = [f"{base_url}/tables.html?page={i}" for i in range(6)] + [f"{base_url}/empty.html"]
+    responses = {response.url: response for response in TablesScraper.scrape_many(urls, max_workers=4, max_per_host=2, parse_workers=0)}
+
+    assert set(responses) == set(urls)
+    for url in urls[:-1]:
+        assert responses[url].succeed
+        assert len(responses[url].tables) == 2
+        assert responses[url].tables[0].shape == (2, 2)
+    assert responses[urls[-1]].succeed
+    assert responses[urls[-1]].tables == []
+
+
+def test_scrape_many_reports_failures(base_url):
+    urls = [f"{base_url}/missing.html", "http://127.0.0.1:1/unreachable.html"]
+    with HttpFetcher(timeout=5, retries=0) as fetcher:
+        responses = list(TablesScraper.scrape_many(urls, parse_workers=0, fetcher=fetcher))
+
+    assert len(responses) == 2
+    assert not any(response.succeed for response in responses)
+
+
+def test_scrape_many_stops_when_the_caller_stops(base_url):
+    urls = [f"{base_url}/tables.html?page={i}" for i in range(20)]
+    responses = TablesScraper.scrape_many(urls, max_workers=2, parse_workers=0)
+    first = next(responses)
+    responses.close()
+
+    assert first.succeed
+
+
+def test_scrape_many_parses_in_the_shared_processes(base_url):
+    urls = [f"{base_url}/tables.html?page={i}" for i in range(4)] + [f"{base_url}/empty.html"]
+    for _ in range(2):
+        responses = {response.url: response for response in TablesScraper.scrape_many(urls, max_workers=4, parse_workers=2)}
+
+        assert all(response.succeed for response in responses.values())
+        assert [len(responses[url].tables) for url in urls] == [2, 2, 2, 2, 0]
+        assert responses[urls[0]].tables[0]["Name"].tolist() == ["café", "thé"]
+        assert "parse" in responses[urls[0]].timings
+    #the processes are started once, then reused
+    assert parse_pool(2) is parse_pool(2)
+
+
+def test_scrape_many_parses_inline_for_few_urls(base_url, monkeypatch):
+    monkeypatch.setattr(_tables_scraper, "_parse_pools", {})
+    responses = list(TablesScraper.scrape_many([f"{base_url}/tables.html"]))
+
+    assert responses[0].succeed
+    assert _tables_scraper._parse_pools == {}
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """serves a small table slowly, records the max number of requests served at the same time per Host header"""
+    lock = Lock()
+    active:dict = {}
+    peak:dict = {}
+
+    def do_GET(self) -> None:
+        host = self.headers["Host"]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        sleep(0.05)
+        with self.lock:
+            self.active[host] -= 1
+        body = b"<table><tr><th>A</th></tr><tr><td>1</td></tr></table>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_scrape_many_limits_the_pages_per_host():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    try:
+        #two hosts names of the same server, limited separately
+        urls = [f"http://{host}:{port}/{i}.html" for host in ("127.0.0.1", "localhost") for i in range(8)]
+        responses = list(TablesScraper.scrape_many(urls, max_workers=8, max_per_host=2, parse_workers=2))
+    finally:
+        server.shutdown()
+
+    assert len(responses) == 16 and all(response.succeed for response in responses)
+    assert _SlowHandler.peak == {f"127.0.0.1:{port}": 2, f"localhost:{port}": 2}
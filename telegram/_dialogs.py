@@ -0,0 +1,252 @@
+"""
+a persistent index of the dialogs (chats and channels), used by the main module (telegram)
+"""
+
+import json
+import os
+import sqlite3
+from threading import Lock
+from time import time
+from collections.abc import Iterator
+from _lazy import LazyModule
+
+# loaded on first use (see LazyModule)
+telethon = LazyModule("telethon")
+
+
+class DialogIndex:
+    """
+    keeps the dialogs in a SQLite database (built with a single iter_dialogs() pass, then updated from the client events),
+    looked up by chat id or by name through indexes,
+    the events are only received while connected: the changes made offline (renames, left or deleted chats) are missed
+    until the next build (see age)
+    """
+
+    def __init__(self, path: str = "dialogs.sqlite") -> None:
+        """
+        Args:
+            path (str, optional): the SQLite file (":memory:" to keep the index in memory). Defaults to "dialogs.sqlite".
+        """
+        if path != ":memory:" and (directory := os.path.dirname(path)):
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS dialogs (
+                peer_id INTEGER NOT NULL UNIQUE,
+                id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                name_key TEXT NOT NULL,
+                is_channel INTEGER NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS dialogs_id ON dialogs (id);
+            CREATE INDEX IF NOT EXISTS dialogs_name ON dialogs (name_key);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+            """)
+        self._lock = Lock()
+        self._stats = {"updates": 0, "removals": 0}
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM dialogs"
+            ).fetchone()
+        return count
+
+    def close(self) -> None:
+        """close the database"""
+        self._connection.close()
+
+    @property
+    def built(self) -> "float|None":
+        """epoch time of the last full build, None if never built"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM meta WHERE key = 'built'"
+            ).fetchone()
+        return None if row is None else row[0]
+
+    @property
+    def age(self) -> "float|None":
+        """seconds since the last full build, None if never built"""
+        built = self.built
+        return None if built is None else time() - built
+
+    @property
+    def stats(self) -> dict:
+        """counters: dialogs, channels, updates and removals applied from the client events"""
+        with self._lock:
+            dialogs, channels = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(is_channel), 0) FROM dialogs"
+            ).fetchone()
+            return {"dialogs": dialogs, "channels": channels, **self._stats}
+
+    # ========== build/update ==========#
+    def build(self, dialogs, batch_size: int = 500) -> int:
+        """
+        replace the index by the dialogs (e.g client.iter_dialogs()), consumed in a single pass by batches,
+        returns the number of dialogs
+        """
+        count = 0
+        with self._lock:
+            self._connection.execute("DELETE FROM dialogs")
+            batch = []
+            for dialog in dialogs:
+                batch.append(self._row(dialog.id, dialog.name, dialog.is_channel))
+                if len(batch) >= batch_size:
+                    self._upsert(batch)
+                    count += len(batch)
+                    batch = []
+            self._upsert(batch)
+            count += len(batch)
+            self._connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('built', ?)",
+                (time(),),
+            )
+            self._connection.commit()
+        return count
+
+    def update(self, peer_id: int, name: str, is_channel: bool) -> None:
+        """add or rename a dialog (peer_id is the telethon marked id, e.g -1001234567890)"""
+        with self._lock:
+            self._upsert([self._row(peer_id, name, is_channel)])
+            self._connection.commit()
+            self._stats["updates"] += 1
+
+    def remove(self, peer_id: int) -> None:
+        """remove a dialog (peer_id is the telethon marked id)"""
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM dialogs WHERE peer_id = ?", (peer_id,)
+            )
+            self._connection.commit()
+            self._stats["removals"] += 1
+
+    def watch(self, client) -> None:
+        """keep the index up to date from the client events (new dialogs, renames, left chats)"""
+
+        @client.on(telethon.events.NewMessage())
+        async def on_message(event):
+            if not self.contains(event.chat_id) and (chat := await event.get_chat()):
+                # same flag as Dialog.is_channel (broadcast channels and megagroups)
+                self.update(
+                    event.chat_id,
+                    telethon.utils.get_display_name(chat),
+                    isinstance(chat, telethon.types.Channel),
+                )
+
+        @client.on(telethon.events.ChatAction())
+        async def on_chat_action(event):
+            if event.user_left or event.user_kicked:
+                user = await event.get_user()
+                if user is not None and user.is_self:
+                    self.remove(event.chat_id)
+                return
+            if (
+                event.new_title
+                or event.created
+                or event.user_joined
+                or event.user_added
+            ):
+                if chat := await event.get_chat():
+                    self.update(
+                        telethon.utils.get_peer_id(chat),
+                        telethon.utils.get_display_name(chat),
+                        isinstance(chat, telethon.types.Channel),
+                    )
+
+    # ========== lookups ==========#
+    def contains(self, peer_id: int) -> bool:
+        """True if the dialog (telethon marked id) is indexed"""
+        with self._lock:
+            return (
+                self._connection.execute(
+                    "SELECT 1 FROM dialogs WHERE peer_id = ?", (peer_id,)
+                ).fetchone()
+                is not None
+            )
+
+    def get(self, chat_id: int) -> "dict|None":
+        """return the dialog -> {"id", "peer_id", "name", "is_channel"}, None if not found
+        (chat_id is the id given to the message handlers, a telethon marked id is also accepted)
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, peer_id, name, is_channel FROM dialogs WHERE peer_id = ? OR id = ? LIMIT 1",
+                (chat_id, chat_id),
+            ).fetchone()
+        return None if row is None else self._dict(row)
+
+    def find(self, name: str) -> "list[dict]":
+        """return the dialogs with the name (case insensitive, names are not unique)"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, peer_id, name, is_channel FROM dialogs WHERE name_key = ?",
+                (name.casefold(),),
+            ).fetchall()
+        return list(map(self._dict, rows))
+
+    def iter(self, channels_only: bool = False) -> "Iterator[tuple[int, str]]":
+        """
+        yield the (peer_id, name) of the dialogs (peer_id is the telethon marked id, unique unlike the real id),
+        in the dialogs order (the new/renamed dialogs at the end), read from the database by batches of 1000,
+        each batch is read at once so the index can change between the batches (the changed dialogs may be missed or yielded again)
+        """
+        query = (
+            "SELECT rowid, peer_id, name FROM dialogs WHERE rowid > ?"
+            + (" AND is_channel = 1" if channels_only else "")
+            + " ORDER BY rowid LIMIT 1000"
+        )
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._connection.execute(query, (last_rowid,)).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            for _, peer_id, name in rows:
+                yield peer_id, name
+
+    def export_json(self, path: str, channels_only: bool = False) -> int:
+        """
+        write the {peer_id: name} of the dialogs to a JSON file (indent=2) row by row, without building the dict,
+        keyed by the telethon marked id (e.g -1001234567890 for a channel) so the peers sharing a real id are all written,
+        returns the number of written dialogs
+        """
+        count = 0
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{")
+            for peer_id, name in self.iter(channels_only):
+                f.write(f'{"," if count else ""}\n  "{peer_id}": {json.dumps(name)}')
+                count += 1
+            f.write("\n}" if count else "}")
+        return count
+
+    # ========== helpers ==========#
+    @staticmethod
+    def _row(peer_id: int, name: "str|None", is_channel: bool) -> tuple:
+        name = name or ""
+        return (
+            peer_id,
+            telethon.utils.resolve_id(peer_id)[0],
+            name,
+            name.casefold(),
+            int(bool(is_channel)),
+            time(),
+        )
+
+    def _upsert(self, rows: list) -> None:
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO dialogs (peer_id, id, name, name_key, is_channel, updated) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    @staticmethod
+    def _dict(row: tuple) -> dict:
+        return {
+            "id": row[0],
+            "peer_id": row[1],
+            "name": row[2],
+            "is_channel": bool(row[3]),
+        }
@@ -0,0 +1,255 @@
+"""
+bulk export of the chats history to Parquet files, used by the main module (telegram)
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from importlib.util import find_spec
+from time import perf_counter
+from _pipeline import chat_id
+from _sender import RateLimiter
+from _lazy import LazyModule
+
+# loaded on first use (see LazyModule), pyarrow is optional, it is only required by HistoryExporter
+telethon = LazyModule("telethon")
+pa = LazyModule("pyarrow")
+pq = LazyModule("pyarrow.parquet")
+
+# max messages of a GetHistoryRequest
+_PAGE_SIZE = 100
+
+# the columns of the exported files
+COLUMNS = ("chat_id", "id", "date", "sender_id", "text", "reply_to_id")
+
+
+@dataclass
+class ExportResult:
+    """
+    result of a chat of export():
+        - chat: the chat as given
+        - chat_id: the real chat id (the chat_id column), None if not resolved
+        - peer_id: the telethon marked chat id (the name of its directory, a user and a basic group can share a real id), None if not resolved
+        - messages: number of messages exported by this export()
+        - last_id: id of the last exported message (of all the exports), the next export resumes after it
+        - parts: number of Parquet files written by this export()
+        - error: None if exported
+        - seconds: time spent exporting the chat
+    """
+
+    chat: "str|int"
+    chat_id: "int|None" = None
+    peer_id: "int|None" = None
+    messages: int = 0
+    last_id: int = 0
+    parts: int = 0
+    error: "str|None" = None
+    seconds: float = 0.0
+
+    @property
+    def succeed(self) -> bool:
+        """True if the history is exported"""
+        return self.error is None
+
+
+class HistoryExporter:
+    """
+    exports the history of many chats concurrently (oldest messages first) to Parquet files,
+    one file per batch_size messages: directory/<peer_id>/part-<first id>-<last id>.parquet (the telethon marked chat id),
+    each file is written (atomically) as soon as its batch is full, so at most concurrency * batch_size messages are in memory,
+    the history requests share a rate limit, paused on Telegram flood waits,
+    an export resumes after the last message of the written files (an interrupted export loses at most a batch per chat)
+    """
+
+    def __init__(
+        self,
+        client,
+        directory: str = "history",
+        batch_size: int = 5000,
+        concurrency: int = 4,
+        rate: float = 10.0,
+        max_flood_wait: int = 300,
+        retries: int = 5,
+    ) -> None:
+        """
+        Args:
+            client: the connected TelegramClient (or any object with async get_input_entity() and get_messages())
+            directory (optional): the directory of the Parquet files, default is "history"
+            batch_size (optional): messages per Parquet file, default is 5000
+            concurrency (optional): chats exported at the same time, default is 4
+            rate (optional): max history requests (up to 100 messages each) per second (all chats), default is 10.0
+            max_flood_wait (optional): longest flood wait (seconds) waited before retrying, longer ones fail the chat, default is 300
+            retries (optional): max retries of a request after flood waits, default is 5
+        """
+        if find_spec("pyarrow") is None:
+            raise Exception(
+                "pyarrow is required by HistoryExporter (pip install pyarrow)"
+            )
+        self._client = client
+        self._directory = directory
+        self._batch_size = max(1, batch_size)
+        self._concurrency = concurrency
+        self._limiter = RateLimiter(rate, burst=max(1, int(rate)))
+        self._max_flood_wait = max_flood_wait
+        self._retries = retries
+        self._schema = pa.schema(
+            zip(
+                COLUMNS,
+                (
+                    pa.int64(),
+                    pa.int64(),
+                    pa.timestamp("us", tz="UTC"),
+                    pa.int64(),
+                    pa.string(),
+                    pa.int64(),
+                ),
+            )
+        )
+        self._stats = {
+            "messages": 0,
+            "requests": 0,
+            "parts": 0,
+            "flood_waits": 0,
+            "flood_wait_seconds": 0,
+        }
+        self._last_export: dict = {}
+
+    @property
+    def metrics(self) -> dict:
+        """
+        counters (messages, requests, parts, flood_waits, flood_wait_seconds)
+        and the last export() -> {"chats", "failed", "messages", "seconds", "throughput" (messages/s)}
+        """
+        return {**self._stats, "last_export": dict(self._last_export)}
+
+    def last_id(self, peer_id: int) -> int:
+        """id of the last exported message of the chat (telethon marked id, see ExportResult.peer_id), 0 if nothing is exported"""
+        parts = self._parts(peer_id)
+        return parts[-1][1] if parts else 0
+
+    def read(self, peer_id: int) -> "pa.Table":
+        """the exported history of the chat (telethon marked id, see ExportResult.peer_id), ordered by message id"""
+        directory = os.path.join(self._directory, str(peer_id))
+        tables = [
+            pq.read_table(os.path.join(directory, f"part-{first}-{last}.parquet"))
+            for first, last in self._parts(peer_id)
+        ]
+        return pa.concat_tables(tables) if tables else self._schema.empty_table()
+
+    async def export(
+        self, chats: list, limit: "int|None" = None
+    ) -> "list[ExportResult]":
+        """export the new messages of the chats (ids or usernames), up to limit messages per chat, returns a result per chat (same order)"""
+        start = perf_counter()
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def export_one(result: ExportResult) -> None:
+            async with semaphore:
+                started = perf_counter()
+                try:
+                    await self._export(result, limit)
+                except Exception as e:
+                    result.error = f"Failed to export history: {e}"
+                result.seconds = perf_counter() - started
+
+        results = [ExportResult(chat) for chat in chats]
+        await asyncio.gather(*map(export_one, results))
+
+        seconds = perf_counter() - start
+        messages = sum(result.messages for result in results)
+        self._last_export = {
+            "chats": len(results),
+            "failed": sum(not result.succeed for result in results),
+            "messages": messages,
+            "seconds": seconds,
+            "throughput": messages / seconds if seconds else 0.0,
+        }
+        return results
+
+    # ========== helpers ==========#
+    def _parts(self, peer_id: int) -> "list[tuple[int, int]]":
+        """the (first id, last id) of the Parquet files of the chat, ordered"""
+        try:
+            names = os.listdir(os.path.join(self._directory, str(peer_id)))
+        except FileNotFoundError:
+            return []
+        return sorted(
+            tuple(map(int, name[5:-8].split("-")))
+            for name in names
+            if name.startswith("part-") and name.endswith(".parquet")
+        )
+
+    async def _export(self, result: ExportResult, limit: "int|None") -> None:
+        entity = await self._client.get_input_entity(result.chat)
+        result.peer_id = telethon.utils.get_peer_id(entity)
+        result.chat_id = chat_id(result.peer_id)
+        result.last_id = self.last_id(result.peer_id)
+        rows = []
+        while limit is None or result.messages + len(rows) < limit:
+            page = _PAGE_SIZE
+            if limit is not None:
+                page = min(page, limit - result.messages - len(rows))
+            min_id = rows[-1][1] if rows else result.last_id
+            messages = await self._request(entity, page, min_id)
+            rows.extend(
+                (
+                    result.chat_id,
+                    message.id,
+                    message.date,
+                    message.sender_id,
+                    message.message,
+                    message.reply_to_msg_id,
+                )
+                for message in messages
+            )
+            if len(rows) >= self._batch_size:
+                await self._write(result, rows[: self._batch_size])
+                rows = rows[self._batch_size :]
+            if len(messages) < page:
+                break
+        # the last messages (up to batch_size)
+        while rows:
+            await self._write(result, rows[: self._batch_size])
+            rows = rows[self._batch_size :]
+
+    async def _request(self, entity, limit: int, min_id: int) -> list:
+        attempts = 0
+        while True:
+            await self._limiter.acquire()
+            attempts += 1
+            self._stats["requests"] += 1
+            try:
+                # oldest first, after min_id
+                return await self._client.get_messages(
+                    entity, limit=limit, min_id=min_id, reverse=True
+                )
+            except telethon.errors.FloodWaitError as e:
+                self._stats["flood_waits"] += 1
+                self._stats["flood_wait_seconds"] += e.seconds
+                if e.seconds > self._max_flood_wait or attempts > self._retries:
+                    raise
+                # a flood wait is per account, all the chats wait
+                self._limiter.pause(e.seconds)
+
+    async def _write(self, result: ExportResult, rows: list) -> None:
+        table = pa.table(
+            {name: [row[i] for row in rows] for i, name in enumerate(COLUMNS)},
+            schema=self._schema,
+        )
+        directory = os.path.join(self._directory, str(result.peer_id))
+        path = os.path.join(directory, f"part-{rows[0][1]}-{rows[-1][1]}.parquet")
+        # written by a thread (not blocking the client), renamed when complete
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._write_table, table, directory, path
+        )
+        result.messages += len(rows)
+        result.last_id = rows[-1][1]
+        result.parts += 1
+        self._stats["messages"] += len(rows)
+        self._stats["parts"] += 1
+
+    @staticmethod
+    def _write_table(table: "pa.Table", directory: str, path: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
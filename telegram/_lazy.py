@@ -0,0 +1,19 @@
+"""
+deferred import of telethon (and of the optional pyarrow) for the main module (telegram): importing it stays fast,
+telethon is loaded by connect() or by the first helper that needs it
+"""
+
+from importlib import import_module
+
+
+class LazyModule:
+    """the named module, imported when one of its attributes is first read (e.g telethon.TelegramClient)"""
+
+    def __init__(self, name: str) -> None:
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, attribute: str):
+        if self.__module is None:
+            self.__module = import_module(self.__name)
+        return getattr(self.__module, attribute)
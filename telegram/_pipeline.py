@@ -0,0 +1,216 @@
+"""
+non-blocking pipeline of the incoming messages handlers, used by the main module (telegram)
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from math import ceil
+from time import perf_counter
+from _lazy import LazyModule
+
+# loaded on first use (see LazyModule)
+telethon = LazyModule("telethon")
+
+OVERFLOW_POLICIES = ("block", "drop_new", "drop_oldest")
+
+
+@lru_cache(maxsize=4096)
+def chat_id(marked_id: int) -> int:
+    """the real chat id of a telethon (marked) chat id, e.g -1001234567890 -> 1234567890"""
+    return telethon.utils.resolve_id(marked_id)[0]
+
+
+def percentile(samples: list, p: float) -> float:
+    """the p-th percentile (nearest rank) of the sorted samples, 0.0 if no samples"""
+    return samples[max(0, ceil(p / 100 * len(samples)) - 1)] if samples else 0.0
+
+
+class MessagePipeline:
+    """
+    buffers the incoming messages per chat and delivers them in batches (up to batch_size messages or every batch_ms),
+    async handlers run on the event loop, sync handlers on a bounded thread pool, the batches of a chat are delivered in order,
+    at most max_pending messages wait for their delivery, then the overflow policy applies:
+        - "block": the next messages wait (the updates of the client are delayed)
+        - "drop_new": the new message is dropped
+        - "drop_oldest": the oldest buffered message of the chat is dropped (or the new one if nothing is buffered)
+    """
+
+    def __init__(
+        self,
+        handler,
+        batch_size: int = 1,
+        batch_ms: float = 0,
+        max_pending: int = 1000,
+        overflow: str = "block",
+        workers: int = 4,
+        samples: int = 1024,
+    ) -> None:
+        """
+        Args:
+            handler: called with (chat_id, message) if batch_size is 1, with (chat_id, messages) otherwise, sync or async
+            batch_size (int, optional): max messages per delivery. Defaults to 1.
+            batch_ms (float, optional): max milliseconds a message waits for its batch to fill. Defaults to 0.
+            max_pending (int, optional): max messages received but not handled yet. Defaults to 1000.
+            overflow (str, optional): "block", "drop_new" or "drop_oldest". Defaults to "block".
+            workers (int, optional): threads running the sync handlers. Defaults to 4.
+            samples (int, optional): number of recent latencies kept for the percentiles. Defaults to 1024.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise Exception(
+                f"Invalid overflow policy: '{overflow}' {OVERFLOW_POLICIES}"
+            )
+        self._handler = handler
+        self._is_async = asyncio.iscoroutinefunction(handler)
+        self._batch_size = max(1, batch_size)
+        self._batch_ms = batch_ms
+        self._max_pending = max_pending
+        self._overflow = overflow
+        self._executor = (
+            None
+            if self._is_async
+            else ThreadPoolExecutor(workers, thread_name_prefix="telegram-handler")
+        )
+        # chat -> deque([(message, received time), ...]) waiting for their batch
+        self._buffers: "dict[int, deque]" = {}
+        self._timers: dict = {}
+        # chat -> lock delivering its batches in order
+        self._chats: "dict[int, asyncio.Lock]" = {}
+        self._pending = 0
+        self._space: "asyncio.Condition|None" = None
+        self._tasks: set = set()
+        self._closed = False
+        self._latencies: deque = deque(maxlen=samples)
+        self._delays: deque = deque(maxlen=samples)
+        self._stats = {
+            "received": 0,
+            "delivered": 0,
+            "dropped": 0,
+            "batches": 0,
+            "errors": 0,
+            "max_pending": 0,
+        }
+        self.last_error: "str|None" = None
+
+    @property
+    def metrics(self) -> dict:
+        """
+        pipeline metrics:
+            - pending: messages received but not handled yet (the queue depth), buffered: messages waiting for their batch
+            - received, delivered, dropped, batches, errors (handler exceptions, see last_error), max_pending
+            - latency_p50/latency_p99/latency_max: seconds spent by the handler per batch (recent batches)
+            - delay_p50/delay_p99: seconds from the reception of a message to the start of its handling (recent batches)
+        """
+        metrics = {
+            "pending": self._pending,
+            "buffered": sum(map(len, self._buffers.values())),
+            **self._stats,
+        }
+        for name, samples in (
+            ("latency", sorted(self._latencies)),
+            ("delay", sorted(self._delays)),
+        ):
+            for p in (50, 99):
+                metrics[f"{name}_p{p}"] = percentile(samples, p)
+        metrics["latency_max"] = max(self._latencies, default=0.0)
+        return metrics
+
+    async def put(self, chat: int, message: str) -> None:
+        """
+        add a received message (awaited by the client handler, it waits only with the "block" policy),
+        the messages put after close() are ignored (not counted)
+        """
+        if self._closed:
+            return
+        self._stats["received"] += 1
+        if self._pending >= self._max_pending:
+            if self._overflow == "block":
+                if self._space is None:
+                    self._space = asyncio.Condition()
+                # checked again after each wake up: the other blocked messages may take the space first
+                async with self._space:
+                    while self._pending >= self._max_pending and not self._closed:
+                        await self._space.wait()
+                if self._closed:
+                    self._stats["dropped"] += 1
+                    return
+            elif self._overflow == "drop_oldest" and self._buffers.get(chat):
+                self._buffers[chat].popleft()
+                self._pending -= 1
+                self._stats["dropped"] += 1
+            else:
+                self._stats["dropped"] += 1
+                return
+        self._pending += 1
+        self._stats["max_pending"] = max(self._stats["max_pending"], self._pending)
+        buffer = self._buffers.setdefault(chat, deque())
+        buffer.append((message, perf_counter()))
+        if len(buffer) >= self._batch_size or self._batch_ms <= 0:
+            self._flush(chat)
+        elif chat not in self._timers:
+            self._timers[chat] = asyncio.get_running_loop().call_later(
+                self._batch_ms / 1000, self._flush, chat
+            )
+
+    async def join(self) -> None:
+        """deliver the buffered messages and wait for all the handlers"""
+        for chat in list(self._buffers):
+            self._flush(chat)
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        """
+        deliver the buffered messages, wait for all the handlers then stop the handlers threads,
+        the messages blocked during close() are dropped, the messages put after are ignored
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._space is not None:
+            async with self._space:
+                self._space.notify_all()
+        await self.join()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    # ========== delivery ==========#
+    def _flush(self, chat: int) -> None:
+        if timer := self._timers.pop(chat, None):
+            timer.cancel()
+        buffer = self._buffers.pop(chat, ())
+        while buffer:
+            batch = [
+                buffer.popleft() for _ in range(min(self._batch_size, len(buffer)))
+            ]
+            task = asyncio.ensure_future(self._deliver(chat, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, chat: int, batch: list) -> None:
+        lock = self._chats.get(chat)
+        if lock is None:
+            lock = self._chats[chat] = asyncio.Lock()
+        messages = [message for message, _ in batch]
+        argument = messages[0] if self._batch_size == 1 else messages
+        async with lock:
+            start = perf_counter()
+            self._delays.extend(start - received for _, received in batch)
+            try:
+                if self._is_async:
+                    await self._handler(chat, argument)
+                else:
+                    await asyncio.get_running_loop().run_in_executor(
+                        self._executor, self._handler, chat, argument
+                    )
+            except Exception as e:
+                self._stats["errors"] += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            self._latencies.append(perf_counter() - start)
+            self._stats["batches"] += 1
+            self._stats["delivered"] += len(batch)
+        self._pending -= len(batch)
+        if self._space is not None:
+            async with self._space:
+                self._space.notify_all()
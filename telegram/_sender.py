@@ -0,0 +1,247 @@
+"""
+rate limited sending of many messages, used by the main module (telegram)
+"""
+
+import asyncio
+from dataclasses import dataclass
+from time import monotonic, perf_counter
+from _pipeline import percentile
+from _lazy import LazyModule
+
+# loaded on first use (see LazyModule)
+telethon = LazyModule("telethon")
+
+
+class RateLimiter:
+    """an asyncio token bucket (rate tokens per second, up to burst), that can be paused (e.g on flood waits)"""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = monotonic()
+        self._paused_until = 0.0
+        self._lock: "asyncio.Lock|None" = None
+
+    async def acquire(self) -> None:
+        """wait for a token (the waiters are served in order)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(
+                    self._burst, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def pause(self, seconds: float) -> None:
+        """no token is given for the next seconds"""
+        self._paused_until = max(self._paused_until, monotonic() + seconds)
+
+
+@dataclass
+class SendResult:
+    """
+    result of a message of send_many():
+        - receiver: the receiver as given
+        - message: the sent telethon Message (None if failed)
+        - error: None if sent
+        - attempts: number of sending attempts (more than 1 after flood waits)
+        - latency: seconds from the start of send_many() to the end of the sending
+    """
+
+    receiver: "str|int"
+    message: object = None
+    error: "str|None" = None
+    attempts: int = 0
+    latency: float = 0.0
+
+    @property
+    def succeed(self) -> bool:
+        """True if the message is sent"""
+        return self.error is None
+
+
+class MessageSender:
+    """
+    sends messages through a queue served by a pool of async workers,
+    within a global and a per chat rate limits, paused on Telegram flood waits (FloodWaitError: global, SlowModeWaitError: chat),
+    the receivers entities are resolved once and cached, the chats limits are keyed by peer id (an id and a username of the same chat share a limit),
+    the client can be replaced (e.g after a reconnection) by setting sender.client
+    """
+
+    def __init__(
+        self,
+        client,
+        workers: int = 8,
+        global_rate: float = 25.0,
+        chat_rate: float = 1.0,
+        max_flood_wait: int = 60,
+        retries: int = 3,
+    ) -> None:
+        """
+        Args:
+            client: the connected TelegramClient (or any object with async send_message() and get_input_entity())
+            workers (optional): number of async workers, default is 8
+            global_rate (optional): max messages per second (all chats), default is 25.0
+            chat_rate (optional): max messages per second to the same chat, default is 1.0
+            max_flood_wait (optional): longest flood wait (seconds) waited before retrying, longer ones fail the message, default is 60
+            retries (optional): max retries of a message after flood waits, default is 3
+        """
+        self.client = client
+        self._workers = workers
+        self._global = RateLimiter(global_rate, burst=max(1, int(global_rate)))
+        self._chat_rate = chat_rate
+        self._chats: "dict[object, RateLimiter]" = {}
+        self._max_flood_wait = max_flood_wait
+        self._retries = retries
+        self._entities: dict = {}
+        self._stats = {
+            "sent": 0,
+            "failed": 0,
+            "flood_waits": 0,
+            "flood_wait_seconds": 0,
+            "entities_cached": 0,
+            "entities_resolved": 0,
+        }
+        self._last_batch: dict = {}
+
+    @property
+    def metrics(self) -> dict:
+        """
+        counters (sent, failed, flood_waits, flood_wait_seconds, entities_cached, entities_resolved)
+        and the last send_many() batch -> {"messages", "sent", "seconds", "throughput" (messages/s), "p50", "p99" (latencies)}
+        """
+        return {**self._stats, "last_batch": dict(self._last_batch)}
+
+    async def resolve(self, receivers: list) -> dict:
+        """
+        return {receiver: input entity or Exception} of the receivers,
+        the unknown ones are resolved concurrently (once) and cached
+        """
+        unknown = [
+            receiver
+            for receiver in dict.fromkeys(receivers)
+            if receiver not in self._entities
+        ]
+        self._stats["entities_cached"] += len(receivers) - len(unknown)
+        if unknown:
+            semaphore = asyncio.Semaphore(self._workers)
+
+            async def resolve_one(receiver):
+                async with semaphore:
+                    return await self.client.get_input_entity(receiver)
+
+            entities = await asyncio.gather(
+                *map(resolve_one, unknown), return_exceptions=True
+            )
+            for receiver, entity in zip(unknown, entities):
+                if not isinstance(entity, Exception):
+                    self._entities[receiver] = entity
+                    self._stats["entities_resolved"] += 1
+            resolved = dict(zip(unknown, entities))
+        else:
+            resolved = {}
+        return {
+            receiver: resolved.get(receiver, self._entities.get(receiver))
+            for receiver in receivers
+        }
+
+    async def send_many(self, receivers: list, message: str) -> "list[SendResult]":
+        """send the message to all the receivers, returns a result per receiver (in the same order)"""
+        start = perf_counter()
+        entities = await self.resolve(receivers)
+        results = [SendResult(receiver) for receiver in receivers]
+        queue: asyncio.Queue = asyncio.Queue()
+        for result in results:
+            entity = entities[result.receiver]
+            if isinstance(entity, Exception):
+                result.error = f"Failed to resolve receiver: {entity}"
+                self._stats["failed"] += 1
+            else:
+                queue.put_nowait((result, entity))
+
+        async def worker() -> None:
+            while True:
+                result, entity = await queue.get()
+                try:
+                    await self._send(result, entity, message)
+                finally:
+                    result.latency = perf_counter() - start
+                    queue.task_done()
+
+        tasks = [
+            asyncio.ensure_future(worker())
+            for _ in range(min(self._workers, queue.qsize()))
+        ]
+        try:
+            await queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        seconds = perf_counter() - start
+        latencies = sorted(result.latency for result in results)
+        self._last_batch = {
+            "messages": len(results),
+            "sent": sum(result.succeed for result in results),
+            "seconds": seconds,
+            "throughput": len(results) / seconds if seconds else 0.0,
+            "p50": percentile(latencies, 50),
+            "p99": percentile(latencies, 99),
+        }
+        return results
+
+    @staticmethod
+    def _chat_key(entity):
+        """the peer id of the entity"""
+        try:
+            return telethon.utils.get_peer_id(entity)
+        # e.g InputPeerSelf ("me")
+        except TypeError:
+            return type(entity).__name__
+
+    async def _send(self, result: SendResult, entity, message: str) -> None:
+        key = self._chat_key(entity)
+        chat = self._chats.get(key)
+        if chat is None:
+            chat = self._chats[key] = RateLimiter(self._chat_rate)
+        while True:
+            # the chat token first, so a worker waiting for a slow chat does not hold a global token
+            await chat.acquire()
+            await self._global.acquire()
+            result.attempts += 1
+            try:
+                result.message = await self.client.send_message(entity, message)
+            except (
+                telethon.errors.FloodWaitError,
+                telethon.errors.SlowModeWaitError,
+            ) as e:
+                self._stats["flood_waits"] += 1
+                self._stats["flood_wait_seconds"] += e.seconds
+                if e.seconds > self._max_flood_wait or result.attempts > self._retries:
+                    result.error = f"Failed to send message: {e}"
+                    self._stats["failed"] += 1
+                    return
+                # a slow mode is per chat, a flood wait is per account
+                (
+                    chat
+                    if isinstance(e, telethon.errors.SlowModeWaitError)
+                    else self._global
+                ).pause(e.seconds)
+                continue
+            except Exception as e:
+                result.error = f"Failed to send message: {e}"
+                self._stats["failed"] += 1
+                return
+            self._stats["sent"] += 1
+            return
@@ -1,5 +1,12 @@
-from telethon import TelegramClient, events
-import json
+import asyncio
+from _sender import MessageSender, SendResult
+from _pipeline import MessagePipeline, chat_id
+from _dialogs import DialogIndex
+from _export import ExportResult, HistoryExporter
+from _lazy import LazyModule
+
+# loaded on first use, importing telegram stays fast (see LazyModule)
+telethon = LazyModule("telethon")
 
 
 class Telegram:
@@ -7,65 +14,142 @@ class Telegram:
         self._API_ID: int = api_id
         self._API_HASH: str = api_hash
         # telegram client
-        self._client: "TelegramClient|None" = None
+        self._client: "telethon.TelegramClient|None" = None
+        # created by the first send_many(), with the set_send_limits() args
+        self._sender: "MessageSender|None" = None
+        self._send_limits: tuple = ()
+        # created by set_message_handler()
+        self._pipelines: "list[MessagePipeline]" = []
+        # opened by open_dialog_index()
+        self._dialogs: "DialogIndex|None" = None
+        # the last export_history() exporter
+        self._exporter: "HistoryExporter|None" = None
 
     # ========== connect/disconnect ==========#
     def connect(self) -> None:
         """Connect to Telegram, start Telegram client. If connection failed, raise Exception."""
         try:
-            self._client = TelegramClient("session", self._API_ID, self._API_HASH)
+            self._client = telethon.TelegramClient(
+                "session", self._API_ID, self._API_HASH
+            )
             self._client.start()
         except Exception as e:
             raise Exception(f"Failed to connect to Telegram: {e}")
+        # the sender keeps its cached entities and metrics with the new client
+        if self._sender is not None:
+            self._sender.client = self._client
 
-    def disconnect(self) -> None:
-        """Disconnect from Telegram, stop Telegram client."""
-        self._client.disconnect()
+    def disconnect(self) -> "asyncio.Future|None":
+        """Disconnect from Telegram, stop Telegram client and the message handlers threads (after handling the buffered messages).
+        Like the client disconnect(), inside the running client event loop it returns the scheduled disconnection to await (see adisconnect()).
+        """
+        if self._client.loop.is_running():
+            return asyncio.shield(self._client.loop.create_task(self.adisconnect()))
+        self._client.loop.run_until_complete(self.adisconnect())
+
+    async def adisconnect(self) -> None:
+        """Disconnect from Telegram inside the client event loop, see disconnect()."""
+        for pipeline in self._pipelines:
+            await pipeline.close()
+        if self._dialogs is not None:
+            self._dialogs.close()
+            self._dialogs = None
+        # an awaitable inside the running loop
+        await self._client.disconnect()
 
     # ========== get chats info  ==========#
+    def open_dialog_index(
+        self,
+        path: str = "dialogs.sqlite",
+        rebuild: bool = False,
+        max_age: "float|None" = 86400,
+    ) -> DialogIndex:
+        """Open the persistent dialogs index, built with a single pass over the dialogs if new, older than max_age (or if rebuild),
+        then kept up to date from the client events.
+        The events are only received while connected, the changes made while disconnected (renames, left or deleted chats)
+        stay missing until the next build.
+
+        Args:
+            path (str, optional): the SQLite file of the index. Defaults to "dialogs.sqlite".
+            rebuild (bool, optional): True to build the index again. Defaults to False.
+            max_age (float, optional): seconds after which a persisted index is built again, None to never rebuild it. Defaults to 86400 (a day).
+
+        Returns:
+            DialogIndex: the index (lookups by id or name)
+        """
+        if self._dialogs is None:
+            self._dialogs = DialogIndex(path)
+            self._dialogs.watch(self._client)
+        age = self._dialogs.age
+        if rebuild or age is None or (max_age is not None and age > max_age):
+            self._dialogs.build(self._client.iter_dialogs())
+        return self._dialogs
+
+    @property
+    def dialogs(self) -> DialogIndex:
+        """the dialogs index (opened with the default path if not opened yet)"""
+        return self._dialogs or self.open_dialog_index()
+
     def save_all_chats(self) -> None:
-        """Save all chats names and IDs to chats.json file"""
-        # get all chats
-        chats = list(self._client.iter_dialogs())
-        chats_info = {int(str(chat.id)[4:]): chat.name for chat in chats}
-        # save to json
+        """Save all chats names and IDs (telethon marked ids, e.g -1001234567890 for a channel) to chats.json file"""
         try:
-            print(f"{len(chats)} chats found...", end=" ")
-            with open("chats.json", "w", encoding="utf-8") as f:
-                json.dump(chats_info, f, indent=2)
-                print("Saved to chats.json")
+            print(f"{len(self.dialogs)} chats found...", end=" ")
+            self.dialogs.export_json("chats.json")
+            print("Saved to chats.json")
         except Exception as e:
             print(f"Failed: {e}")
 
     def save_all_channels(self) -> None:
-        """Save all channels names and IDs to channels.json file"""
-        # get all channels
-        channels = list(
-            filter(lambda dialog: dialog.is_channel, self._client.iter_dialogs())
-        )
-        channels_info = {int(str(channel.id)[4:]): channel.name for channel in channels}
-        # save to json
+        """Save all channels names and IDs (telethon marked ids) to channels.json file"""
         try:
-            print(f"{len(channels)} channels found...", end=" ")
-            with open("channels.json", "w", encoding="utf-8") as f:
-                json.dump(channels_info, f, indent=2)
-                print("Saved to channels.json")
+            print(f"{self.dialogs.stats['channels']} channels found...", end=" ")
+            self.dialogs.export_json("channels.json", channels_only=True)
+            print("Saved to channels.json")
         except Exception as e:
             print(f"Failed: {e}")
 
     # ========== message event handler ==========#
     def set_message_handler(
-        self, message_handler: "function", chats: "list[int] | None" = None
-    ) -> None:
-        """Set message handler. If chats is None, handler will be called for all messages
+        self,
+        message_handler: "function",
+        chats: "list[int] | None" = None,
+        batch_size: int = 1,
+        batch_ms: float = 0,
+        max_pending: int = 1000,
+        overflow: str = "block",
+        workers: int = 4,
+    ) -> MessagePipeline:
+        """Set message handler. If chats is None, handler will be called for all messages.
+        The handler never runs inside the client event handler: async handlers run as tasks, sync handlers on a thread pool,
+        and the messages of a chat are handled in order.
 
         Args:
-            message_handler (function): a function that will be called when new message received, must have 2 parameters: chat_id and message
+            message_handler (function): a function (sync or async) that will be called when new message received, must have 2 parameters: chat_id and message (a list of messages if batch_size > 1)
             chats (list[int], optional): IDs of all needed chats. Defaults is None.
+            batch_size (int, optional): max messages of a chat delivered at once. Defaults to 1.
+            batch_ms (float, optional): max milliseconds a message waits for its batch to fill. Defaults to 0.
+            max_pending (int, optional): max messages received but not handled yet. Defaults to 1000.
+            overflow (str, optional): what happens beyond max_pending: "block" (wait), "drop_new" or "drop_oldest". Defaults to "block".
+            workers (int, optional): threads running a sync handler. Defaults to 4.
+
+        Returns:
+            MessagePipeline: the handler pipeline (see its metrics)
         """
-        @self._client.on(events.NewMessage(chats=chats))
+        pipeline = MessagePipeline(
+            message_handler, batch_size, batch_ms, max_pending, overflow, workers
+        )
+        self._pipelines.append(pipeline)
+
+        @self._client.on(telethon.events.NewMessage(chats=chats))
         async def async_message_handler(event):
-            message_handler(int(str(event.chat_id)[4:]), event.raw_text)
+            await pipeline.put(chat_id(event.chat_id), event.raw_text)
+
+        return pipeline
+
+    @property
+    def message_metrics(self) -> "list[dict]":
+        """metrics of the message handlers pipelines (queue depth, latencies, see MessagePipeline.metrics)"""
+        return [pipeline.metrics for pipeline in self._pipelines]
 
     # ========== send message ==========#
     async def send_message(self, receiver: "str|int", message: str) -> None:
@@ -76,12 +160,88 @@ class Telegram:
             message (str): message to send
         """
         try:
-            self._client.loop.run_until_complete(
-                await self._client.send_message(receiver, message)
-            )
+            await self._client.send_message(receiver, message)
         except Exception as e:
             raise Exception(f"Failed to send message: {e}")
 
+    def set_send_limits(
+        self,
+        workers: int = 8,
+        global_rate: float = 25.0,
+        chat_rate: float = 1.0,
+        max_flood_wait: int = 60,
+        retries: int = 3,
+    ) -> None:
+        """configure send_many() (see MessageSender), the resolved entities cache is reset (can be called before connect())
+
+        Args:
+            workers (int, optional): number of async workers sending the messages. Defaults to 8.
+            global_rate (float, optional): max messages per second (all chats). Defaults to 25.0.
+            chat_rate (float, optional): max messages per second to the same chat. Defaults to 1.0.
+            max_flood_wait (int, optional): longest Telegram flood wait (seconds) waited before retrying, longer ones fail the message. Defaults to 60.
+            retries (int, optional): max retries of a message after flood waits. Defaults to 3.
+        """
+        self._send_limits = (workers, global_rate, chat_rate, max_flood_wait, retries)
+        # created by the next send_many() with the current client
+        self._sender = None
+
+    async def send_many(
+        self, receivers: "list[str|int]", message: str
+    ) -> "list[SendResult]":
+        """send message to many receivers, within Telegram rate limits (flood waits are waited and retried)
+
+        Args:
+            receivers (list[str|int]): receivers IDs or usernames (resolved once and cached)
+            message (str): message to send
+
+        Returns:
+            list[SendResult]: a result per receiver (same order), never raises for a single message
+        """
+        if self._sender is None:
+            self._sender = MessageSender(self._client, *self._send_limits)
+        return await self._sender.send_many(receivers, message)
+
+    @property
+    def send_metrics(self) -> dict:
+        """send_many() counters and last batch throughput (see MessageSender.metrics)"""
+        return {} if self._sender is None else self._sender.metrics
+
+    # ========== export history ==========#
+    async def export_history(
+        self,
+        chats: "list[str|int]",
+        directory: str = "history",
+        limit: "int|None" = None,
+        batch_size: int = 5000,
+        concurrency: int = 4,
+        rate: float = 10.0,
+        max_flood_wait: int = 300,
+    ) -> "list[ExportResult]":
+        """export the history of many chats to Parquet files (directory/<peer_id>/part-<first id>-<last id>.parquet, requires pyarrow),
+        resumed after the last exported message of each chat (see HistoryExporter)
+
+        Args:
+            chats (list[str|int]): chats IDs or usernames
+            directory (str, optional): the directory of the Parquet files. Defaults to "history".
+            limit (int, optional): max new messages exported per chat, None for all. Defaults to None.
+            batch_size (int, optional): messages per Parquet file (at most concurrency * batch_size messages in memory). Defaults to 5000.
+            concurrency (int, optional): chats exported at the same time. Defaults to 4.
+            rate (float, optional): max history requests (up to 100 messages each) per second. Defaults to 10.0.
+            max_flood_wait (int, optional): longest Telegram flood wait (seconds) waited before retrying, longer ones fail the chat. Defaults to 300.
+
+        Returns:
+            list[ExportResult]: a result per chat (same order), never raises for a single chat
+        """
+        self._exporter = HistoryExporter(
+            self._client, directory, batch_size, concurrency, rate, max_flood_wait
+        )
+        return await self._exporter.export(chats, limit)
+
+    @property
+    def export_metrics(self) -> dict:
+        """export_history() counters and last export throughput (see HistoryExporter.metrics)"""
+        return {} if self._exporter is None else self._exporter.metrics
+
     # ========== wait messages ==========#
     def wait_messages(self):
         """start waiting for messages (blocking function)"""
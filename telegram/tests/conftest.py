@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+from telethon import utils
+from telethon.tl.types import (
+    InputPeerChannel,
+    InputPeerChat,
+    InputPeerUser,
+    PeerChannel,
+    PeerChat,
+)
+
+# the modules are imported flat (from _sender import ...), like the main module does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClient:
+    """
+    a TelegramClient stand-in: entities resolved from marked ids or usernames, sent messages recorded with their time,
+    history served from the messages of each peer, and errors raised once per peer (errors[peer_id] = [error, ...])
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.usernames: "dict[str, int]" = {}
+        self.sent: list = []
+        self.history: "dict[int, list]" = {}
+        self.dialogs: list = []
+        self.errors: "dict[int, list]" = {}
+        self.handlers: list = []
+        self.requests = 0
+        self.started = False
+        self._loop: "asyncio.AbstractEventLoop|None" = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """the running loop, or the client own loop outside of it"""
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            return self._loop
+
+    def start(self) -> None:
+        self.started = True
+
+    def disconnect(self):
+        # like telethon: a coroutine to await inside the running loop
+        if self.loop.is_running():
+            return self._disconnect()
+        self.started = False
+
+    async def _disconnect(self) -> None:
+        self.started = False
+
+    def on(self, event):
+        def register(handler):
+            self.handlers.append((event, handler))
+            return handler
+
+        return register
+
+    def iter_dialogs(self):
+        return iter(self.dialogs)
+
+    def add_messages(self, peer_id: int, count: int, first_id: int = 1) -> None:
+        messages = self.history.setdefault(peer_id, [])
+        for id in range(first_id, first_id + count):
+            messages.append(
+                SimpleNamespace(
+                    id=id,
+                    date=None,
+                    sender_id=42,
+                    message=f"message {id}",
+                    reply_to_msg_id=None,
+                )
+            )
+
+    async def get_input_entity(self, receiver):
+        await asyncio.sleep(0)
+        if isinstance(receiver, str):
+            if receiver not in self.usernames:
+                raise ValueError(f'No user has "{receiver}" as username')
+            receiver = self.usernames[receiver]
+        id, kind = utils.resolve_id(receiver)
+        if kind is PeerChannel:
+            return InputPeerChannel(id, 0)
+        if kind is PeerChat:
+            return InputPeerChat(id)
+        return InputPeerUser(id, 0)
+
+    def _raise(self, peer_id: int) -> None:
+        if errors := self.errors.get(peer_id):
+            raise errors.pop(0)
+
+    async def send_message(self, entity, message: str):
+        await asyncio.sleep(0)
+        peer_id = utils.get_peer_id(entity)
+        self._raise(peer_id)
+        self.sent.append((peer_id, message, asyncio.get_running_loop().time()))
+        return SimpleNamespace(id=len(self.sent), peer_id=peer_id, message=message)
+
+    async def get_messages(self, entity, limit: int, min_id: int, reverse: bool):
+        await asyncio.sleep(0)
+        assert reverse
+        self.requests += 1
+        peer_id = utils.get_peer_id(entity)
+        self._raise(peer_id)
+        return [m for m in self.history.get(peer_id, []) if m.id > min_id][:limit]
+
+
+@pytest.fixture
+def client() -> FakeClient:
+    client = FakeClient()
+    yield client
+    if client._loop is not None:
+        client._loop.close()
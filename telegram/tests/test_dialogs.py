@@ -0,0 +1,67 @@
+import json
+from types import SimpleNamespace
+import _dialogs
+from telegram import Telegram
+
+
+def dialog(peer_id: int, name: str, is_channel: bool = False) -> SimpleNamespace:
+    return SimpleNamespace(id=peer_id, name=name, is_channel=is_channel)
+
+
+def open_index(client, path: str, **kwargs):
+    telegram = Telegram(api_id=1, api_hash="hash")
+    telegram._client = client
+    return telegram.open_dialog_index(path, **kwargs)
+
+
+def test_export_json_is_keyed_by_peer_id(client, tmp_path):
+    # a user and a basic group sharing the real id 777
+    client.dialogs = [
+        dialog(777, "bob"),
+        dialog(-777, "group"),
+        dialog(-1000000001234, "news", True),
+    ]
+    index = open_index(client, str(tmp_path / "dialogs.sqlite"))
+    count = index.export_json(str(tmp_path / "chats.json"))
+
+    with open(tmp_path / "chats.json", encoding="utf-8") as f:
+        chats = json.load(f)
+    assert count == 3
+    assert chats == {"777": "bob", "-777": "group", "-1000000001234": "news"}
+    assert index.export_json(str(tmp_path / "channels.json"), channels_only=True) == 1
+    index.close()
+
+
+def test_iter_reads_batches_while_the_index_is_built_again(client, tmp_path):
+    client.dialogs = [dialog(i, f"chat {i}", i % 2 == 0) for i in range(1, 2501)]
+    index = open_index(client, str(tmp_path / "dialogs.sqlite"))
+    dialogs = index.iter()
+    first = [next(dialogs) for _ in range(1000)]
+    # no cursor is kept open between the batches
+    index.build(iter(client.dialogs[:1500]))
+    rest = list(dialogs)
+
+    assert first[0] == (1, "chat 1")
+    assert [peer_id for peer_id, _ in rest] == list(range(1001, 1501))
+    assert len(list(index.iter(channels_only=True))) == 750
+    index.close()
+
+
+def test_a_persisted_index_is_built_again_when_too_old(client, tmp_path, monkeypatch):
+    path = str(tmp_path / "dialogs.sqlite")
+    client.dialogs = [dialog(777, "bob")]
+    with monkeypatch.context() as m:
+        m.setattr(_dialogs, "time", lambda: 1000.0)
+        open_index(client, path).close()
+
+    # changed while disconnected
+    client.dialogs = [dialog(777, "bobby"), dialog(888, "alice")]
+    index = open_index(client, path, max_age=None)
+    assert index.get(777)["name"] == "bob"
+    index.close()
+
+    index = open_index(client, path, max_age=3600)
+    assert index.get(777)["name"] == "bobby"
+    assert len(index) == 2
+    assert index.age < 3600
+    index.close()
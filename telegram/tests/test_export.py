@@ -0,0 +1,80 @@
+import asyncio
+from telethon.errors import FloodWaitError
+from _export import HistoryExporter
+
+
+def export(exporter: HistoryExporter, chats: list, limit=None) -> list:
+    return asyncio.run(exporter.export(chats, limit))
+
+
+def test_export_writes_batches_and_resumes(client, tmp_path):
+    client.add_messages(777, 250)
+    exporter = HistoryExporter(client, str(tmp_path), batch_size=100, rate=1000)
+    (result,) = export(exporter, [777])
+
+    assert result.succeed
+    assert (result.chat_id, result.messages, result.parts, result.last_id) == (
+        777,
+        250,
+        3,
+        250,
+    )
+    assert sorted((tmp_path / "777").iterdir())[0].name == "part-1-100.parquet"
+
+    client.add_messages(777, 30, first_id=251)
+    requests = client.requests
+    (result,) = export(exporter, [777])
+
+    assert (result.messages, result.parts, result.last_id) == (30, 1, 280)
+    assert client.requests - requests == 1
+    assert exporter.read(777).column("id").to_pylist() == list(range(1, 281))
+
+
+def test_export_stops_at_the_limit(client, tmp_path):
+    client.usernames = {"news": -1000000001234}
+    client.add_messages(-1000000001234, 300)
+    exporter = HistoryExporter(client, str(tmp_path), batch_size=1000, rate=1000)
+    (result,) = export(exporter, ["news"], limit=120)
+
+    assert (result.chat_id, result.messages, result.last_id) == (1234, 120, 120)
+    assert exporter.last_id(-1000000001234) == 120
+    table = exporter.read(-1000000001234)
+    assert table.num_rows == 120
+    assert set(table.column("chat_id").to_pylist()) == {1234}
+
+
+def test_a_failing_chat_does_not_stop_the_export(client, tmp_path):
+    client.add_messages(777, 10)
+    client.add_messages(888, 10)
+    client.add_messages(999, 10)
+    client.errors = {
+        888: [FloodWaitError(None, capture=0)],
+        999: [FloodWaitError(None, capture=1000)],
+    }
+    exporter = HistoryExporter(client, str(tmp_path), rate=1000, max_flood_wait=60)
+    results = export(exporter, [777, 888, 999, "nobody"])
+
+    assert [result.succeed for result in results] == [True, True, False, False]
+    assert [result.messages for result in results] == [10, 10, 0, 0]
+    assert "nobody" in results[3].error
+    assert exporter.metrics["flood_waits"] == 2
+    assert exporter.metrics["last_export"]["failed"] == 2
+    assert exporter.last_id(999) == 0
+    assert exporter.read(999).num_rows == 0
+
+
+def test_chats_sharing_a_real_id_are_exported_apart(client, tmp_path):
+    # a user and a basic group with the real id 777
+    client.add_messages(777, 30)
+    client.add_messages(-777, 20, first_id=1)
+    exporter = HistoryExporter(client, str(tmp_path), rate=1000)
+    user, group = export(exporter, [777, -777])
+
+    assert (user.chat_id, user.peer_id, user.messages) == (777, 777, 30)
+    assert (group.chat_id, group.peer_id, group.messages) == (777, -777, 20)
+    assert exporter.read(777).num_rows == 30
+    assert exporter.read(-777).num_rows == 20
+
+    client.add_messages(-777, 5, first_id=21)
+    user, group = export(exporter, [777, -777])
+    assert (user.messages, group.messages, group.last_id) == (0, 5, 25)
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from _pipeline import MessagePipeline
+from telegram import Telegram
+
+
+def test_close_delivers_the_buffered_and_running_messages():
+    handled = []
+
+    def handler(chat, messages):
+        time.sleep(0.01)
+        handled.extend(messages)
+
+    async def main():
+        pipeline = MessagePipeline(handler, batch_size=10, batch_ms=60000, workers=2)
+        for i in range(25):
+            await pipeline.put(i % 3, str(i))
+        await pipeline.close()
+        await pipeline.put(0, "late")
+        return pipeline
+
+    pipeline = asyncio.run(main())
+
+    assert sorted(handled, key=int) == [str(i) for i in range(25)]
+    assert pipeline.metrics["errors"] == 0
+    assert pipeline.metrics["pending"] == 0
+    # the late message is ignored
+    assert (pipeline.metrics["received"], pipeline.metrics["dropped"]) == (25, 0)
+
+
+def test_blocked_messages_never_exceed_max_pending():
+    async def handler(chat, message):
+        await asyncio.sleep(0.001)
+
+    async def main():
+        pipeline = MessagePipeline(handler, max_pending=3)
+        await asyncio.gather(*(pipeline.put(i % 5, str(i)) for i in range(100)))
+        await pipeline.join()
+        return pipeline
+
+    pipeline = asyncio.run(main())
+
+    assert pipeline.metrics["max_pending"] == 3
+    assert pipeline.metrics["delivered"] == 100
+    assert pipeline.metrics["dropped"] == 0
+
+
+def test_close_releases_the_blocked_messages():
+    async def main():
+        done = asyncio.Event()
+
+        async def handler(chat, message):
+            await done.wait()
+
+        pipeline = MessagePipeline(handler, max_pending=1)
+        await pipeline.put(1, "first")
+        blocked = asyncio.ensure_future(pipeline.put(1, "second"))
+        await asyncio.sleep(0.01)
+        closing = asyncio.ensure_future(pipeline.close())
+        await asyncio.sleep(0.01)
+        assert blocked.done()
+        done.set()
+        await closing
+        return pipeline
+
+    pipeline = asyncio.run(main())
+
+    assert pipeline.metrics["delivered"] == 1
+    assert pipeline.metrics["dropped"] == 1
+
+
+def test_drop_oldest_keeps_the_newest_messages():
+    handled = []
+
+    async def handler(chat, messages):
+        handled.extend(messages)
+
+    async def main():
+        pipeline = MessagePipeline(
+            handler,
+            batch_size=100,
+            batch_ms=60000,
+            max_pending=3,
+            overflow="drop_oldest",
+        )
+        for i in range(10):
+            await pipeline.put(1, str(i))
+        await pipeline.close()
+        return pipeline
+
+    pipeline = asyncio.run(main())
+
+    assert handled == ["7", "8", "9"]
+    assert (pipeline.metrics["received"], pipeline.metrics["dropped"]) == (10, 7)
+
+
+def message_event(chat: int, text: str) -> SimpleNamespace:
+    return SimpleNamespace(chat_id=chat, raw_text=text)
+
+
+def test_disconnect_delivers_the_buffered_messages(client):
+    handled = []
+    telegram = Telegram(api_id=1, api_hash="hash")
+    telegram._client = client
+    pipeline = telegram.set_message_handler(
+        lambda chat, messages: handled.extend(messages), batch_size=10, batch_ms=60000
+    )
+    _, on_message = client.handlers[0]
+
+    async def receive():
+        for i in range(3):
+            await on_message(message_event(777, str(i)))
+
+    client.loop.run_until_complete(receive())
+    telegram.disconnect()
+
+    assert handled == ["0", "1", "2"]
+    assert pipeline.metrics["delivered"] == 3
+    assert not client.started
+
+
+def test_disconnect_inside_the_running_loop(client):
+    handled = []
+    telegram = Telegram(api_id=1, api_hash="hash")
+    telegram._client = client
+    client.started = True
+    telegram.set_message_handler(
+        lambda chat, messages: handled.extend(messages), batch_size=10, batch_ms=60000
+    )
+    _, on_message = client.handlers[0]
+
+    async def main():
+        await on_message(message_event(777, "buffered"))
+        # scheduled on the running loop
+        await telegram.disconnect()
+        assert not client.started
+        client.started = True
+        await on_message(message_event(777, "late"))
+        await telegram.adisconnect()
+
+    asyncio.run(main())
+
+    assert handled == ["buffered"]
+    assert not client.started
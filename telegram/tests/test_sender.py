@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from telethon.errors import FloodWaitError
+from _sender import MessageSender
+from conftest import FakeClient
+
+
+def send(sender: MessageSender, receivers: list, message: str = "hi") -> list:
+    return asyncio.run(sender.send_many(receivers, message))
+
+
+def test_send_many_reports_each_receiver(client):
+    client.usernames = {"bob": 777}
+    client.errors = {888: [FloodWaitError(None, capture=0)]}
+    sender = MessageSender(client, global_rate=1000, chat_rate=100)
+    results = send(sender, [777, 888, "nobody"])
+
+    assert [result.succeed for result in results] == [True, True, False]
+    assert [result.attempts for result in results] == [1, 2, 0]
+    assert "nobody" in results[2].error
+    assert sender.metrics["flood_waits"] == 1
+    assert sender.metrics["last_batch"]["messages"] == 3
+
+
+def test_the_same_chat_shares_its_rate_limit(client):
+    client.usernames = {"bob": 777, "channel": -1001234}
+    sender = MessageSender(client, global_rate=1000, chat_rate=5)
+    send(sender, [777, "bob", -1001234, "channel", 999])
+
+    times = {}
+    for peer_id, _, time in client.sent:
+        times.setdefault(peer_id, []).append(time)
+    assert sorted(map(len, times.values())) == [1, 2, 2]
+    for peer_times in times.values():
+        if len(peer_times) == 2:
+            assert peer_times[1] - peer_times[0] >= 0.15
+    assert sender.metrics["entities_resolved"] == 5
+
+
+def test_send_limits_are_applied_to_the_current_client(monkeypatch):
+    import telegram
+
+    clients = []
+
+    def new_client(*args):
+        clients.append(FakeClient())
+        return clients[-1]
+
+    monkeypatch.setattr(telegram.telethon, "TelegramClient", new_client)
+    tg = telegram.Telegram(1, "hash")
+    # configured before connecting
+    tg.set_send_limits(global_rate=1000, chat_rate=100, retries=0)
+    tg.connect()
+    clients[0].errors = {777: [FloodWaitError(None, capture=0)]}
+    results = asyncio.run(tg.send_many([777, 888], "hi"))
+    assert [result.succeed for result in results] == [False, True]
+    assert len(clients[0].sent) == 1
+
+    # a reconnection replaces the client, the sender follows it
+    tg.connect()
+    assert asyncio.run(tg.send_many([777], "again"))[0].succeed
+    assert [message for _, message, _ in clients[1].sent] == ["again"]
+    assert tg.send_metrics["entities_cached"] == 1